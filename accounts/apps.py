@@ -1,6 +1,12 @@
 from django.apps import AppConfig
-from django.contrib import admin
+from django.conf import settings
+
 
 class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "accounts"
+
+    def ready(self):
+        # Registers the OpenAPI extensions for the JWT subclasses
+        if settings.API_DOCS_ENABLED:
+            from . import schema  # noqa: F401
@@ -0,0 +1,15 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .revocation import is_revoked
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that rejects tokens revoked in accounts.revocation"""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        # In-memory Bloom filter check; Redis is only asked on a hit
+        if is_revoked(token):
+            raise InvalidToken('Token has been revoked')
+        return token
@@ -0,0 +1,236 @@
+"""
+Revocation of JWTs without a database lookup.
+
+Revocations are recorded in Redis:
+
+    revoked:jti:<jti>    one token, expiring when the token itself would
+    revoked:user:<id>    epoch seconds; every token the user was issued
+                         before it is revoked (e.g. on password change)
+    revoked:log          sorted set of jti:<jti> / user:<id> members scored
+                         by revocation time, which processes sync from
+
+Asking Redis on every authenticated request would add a round trip to each
+one, so every process keeps a Bloom filter of revoked jtis and user ids,
+refreshed from revoked:log by a background thread every SYNC_SECONDS and
+rebuilt (dropping expired entries) every REBUILD_SECONDS. A token whose jti
+and user are both absent from the filter is accepted without any network
+call; a hit, real or false positive, is confirmed in Redis. Revocations
+made by another process apply here within SYNC_SECONDS.
+
+When Redis is unavailable the last filter that loaded stays in use (a failed
+rebuild never replaces it). A hit that cannot be confirmed is treated as
+revoked, since hits are almost always real; a process that has never loaded
+a filter accepts tokens and logs a warning, failing open like the throttles
+in utils.throttling rather than turning every request into a 500.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+LOG_KEY = 'revoked:log'
+
+
+def jti_key(jti):
+    return f'revoked:jti:{jti}'
+
+
+def user_key(user_id):
+    return f'revoked:user:{user_id}'
+
+
+def get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def revocation_settings():
+    conf = {
+        'SYNC_SECONDS': 5,
+        'REBUILD_SECONDS': 600,
+        'CAPACITY': 100000,
+        'ERROR_RATE': 0.001,
+    }
+    conf.update(getattr(settings, 'TOKEN_REVOCATION', {}))
+    return conf
+
+
+def max_lifetime():
+    """Seconds after which no token issued before a revocation is still valid"""
+    return int(max(
+        api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME
+    ).total_seconds())
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on blake2b)"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+
+class RevocationFilter:
+    """Per-process Bloom filter over revoked:log, kept fresh by a daemon thread"""
+
+    def __init__(self, redis, conf):
+        self.redis = redis
+        self.conf = conf
+        self.bloom = None
+        self.synced_until = 0
+        self.built_at = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def new_bloom(self):
+        return BloomFilter(self.conf['CAPACITY'], self.conf['ERROR_RATE'])
+
+    def rebuild(self):
+        """Reload the filter from the log, trimming entries no live token predates"""
+        # Only swapped in once fully loaded, so a failure keeps the old one
+        now = time.time()
+        self.redis.zremrangebyscore(LOG_KEY, '-inf', now - max_lifetime())
+        bloom = self.new_bloom()
+        members = self.redis.zrange(LOG_KEY, 0, -1, withscores=True)
+        for member, score in members:
+            bloom.add(member.decode())
+        self.bloom = bloom
+        self.synced_until = max([score for _, score in members], default=now)
+        self.built_at = time.monotonic()
+
+    def pull(self):
+        # Overlap the previous sync to tolerate clock skew between writers
+        since = self.synced_until - 2 * self.conf['SYNC_SECONDS']
+        for member, score in self.redis.zrangebyscore(LOG_KEY, since, '+inf', withscores=True):
+            self.bloom.add(member.decode())
+            self.synced_until = max(self.synced_until, score)
+
+    def start(self):
+        with self.lock:
+            if self.bloom is None:
+                try:
+                    self.rebuild()
+                except Exception as e:
+                    # The sync thread keeps retrying
+                    logger.warning('Token revocation filter failed to load: %s', e)
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name='token-revocation', daemon=True
+                )
+                self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.conf['SYNC_SECONDS'])
+            try:
+                if self.bloom is None or time.monotonic() - self.built_at > self.conf['REBUILD_SECONDS']:
+                    self.rebuild()
+                else:
+                    self.pull()
+            except Exception as e:
+                logger.warning('Token revocation sync failed: %s', e)
+
+    def add(self, member):
+        if self.bloom is not None:
+            self.bloom.add(member)
+
+    def might_be_revoked(self, jti, user_id):
+        bloom = self.bloom
+        # Without a filter every token has to be checked in Redis
+        return bloom is None or f'jti:{jti}' in bloom or f'user:{user_id}' in bloom
+
+
+_filters = {}
+_filters_lock = threading.Lock()
+
+
+def get_filter():
+    """This process's filter, loaded on first use (and again after a fork)"""
+    pid = os.getpid()
+    revocation_filter = _filters.get(pid)
+    if revocation_filter is None:
+        with _filters_lock:
+            revocation_filter = _filters.get(pid)
+            if revocation_filter is None:
+                revocation_filter = _filters[pid] = RevocationFilter(
+                    get_redis(), revocation_settings()
+                )
+    if revocation_filter.thread is None:
+        revocation_filter.start()
+    return revocation_filter
+
+
+def revoke_token(token):
+    """
+    Revoke one token until it expires.
+
+    Returns False if it was already revoked, which lets refresh rotation
+    reject a refresh token presented twice concurrently.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    ttl = int(token['exp'] - time.time()) + 1
+    if ttl <= 0:
+        return False
+    pipe = get_redis().pipeline()
+    pipe.set(jti_key(jti), 1, nx=True, ex=ttl)
+    pipe.zadd(LOG_KEY, {f'jti:{jti}': time.time()})
+    created, _ = pipe.execute()
+    get_filter().add(f'jti:{jti}')
+    return bool(created)
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every token issued to user_id up to now"""
+    cutoff = int(time.time())
+    pipe = get_redis().pipeline()
+    pipe.set(user_key(user_id), cutoff, ex=max_lifetime())
+    pipe.zadd(LOG_KEY, {f'user:{user_id}': cutoff})
+    pipe.execute()
+    get_filter().add(f'user:{user_id}')
+
+
+def is_revoked(token):
+    """True if token was revoked; usually answered from memory"""
+    jti = token.get(api_settings.JTI_CLAIM)
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    revocation_filter = get_filter()
+    if not revocation_filter.might_be_revoked(jti, user_id):
+        return False
+
+    try:
+        pipe = get_redis().pipeline()
+        pipe.exists(jti_key(jti))
+        pipe.get(user_key(user_id))
+        revoked, cutoff = pipe.execute()
+    except Exception as e:
+        # A filter hit stands; with no filter loaded at all, fail open
+        logger.warning('Token revocation check failed: %s', e)
+        return revocation_filter.bloom is not None
+    # Tokens issued in the second of the cutoff survive, so a token handed
+    # out right after a password change is not revoked by it
+    return bool(revoked) or (cutoff is not None and token.get('iat', 0) < int(cutoff))
@@ -0,0 +1,13 @@
+"""drf-spectacular extensions for the revocation-aware JWT classes"""
+
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTScheme, TokenRefreshSerializerExtension
+)
+
+
+class RevocableJWTScheme(SimpleJWTScheme):
+    target_class = 'accounts.authentication.RevocableJWTAuthentication'
+
+
+class RevocableTokenRefreshSerializerExtension(TokenRefreshSerializerExtension):
+    target_class = 'accounts.serializers.RevocableTokenRefreshSerializer'
@@ -1,11 +1,17 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from utils.instrumentation import TimedSerializerMixin
+from utils.serializers import FastReadSerializerMixin
+from .revocation import is_revoked, revoke_token
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
     """Serializer for user details"""
     
     full_name = serializers.ReadOnlyField()
@@ -20,6 +26,38 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'last_seen']
 
 
+class UserRefField(serializers.PrimaryKeyRelatedField):
+    """
+    User foreign key rendered as an id.
+
+    The id is collected into the `included_users` set in the serializer
+    context so the view can side-load each user once per response.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('read_only', True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        self.collect(value.pk)
+        return value.pk
+
+    def collect(self, pk):
+        users = self.context.get('included_users')
+        if users is not None and pk is not None:
+            users.add(pk)
+
+    def compile_reader(self, model):
+        """Read the raw FK column without loading the user row"""
+        attname = model._meta.get_field(self.source).attname
+
+        def read(instance):
+            pk = getattr(instance, attname)
+            self.collect(pk)
+            return pk
+        return read
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration"""
     
@@ -97,4 +135,21 @@ class ChangePasswordSerializer(serializers.Serializer):
         user = self.context['request'].user
         if not user.check_password(value):
             raise serializers.ValidationError("Old password is incorrect")
-        return value
\ No newline at end of file
+        return value
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh that rejects revoked refresh tokens and, when rotating, revokes
+    the one it was given (what BLACKLIST_AFTER_ROTATION asks for, without
+    the token_blacklist app's database tables).
+    """
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise InvalidToken('Token has been revoked')
+        if jwt_settings.ROTATE_REFRESH_TOKENS and jwt_settings.BLACKLIST_AFTER_ROTATION:
+            # Atomic: a token presented twice at once is only honoured once
+            if not revoke_token(refresh):
+                raise InvalidToken('Token has been revoked')
+        return super().validate(attrs)
@@ -0,0 +1,98 @@
+"""
+Side-loading of user objects.
+
+Serializers render user foreign keys with UserRefField, which emits the id
+and records it in the serializer context. SideloadUsersMixin then attaches
+a single de-duplicated ``included.users`` block to the response, fetched
+from the user profile cache in one round trip. Cached profiles are shared
+by every client, so they are serialized without a request and their avatar
+URLs are made absolute for each response after reading.
+
+Response shapes:
+    paginated list / object:  {..., "included": {"users": [...]}}
+    unpaginated list:         {"results": [...], "included": {"users": [...]}}
+"""
+
+from django.contrib.auth import get_user_model
+from rest_framework.response import Response
+
+from utils.cache import cached
+from .serializers import UserSerializer
+
+User = get_user_model()
+
+PROFILE_TIMEOUT = 300
+
+
+@cached('user_profile', timeout=PROFILE_TIMEOUT, negative_timeout=60)
+def user_profile(user_id):
+    """One serialized user (None if the user doesn't exist, cached briefly)"""
+    return load_profiles([user_id]).get(user_id)
+
+
+def load_profiles(user_ids):
+    # No request in the context: the avatar URL stays relative
+    return {
+        user.id: dict(UserSerializer(user).data)
+        for user in User.objects.filter(id__in=user_ids)
+    }
+
+
+def for_request(profiles, user_ids, request):
+    """Profiles in user_ids order, with avatar URLs absolute for request"""
+    found = [profiles[user_id] for user_id in user_ids if user_id in profiles]
+    if request is None:
+        return found
+    # Copies: the cached dicts may be shared with other requests
+    return [
+        {**profile, 'avatar': request.build_absolute_uri(profile['avatar'])}
+        if profile.get('avatar') else profile
+        for profile in found
+    ]
+
+
+def get_user_profiles(user_ids, request=None):
+    """Return serialized users for user_ids, reading through the profile cache"""
+    user_ids = list(user_ids)
+    profiles = user_profile.get_many(user_ids, loader=load_profiles)
+    return for_request(profiles, user_ids, request)
+
+
+async def aget_user_profiles(user_ids, request=None):
+    """Async version of get_user_profiles"""
+    user_ids = list(user_ids)
+
+    async def loader(missing):
+        return {
+            user.id: dict(UserSerializer(user).data)
+            async for user in User.objects.filter(id__in=missing)
+        }
+
+    profiles = await user_profile.aget_many(user_ids, loader)
+    return for_request(profiles, user_ids, request)
+
+
+class SideloadUsersMixin:
+    """Attach `included.users` for every user referenced by the response"""
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if getattr(self, '_included_users', None) is None:
+            self._included_users = set()
+        context['included_users'] = self._included_users
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        users = getattr(self, '_included_users', None)
+        if (
+            users is not None
+            and isinstance(response, Response)
+            and response.status_code < 400
+            and isinstance(response.data, (dict, list))
+        ):
+            included = {'users': get_user_profiles(sorted(users), request)}
+            if isinstance(response.data, list):
+                response.data = {'results': response.data, 'included': included}
+            else:
+                response.data['included'] = included
+        return super().finalize_response(request, response, *args, **kwargs)
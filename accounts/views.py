@@ -2,11 +2,16 @@ from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.core.cache import cache
 from utils.throttling import RegistrationRateThrottle
+from utils.db_router import ReplicaReadMixin
+from workspaces.tasks import warm_sidebar
+from .revocation import revoke_user_tokens
+from .sideload import user_profile
 from .serializers import (
     UserSerializer,
     UserRegistrationSerializer,
@@ -33,7 +38,7 @@ class UserRegistrationView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet for user operations"""
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -49,16 +54,9 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def me(self, request):
         """Get current user profile"""
-        # Try to get from cache first
-        cache_key = f"user_profile:{request.user.id}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
-        serializer = self.get_serializer(request.user)
-        # Cache for 5 minutes
-        cache.set(cache_key, serializer.data, 300)
+        # request.user is already loaded by authentication, and reading it
+        # directly sees profile updates before the cache invalidation runs
+        serializer = UserSerializer(request.user, context={'request': request})
         return Response(serializer.data)
 
     @action(detail=False, methods=['put', 'patch'])
@@ -72,9 +70,9 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         
-        # Invalidate cache
-        cache_key = f"user_profile:{request.user.id}"
-        cache.delete(cache_key)
+        # Drop the side-loaded profile once the change is committed
+        user_id = request.user.id
+        transaction.on_commit(lambda: user_profile.invalidate(user_id))
         
         return Response(serializer.data)
 
@@ -88,8 +86,14 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         request.user.set_password(serializer.validated_data['new_password'])
         request.user.save()
+        
+        # Sign out every session, then hand this one a fresh pair
+        revoke_user_tokens(request.user.id)
+        refresh = RefreshToken.for_user(request.user)
         return Response({
-            'message': 'Password changed successfully'
+            'message': 'Password changed successfully',
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
         })
 
     @action(detail=False, methods=['post'])
@@ -105,14 +109,18 @@ class UserViewSet(viewsets.ModelViewSet):
         request.user.status = status_value
         request.user.save()
         
-        # Update cache
-        cache_key = f"user_profile:{request.user.id}"
-        cache.delete(cache_key)
+        # Drop the side-loaded profile once the change is committed
+        user_id = request.user.id
+        transaction.on_commit(lambda: user_profile.invalidate(user_id))
         
         # Store online status in Redis with TTL
         online_key = f"user_online:{request.user.id}"
         cache.set(online_key, status_value, 300)  # 5 min TTL
         
+        # Coming online usually means the sidebar is about to load
+        if status_value == 'online':
+            warm_sidebar.delay(request.user.id, dedup_key=f"sidebar:{request.user.id}")
+        
         return Response({
             'status': status_value,
             'message': 'Status updated successfully'
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks.runner import percentile
+from messaging import async_views
+from benchmarks.scenarios import BenchContext
+
+# (name, sync DRF path, async path); {channel} is filled from the seeded data
+ENDPOINTS = (
+    ('message_list', '/api/messages/?channel={channel}', '/api/async/messages/?channel={channel}'),
+    ('conversations', '/api/direct-messages/conversations/', '/api/async/direct-messages/conversations/'),
+    ('unread_count', '/api/direct-messages/unread_count/', '/api/async/direct-messages/unread_count/'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare sync and async read endpoints under concurrent load through the ASGI handler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            ctx = BenchContext.load()
+        except LookupError as e:
+            raise CommandError(str(e))
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(ctx.user)}'}
+
+        self.stdout.write(
+            f"{'endpoint':<16} {'mode':<6} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}"
+        )
+        with mock.patch.object(APIView, 'check_throttles', lambda self, request: None), \
+                mock.patch.object(async_views, 'check_throttles', lambda request, classes: None):
+            for name, sync_path, async_path in ENDPOINTS:
+                for mode, path in (('sync', sync_path), ('async', async_path)):
+                    path = path.format(channel=ctx.channel.id)
+                    rps, latencies, errors = asyncio.run(
+                        self.load(path, headers, options['requests'], options['concurrency'])
+                    )
+                    self.stdout.write(
+                        f'{name:<16} {mode:<6} {rps:>9.1f} '
+                        f'{percentile(latencies, 50):>9.2f} {percentile(latencies, 99):>9.2f} {errors:>7}'
+                    )
+
+    @staticmethod
+    async def load(path, headers, total, concurrency):
+        client = AsyncClient()
+        limit = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def one():
+            nonlocal errors
+            async with limit:
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return total / (time.perf_counter() - start), latencies, errors
@@ -0,0 +1,142 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django_redis.compressors.zlib import ZlibCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.pickle import PickleSerializer
+
+from accounts.serializers import UserSerializer
+from messaging.models import Message
+from messaging.serializers import MessageSerializer
+from utils import cache_codec
+from utils.cache_codec import CacheSerializer
+
+User = get_user_model()
+
+# (name, format, compressor); None format means django-redis's pickle
+CODECS = (
+    ('pickle', None, None),
+    ('pickle+zlib', None, 'zlib'),
+    ('json', 'json', None),
+    ('json+zlib', 'json', 'zlib'),
+    ('json+lz4', 'json', 'lz4'),
+    ('msgpack', 'msgpack', None),
+    ('msgpack+zlib', 'msgpack', 'zlib'),
+    ('msgpack+lz4', 'msgpack', 'lz4'),
+)
+
+
+def pickle_codec(compressor):
+    """encode/decode the way django-redis does with its default serializer"""
+    serializer = PickleSerializer(options={})
+    zlib_compressor = ZlibCompressor(options={}) if compressor else None
+
+    def encode(value):
+        data = serializer.dumps(value)
+        return zlib_compressor.compress(data) if zlib_compressor else data
+
+    def decode(data):
+        if zlib_compressor:
+            try:
+                data = zlib_compressor.decompress(data)
+            except CompressorError:
+                pass
+        return serializer.loads(data)
+    return encode, decode
+
+
+def tagged_codec(format_, compressor, min_bytes):
+    serializer = CacheSerializer({'CODEC': {
+        'FORMAT': format_, 'COMPRESSOR': compressor, 'COMPRESS_MIN_BYTES': min_bytes,
+    }})
+    return serializer.dumps, serializer.loads
+
+
+def available(format_, compressor):
+    if format_ == 'msgpack' and cache_codec.msgpack is None:
+        return False
+    return not (compressor == 'lz4' and cache_codec.lz4 is None)
+
+
+class Command(BaseCommand):
+    help = 'Compare cache value encodings (size, encode and decode time) on real payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200,
+                            help='User profiles to encode, one cache entry each')
+        parser.add_argument('--page-size', type=int, default=50,
+                            help='Messages per cached page')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--min-bytes', type=int, default=1024,
+                            help='Compression threshold for the tagged codecs')
+        parser.add_argument('--output', help='Write results as JSON to this path')
+
+    def handle(self, *args, **options):
+        profiles = [
+            dict(UserSerializer(user).data)
+            for user in User.objects.order_by('id')[:options['users']]
+        ]
+        messages = list(
+            Message.objects.select_related('sender')
+            .prefetch_related('reactions__user', 'attachments__uploaded_by', 'replies')
+            .order_by('-created_at')[:options['page_size']]
+        )
+        if not profiles or not messages:
+            raise CommandError('No users or messages found; run seed_benchmark first')
+        serializer = MessageSerializer()
+        page = [serializer.to_representation(message) for message in messages]
+
+        payloads = {
+            # JSON round trip: what callers actually store (plain dicts and lists)
+            'user_profile': json.loads(json.dumps(profiles)),
+            'message_page': [json.loads(json.dumps(page))],
+        }
+
+        results = {}
+        self.stdout.write(
+            f"{'payload':<13} {'codec':<13} {'bytes/entry':>11} {'ratio':>6} "
+            f"{'encode us':>10} {'decode us':>10}"
+        )
+        for payload, values in payloads.items():
+            baseline = None
+            for name, format_, compressor in CODECS:
+                if not available(format_, compressor):
+                    continue
+                if format_ is None:
+                    encode, decode = pickle_codec(compressor)
+                else:
+                    encode, decode = tagged_codec(format_, compressor, options['min_bytes'])
+                encoded = [encode(value) for value in values]
+                if [decode(data) for data in encoded] != values:
+                    raise CommandError(f'{name} does not round-trip {payload}')
+
+                size = sum(len(data) for data in encoded) / len(values)
+                baseline = baseline or size
+                result = {
+                    'bytes_per_entry': round(size),
+                    'ratio': round(size / baseline, 2),
+                    'encode_us': self.measure(lambda: [encode(v) for v in values],
+                                              len(values), options['iterations']),
+                    'decode_us': self.measure(lambda: [decode(d) for d in encoded],
+                                              len(values), options['iterations']),
+                }
+                results.setdefault(payload, {})[name] = result
+                self.stdout.write(
+                    f"{payload:<13} {name:<13} {result['bytes_per_entry']:>11} "
+                    f"{result['ratio']:>6} {result['encode_us']:>10} {result['decode_us']:>10}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    @staticmethod
+    def measure(func, entries, iterations):
+        """Microseconds per entry"""
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return round((time.perf_counter() - start) / (iterations * entries) * 1e6, 2)
@@ -0,0 +1,87 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from messaging.models import Message
+from messaging.serializers import MessageSerializer
+from utils.renderers import FastJSONRenderer
+
+
+def stock_representation(serializer, instance):
+    """The per-field DRF path the fast mixin replaces"""
+    return serializers.ModelSerializer.to_representation(serializer, instance)
+
+
+class Command(BaseCommand):
+    help = 'Compare the stock and fast serializer/renderer paths on a page of messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--output', help='Write results as JSON to this path')
+
+    def handle(self, *args, **options):
+        messages = list(
+            Message.objects.select_related('sender')
+            .prefetch_related('reactions__user', 'attachments__uploaded_by', 'replies')
+            .order_by('-created_at')[:options['page_size']]
+        )
+        if not messages:
+            raise CommandError('No messages found; run seed_benchmark first')
+
+        serializer = MessageSerializer()
+        iterations = options['iterations']
+
+        stock_rows = [stock_representation(serializer, m) for m in messages]
+        fast_rows = [serializer.to_representation(m) for m in messages]
+        if json.dumps(stock_rows, default=str) != json.dumps(fast_rows, default=str):
+            raise CommandError('Fast serializer output differs from stock output')
+
+        results = {
+            'page_size': len(messages),
+            'serializer': {
+                'stock': self.measure(
+                    lambda: [stock_representation(serializer, m) for m in messages],
+                    iterations),
+                'fast': self.measure(
+                    lambda: [serializer.to_representation(m) for m in messages],
+                    iterations),
+            },
+            'renderer': {
+                'stock': self.measure_renderer(JSONRenderer(), fast_rows, iterations),
+                'fast': self.measure_renderer(FastJSONRenderer(), fast_rows, iterations),
+            },
+        }
+
+        for section, entries in (('serializer', results['serializer']),
+                                 ('renderer', results['renderer'])):
+            for name, result in entries.items():
+                self.stdout.write(f'{section:<11} {name:<6} ' + ' '.join(
+                    f'{key}={value}' for key, value in result.items()
+                ))
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    @staticmethod
+    def measure(func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        return {
+            'ms_per_page': round(elapsed / iterations * 1000, 3),
+            'pages_per_sec': round(iterations / elapsed, 1),
+        }
+
+    def measure_renderer(self, renderer, data, iterations):
+        size = len(renderer.render(data))
+        result = self.measure(lambda: renderer.render(data), iterations)
+        result['bytes'] = size
+        result['mb_per_sec'] = round(size * result['pages_per_sec'] / 1e6, 2)
+        return result
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import BenchmarkRunner, compare, load_results, save_results
+from benchmarks.scenarios import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the core API endpoints against the seeded dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                            help='Scenario to run (repeatable, default: all)')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--conn-max-age', type=int,
+                            help='Override CONN_MAX_AGE (0 = new connection per request)')
+        parser.add_argument('--output', help='Write results as JSON to this path')
+        parser.add_argument('--compare', help='Previous results JSON to diff against')
+
+    def handle(self, *args, **options):
+        runner = BenchmarkRunner(
+            scenarios=options['scenario'],
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            concurrency=options['concurrency'],
+            conn_max_age=options['conn_max_age'],
+            log=self.stdout.write,
+        )
+        try:
+            results = runner.run()
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            save_results(results, options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            previous = load_results(options['compare'])
+            self.stdout.write(
+                f"\nCompared with {previous['environment'].get('commit') or options['compare']}:"
+            )
+            for name, metric, before, after, change in compare(previous, results):
+                style = self.style.ERROR if change > 10 else self.style.SUCCESS
+                self.stdout.write(style(
+                    f'{name:<22} {metric:<8} {before:>10} -> {after:>10} ({change:+.1f}%)'
+                ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.seed import Seeder
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic workspaces, channels, members, messages and DMs for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workspaces', type=int, default=2)
+        parser.add_argument('--channels', type=int, default=10,
+                            help='Channels per workspace')
+        parser.add_argument('--members', type=int, default=200,
+                            help='Members per workspace')
+        parser.add_argument('--messages', type=int, default=100000,
+                            help='Channel messages per workspace')
+        parser.add_argument('--direct-messages', type=int, default=20000,
+                            help='Direct messages per workspace')
+        parser.add_argument('--days', type=int, default=90,
+                            help='Spread message timestamps over this many days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            workspaces=options['workspaces'],
+            channels=options['channels'],
+            members=options['members'],
+            messages=options['messages'],
+            direct_messages=options['direct_messages'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        seeder.run()
+        self.stdout.write(self.style.SUCCESS('Benchmark data seeded'))
@@ -0,0 +1,195 @@
+"""
+In-process benchmark runner.
+
+Requests go through the full Django/DRF stack via APIClient, so latency
+includes middleware, authentication, serialization and rendering, and the
+query count for every request is captured alongside its timing.
+"""
+
+import json
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from events.models import OutboxEvent
+from messaging.models import Message, DirectMessage, Mention
+from notifications.models import Notification
+from workspaces.models import Channel, ChannelMember
+from .scenarios import SCENARIOS, BenchContext
+
+# Every model a write scenario adds rows to, dependents first
+WRITTEN_MODELS = (OutboxEvent, Notification, Mention, ChannelMember, Message, Channel)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, wall_time):
+    latencies = [sample['ms'] for sample in samples]
+    queries = [sample['queries'] for sample in samples]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample['status'] >= 400),
+        'throughput_rps': round(len(samples) / wall_time, 2) if wall_time else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'p50': round(percentile(latencies, 50), 3),
+            'p90': round(percentile(latencies, 90), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(max(latencies), 3),
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2),
+            'max': max(queries),
+        },
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+        'pgbouncer': connection.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS', False),
+        'cache': settings.CACHES['default']['BACKEND'],
+        'messages': Message.objects.count(),
+        'direct_messages': DirectMessage.objects.count(),
+    }
+
+
+class BenchmarkRunner:
+    """Runs scenarios and collects per-endpoint latency and query counts"""
+
+    def __init__(self, scenarios=None, iterations=200, warmup=10, concurrency=1,
+                 conn_max_age=None, log=print):
+        self.scenarios = scenarios or list(SCENARIOS)
+        self.iterations = iterations
+        self.warmup = warmup
+        self.concurrency = concurrency
+        self.conn_max_age = conn_max_age
+        self.log = log
+
+    def run(self):
+        if self.conn_max_age is not None:
+            # Compare per-request connections (0) with persistent ones
+            connections.close_all()
+            for alias in connections:
+                connections[alias].settings_dict['CONN_MAX_AGE'] = self.conn_max_age
+        ctx = BenchContext.load()
+        ctx.run_id = str(int(time.time()))
+        watermarks = self.watermarks()
+        results = {'environment': environment(), 'scenarios': {}}
+        # Throttles would reject most of the run; they are measured separately
+        with mock.patch.object(APIView, 'check_throttles', lambda self, request: None):
+            try:
+                for name in self.scenarios:
+                    results['scenarios'][name] = self.run_scenario(name, ctx)
+                    self.log(self.format_row(name, results['scenarios'][name]))
+            finally:
+                self.cleanup(watermarks)
+        return results
+
+    def run_scenario(self, name, ctx):
+        func = SCENARIOS[name]
+        for i in range(self.warmup):
+            self.request(func, ctx, -i - 1)
+
+        start = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(self.concurrency) as pool:
+                samples = list(pool.map(
+                    lambda i: self.request(func, ctx, i), range(self.iterations)
+                ))
+        else:
+            samples = [self.request(func, ctx, i) for i in range(self.iterations)]
+        wall_time = time.perf_counter() - start
+        connections.close_all()
+        return summarize(samples, wall_time)
+
+    def request(self, func, ctx, i):
+        method, path, payload = func(ctx, i)
+        client = APIClient()
+        client.force_authenticate(ctx.user)
+        # The query log is a bounded deque; keep it from saturating
+        connection.queries_log.clear()
+        # The test client disconnects close_old_connections from the request
+        # signals, so apply CONN_MAX_AGE around each request as the handler
+        # would. Timing starts before the capture context opens the
+        # connection, so reconnecting is part of the measured latency.
+        close_old_connections()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(path, payload, format='json')
+        elapsed = (time.perf_counter() - start) * 1000
+        close_old_connections()
+        return {'ms': elapsed, 'queries': len(queries), 'status': response.status_code}
+
+    def watermarks(self):
+        return {
+            model: model._base_manager.order_by('-id').values_list('id', flat=True).first() or 0
+            for model in WRITTEN_MODELS
+        }
+
+    def cleanup(self, watermarks):
+        """Remove rows created by write scenarios so runs stay comparable"""
+        for model, last_id in watermarks.items():
+            model._base_manager.filter(id__gt=last_id).delete()
+
+    @staticmethod
+    def format_row(name, result):
+        latency = result['latency_ms']
+        return (
+            f"{name:<22} p50={latency['p50']:>8.2f}ms p95={latency['p95']:>8.2f}ms "
+            f"p99={latency['p99']:>8.2f}ms rps={result['throughput_rps']:>8} "
+            f"queries={result['queries']['mean']:>6} errors={result['errors']}"
+        )
+
+
+def compare(previous, current):
+    """Yield (scenario, metric, old, new, change %) for shared scenarios"""
+    for name, result in current['scenarios'].items():
+        old = previous['scenarios'].get(name)
+        if not old:
+            continue
+        for metric in ('p50', 'p95', 'p99'):
+            before, after = old['latency_ms'][metric], result['latency_ms'][metric]
+            change = (after - before) / before * 100 if before else 0.0
+            yield name, metric, before, after, change
+        before, after = old['queries']['mean'], result['queries']['mean']
+        change = (after - before) / before * 100 if before else 0.0
+        yield name, 'queries', before, after, change
+
+
+def load_results(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def save_results(results, path):
+    with open(path, 'w') as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
@@ -0,0 +1,85 @@
+"""
+Benchmark scenarios for the core API paths.
+
+A scenario is a callable taking the run context and an iteration number
+and returning (method, path, payload). Register new ones with @scenario.
+"""
+
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model
+
+from workspaces.models import Workspace, Channel
+from .seed import SLUG_PREFIX, WORDS
+
+User = get_user_model()
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+@dataclass
+class BenchContext:
+    user: object
+    workspace: object
+    channel: object
+    run_id: str = ''
+
+    @classmethod
+    def load(cls):
+        workspace = (
+            Workspace.objects.filter(slug__startswith=SLUG_PREFIX)
+            .select_related('owner').order_by('slug').first()
+        )
+        if workspace is None:
+            raise LookupError('No benchmark data found; run seed_benchmark first')
+        channel = (
+            Channel.objects.filter(workspace=workspace, channel_type='public')
+            .order_by('id').first()
+        )
+        return cls(user=workspace.owner, workspace=workspace, channel=channel)
+
+
+@scenario('message_list')
+def message_list(ctx, i):
+    return 'get', f'/api/messages/?channel={ctx.channel.id}', None
+
+
+@scenario('message_post')
+def message_post(ctx, i):
+    return 'post', '/api/messages/', {
+        'channel': ctx.channel.id,
+        'content': f'benchmark message {i} {WORDS[i % len(WORDS)]}',
+    }
+
+
+@scenario('message_search')
+def message_search(ctx, i):
+    word = WORDS[i % len(WORDS)]
+    return 'get', f'/api/messages/search/?q={word}&channel={ctx.channel.id}', None
+
+
+@scenario('conversations')
+def conversations(ctx, i):
+    return 'get', '/api/direct-messages/conversations/', None
+
+
+@scenario('channel_create')
+def channel_create(ctx, i):
+    return 'post', '/api/channels/', {
+        'workspace': ctx.workspace.id,
+        'name': f'bench-created-{i}',
+        'slug': f'bench-created-{ctx.run_id}-{i}',
+        'channel_type': 'public',
+    }
+
+
+@scenario('workspace_members')
+def workspace_members(ctx, i):
+    return 'get', f'/api/workspaces/{ctx.workspace.id}/members/', None
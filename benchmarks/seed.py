@@ -0,0 +1,189 @@
+"""
+Synthetic data generation for the benchmark suite.
+
+Everything is created with bulk_create in fixed-size batches and driven by
+a seeded RNG, so the same arguments always produce the same dataset.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from workspaces.models import Workspace, WorkspaceMember, Channel, ChannelMember
+from messaging.models import Message, DirectMessage
+
+User = get_user_model()
+
+SLUG_PREFIX = 'bench-'
+PASSWORD = 'bench-password'
+
+WORDS = (
+    'deploy release review incident latency cache redis postgres query '
+    'index migration rollback standup sprint ticket bug feature design '
+    'roadmap customer support metrics dashboard alert oncall retro '
+    'benchmark throughput worker queue schema api client mobile web'
+).split()
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values we generate"""
+    fields = [
+        field for model in models for field in model._meta.fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Seeder:
+    """Builds a reproducible benchmark dataset"""
+
+    def __init__(self, workspaces=2, channels=10, members=200, messages=100000,
+                 direct_messages=20000, days=90, batch_size=5000, seed=42,
+                 log=print):
+        self.workspaces = workspaces
+        self.channels = channels
+        self.members = members
+        self.messages = messages
+        self.direct_messages = direct_messages
+        self.days = days
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log
+        self.now = timezone.now()
+
+    def run(self):
+        users = self.create_users()
+        for index in range(self.workspaces):
+            workspace_users = users[:1] + self.rng.sample(
+                users[1:], min(self.members, len(users)) - 1
+            )
+            workspace = self.create_workspace(index, workspace_users)
+            channels = self.create_channels(workspace, workspace_users)
+            self.create_messages(channels, workspace_users)
+            self.create_direct_messages(workspace_users)
+            self.log(f'Seeded workspace {workspace.slug}')
+
+    def create_users(self):
+        password = make_password(PASSWORD)
+        existing = set(
+            User.objects.filter(username__startswith=SLUG_PREFIX)
+            .values_list('username', flat=True)
+        )
+        new_users = [
+            User(
+                username=f'{SLUG_PREFIX}user{i}',
+                email=f'{SLUG_PREFIX}user{i}@example.com',
+                first_name=self.rng.choice(WORDS).title(),
+                bio=self.sentence(12),
+                password=password,
+            )
+            for i in range(self.members)
+            if f'{SLUG_PREFIX}user{i}' not in existing
+        ]
+        User.objects.bulk_create(new_users, batch_size=self.batch_size)
+        return list(
+            User.objects.filter(username__startswith=SLUG_PREFIX).order_by('id')
+        )
+
+    @transaction.atomic
+    def create_workspace(self, index, users):
+        slug = f'{SLUG_PREFIX}{index}'
+        Workspace.objects.filter(slug=slug).delete()
+        workspace = Workspace.objects.create(
+            name=f'Benchmark {index}', slug=slug, owner=users[0]
+        )
+        WorkspaceMember.objects.bulk_create([
+            WorkspaceMember(
+                workspace=workspace,
+                user=user,
+                role='owner' if user == users[0] else 'member'
+            )
+            for user in users
+        ], batch_size=self.batch_size)
+        return workspace
+
+    @transaction.atomic
+    def create_channels(self, workspace, users):
+        Channel.objects.bulk_create([
+            Channel(
+                workspace=workspace,
+                name=f'channel-{i}',
+                slug=f'channel-{i}',
+                channel_type='public' if i % 5 else 'private',
+                created_by=users[0],
+            )
+            for i in range(self.channels)
+        ])
+        channels = list(Channel.objects.filter(workspace=workspace))
+        for channel in channels:
+            channel_users = users if channel.channel_type == 'public' else users[:20]
+            ChannelMember.objects.bulk_create([
+                ChannelMember(channel=channel, user=user) for user in channel_users
+            ], batch_size=self.batch_size)
+        return channels
+
+    def create_messages(self, channels, users):
+        sender_ids = [user.id for user in users[:50]] or [users[0].id]
+        created = 0
+        with explicit_timestamps(Message):
+            while created < self.messages:
+                count = min(self.batch_size, self.messages - created)
+                batch = []
+                for _ in range(count):
+                    timestamp = self.timestamp()
+                    batch.append(Message(
+                        channel=self.rng.choice(channels),
+                        sender_id=self.rng.choice(sender_ids),
+                        content=self.sentence(self.rng.randint(4, 30)),
+                        created_at=timestamp,
+                        updated_at=timestamp,
+                    ))
+                with transaction.atomic():
+                    Message.objects.bulk_create(batch)
+                created += count
+                self.log(f'  messages: {created}/{self.messages}')
+
+    def create_direct_messages(self, users):
+        if len(users) < 2:
+            return
+        # DMs cluster around the first user so conversations has real work
+        created = 0
+        with explicit_timestamps(DirectMessage):
+            while created < self.direct_messages:
+                count = min(self.batch_size, self.direct_messages - created)
+                batch = []
+                for _ in range(count):
+                    other = self.rng.choice(users[1:])
+                    sender, recipient = self.rng.sample([users[0], other], 2)
+                    timestamp = self.timestamp()
+                    batch.append(DirectMessage(
+                        sender=sender,
+                        recipient=recipient,
+                        content=self.sentence(self.rng.randint(3, 20)),
+                        read=self.rng.random() < 0.8,
+                        created_at=timestamp,
+                        updated_at=timestamp,
+                    ))
+                with transaction.atomic():
+                    DirectMessage.objects.bulk_create(batch)
+                created += count
+                self.log(f'  direct messages: {created}/{self.direct_messages}')
+
+    def sentence(self, length):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(length))
+
+    def timestamp(self):
+        return self.now - timedelta(seconds=self.rng.randint(0, self.days * 86400))
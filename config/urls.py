@@ -1,22 +1,36 @@
-from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from utils.instrumentation import metrics_view
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    
-    # API Documentation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    # Prometheus metrics
+    path('api/metrics/', metrics_view, name='metrics'),
     
     # API endpoints
     path('api/', include('accounts.urls')),
     path('api/', include('workspaces.urls')),
     path('api/', include('messaging.urls')),
+    path('api/', include('events.urls')),
+    path('api/', include('notifications.urls')),
 ]
 
+# Optional routes, imported only when enabled (ADMIN_ENABLED, API_DOCS_ENABLED)
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+    
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if settings.API_DOCS_ENABLED:
+    from drf_spectacular.views import SpectacularSwaggerView
+    from utils.schema import schema_view
+    
+    # The schema is a prebuilt artifact; see utils.schema
+    urlpatterns += [
+        path('api/schema/', schema_view, name='schema'),
+        path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    ]
+
 # Serve media files in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
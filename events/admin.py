@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'stream', 'event_type', 'created_at', 'published_at']
+    list_filter = ['event_type']
+    search_fields = ['stream']
@@ -0,0 +1,53 @@
+"""
+Reading a user's events back out of the outbox.
+
+Shared by the raw event feed (/api/events/) and the sync endpoint. Cursors
+are event seqs (see events.outbox.sequence_events), which follow commit
+order, so paging forward never skips an event that committed late.
+"""
+
+from workspaces.models import ChannelMember, WorkspaceMember
+from .models import OutboxEvent
+from .outbox import channel_stream, workspace_stream, user_stream, sequence_events
+
+
+def visible_streams(user):
+    """Every stream the user is allowed to read"""
+    channel_ids = ChannelMember.objects.filter(user=user).values_list('channel_id', flat=True)
+    workspace_ids = WorkspaceMember.objects.filter(user=user).values_list('workspace_id', flat=True)
+    return (
+        [channel_stream(channel_id) for channel_id in channel_ids]
+        + [workspace_stream(workspace_id) for workspace_id in workspace_ids]
+        + [user_stream(user.id)]
+    )
+
+
+def sequenced_events():
+    return OutboxEvent.objects.filter(seq__isnull=False)
+
+
+def latest_event_id():
+    """Cursor for "now": the highest seq handed out"""
+    return sequenced_events().order_by('-seq').values_list('seq', flat=True).first() or 0
+
+
+def cursor_expired(since):
+    """True when events after since have already been pruned"""
+    # Older events are pruned by the relay; a cursor before the oldest
+    # retained event means the client has to do a full refetch
+    oldest = sequenced_events().order_by('seq').values_list('seq', flat=True).first()
+    return bool(since and oldest and since < oldest - 1)
+
+
+def read_events(user, since, limit):
+    """Return (events after seq since in the user's streams, has_more)"""
+    # Normally the relay keeps up; number anything it has not reached yet,
+    # unless someone else is doing so right now
+    sequence_events(wait=False)
+    events = list(
+        sequenced_events().filter(
+            seq__gt=since,
+            stream__in=visible_streams(user)
+        ).order_by('seq')[:limit + 1]
+    )
+    return events[:limit], len(events) > limit
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.relay import OutboxRelay
+
+
+class Command(BaseCommand):
+    help = 'Publish committed outbox events to Redis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--interval', type=float, default=0.5,
+                            help='Seconds to wait when the outbox is drained')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the outbox is drained')
+
+    def handle(self, *args, **options):
+        relay = OutboxRelay(batch_size=options['batch_size'])
+
+        while not relay.acquire_lock():
+            if options['once']:
+                self.stdout.write('Another relay is running')
+                return
+            time.sleep(5)
+
+        try:
+            relayed = relay.run(interval=options['interval'], once=options['once'])
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f'Relayed {relayed} events'))
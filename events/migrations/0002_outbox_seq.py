@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-19 18:10
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def number_existing_events(apps, schema_editor):
+    # Everything already here has committed; keeping seq == id means cursors
+    # handed out before the upgrade still point at the same place
+    OutboxEvent = apps.get_model('events', 'OutboxEvent')
+    OutboxEvent.objects.using(schema_editor.connection.alias).update(seq=F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="outboxevent",
+            name="events_outb_stream_faa71b_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="outboxevent",
+            name="outbox_unpublished_idx",
+        ),
+        migrations.AddField(
+            model_name="outboxevent",
+            name="seq",
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(number_existing_events, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="outboxevent",
+            index=models.Index(
+                fields=["stream", "seq"], name="events_outb_stream_df328b_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="outboxevent",
+            index=models.Index(
+                condition=models.Q(("seq__isnull", True)),
+                fields=["id"],
+                name="outbox_unsequenced_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="outboxevent",
+            index=models.Index(
+                condition=models.Q(("published_at__isnull", True)),
+                fields=["seq"],
+                name="outbox_unpublished_seq_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class OutboxEvent(models.Model):
+    """
+    A change recorded in the same transaction as the write that caused it.
+
+    Events go to a stream (``channel:<id>``, ``workspace:<id>`` or
+    ``user:<id>`` for direct messages) and are ordered by seq, which
+    events.outbox.sequence_events assigns once they have committed. Ids are
+    taken at insert, so a transaction that commits late can hold lower ids
+    than events already read; seq never goes back. The relay publishes
+    events in seq order and stamps published_at.
+    """
+    
+    stream = models.CharField(max_length=64)
+    event_type = models.CharField(max_length=64)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    seq = models.BigIntegerField(null=True, blank=True, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['stream', 'seq']),
+            models.Index(
+                fields=['id'],
+                condition=models.Q(seq__isnull=True),
+                name='outbox_unsequenced_idx'
+            ),
+            models.Index(
+                fields=['seq'],
+                condition=models.Q(published_at__isnull=True),
+                name='outbox_unpublished_seq_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} on {self.stream} (#{self.id})"
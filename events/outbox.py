@@ -0,0 +1,170 @@
+"""
+Recording outbox events.
+
+Call emit() inside the transaction that makes the change, so the event
+exists if and only if the change committed:
+
+    with transaction.atomic():
+        message = serializer.save(sender=user)
+        emit(channel_stream(message.channel_id), 'message.created', message_payload(message))
+
+Every recorded batch is also announced through the events_recorded signal
+(with events=[OutboxEvent, ...]) so local caches can invalidate precisely;
+receivers that touch shared state should defer it with on_commit.
+
+Readers order events by seq, not id. sequence_events() numbers committed
+events in the order it first sees them, one caller at a time (a
+transaction-level advisory lock on Postgres), continuing from the highest
+seq. A transaction that commits late gets numbers after everything already
+numbered, so a cursor that has moved past seq N never misses an event.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.dispatch import Signal
+
+from .models import OutboxEvent
+
+events_recorded = Signal()
+
+SEQUENCE_LOCK_ID = 0x6f7574736571  # "outseq"
+SEQUENCE_BATCH = 1000
+
+
+def channel_stream(channel_id):
+    return f"channel:{channel_id}"
+
+
+def workspace_stream(workspace_id):
+    return f"workspace:{workspace_id}"
+
+
+def user_stream(user_id):
+    return f"user:{user_id}"
+
+
+def emit(stream, event_type, payload):
+    """Record one event in the current transaction"""
+    event = OutboxEvent.objects.create(
+        stream=stream,
+        event_type=event_type,
+        payload=payload
+    )
+    events_recorded.send(sender=OutboxEvent, events=[event])
+    return event
+
+
+def emit_many(events):
+    """Record [(stream, event_type, payload)] with a single insert"""
+    events = OutboxEvent.objects.bulk_create([
+        OutboxEvent(stream=stream, event_type=event_type, payload=payload)
+        for stream, event_type, payload in events
+    ])
+    events_recorded.send(sender=OutboxEvent, events=events)
+    return events
+
+
+def sequence_events(limit=SEQUENCE_BATCH, wait=True):
+    """
+    Give up to limit committed, unnumbered events the next seqs; returns how many.
+
+    With wait=False it returns 0 at once if another caller is numbering.
+    """
+    using = router.db_for_write(OutboxEvent)
+    events = OutboxEvent.objects.using(using)
+    if not events.filter(seq__isnull=True).exists():
+        return 0
+
+    with transaction.atomic(using=using):
+        connection = connections[using]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                if wait:
+                    cursor.execute('SELECT pg_advisory_xact_lock(%s)', [SEQUENCE_LOCK_ID])
+                else:
+                    cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [SEQUENCE_LOCK_ID])
+                    if not cursor.fetchone()[0]:
+                        return 0
+        # Read under the lock, so the previous caller's numbers are visible
+        last = events.aggregate(last=Max('seq'))['last'] or 0
+        batch = list(events.filter(seq__isnull=True).order_by('id').only('id')[:limit])
+        for seq, event in enumerate(batch, start=last + 1):
+            event.seq = seq
+        events.bulk_update(batch, ['seq'])
+    return len(batch)
+
+
+def emit_membership(stream, event_type, payload):
+    """
+    Membership events also go to the member's own stream, so a removed
+    member still sees their removal after losing access to the old one.
+    """
+    return emit_many([
+        (stream, event_type, payload),
+        (user_stream(payload['user']), event_type, payload),
+    ])
+
+
+def emit_to_users(user_ids, event_type, payload):
+    """One event per user stream, for changes that outlive the shared stream"""
+    return emit_many([
+        (user_stream(user_id), event_type, payload) for user_id in user_ids
+    ])
+
+
+def message_payload(message):
+    return {
+        'id': message.id,
+        'channel': message.channel_id,
+        'sender': message.sender_id,
+        'parent': message.parent_id,
+        'content': message.content,
+        'edited': message.edited,
+        'pinned': message.pinned,
+        'created_at': message.created_at,
+        'updated_at': message.updated_at,
+    }
+
+
+def direct_message_payload(message):
+    return {
+        'id': message.id,
+        'sender': message.sender_id,
+        'recipient': message.recipient_id,
+        'content': message.content,
+        'read': message.read,
+        'read_at': message.read_at,
+        'created_at': message.created_at,
+        'updated_at': message.updated_at,
+    }
+
+
+def emit_direct_message(event_type, message):
+    """DM events go to both participants' streams"""
+    payload = direct_message_payload(message)
+    return emit_many([
+        (user_stream(message.sender_id), event_type, payload),
+        (user_stream(message.recipient_id), event_type, payload),
+    ])
+
+
+def event_data(event):
+    return {
+        'id': event.id,
+        'seq': event.seq,
+        'stream': event.stream,
+        'type': event.event_type,
+        'payload': event.payload,
+        'created_at': event.created_at,
+    }
+
+
+def encode_events(events):
+    """JSON-lines: one compact event per line"""
+    return '\n'.join(
+        json.dumps(event_data(event), cls=DjangoJSONEncoder, separators=(',', ':'))
+        for event in events
+    )
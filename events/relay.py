@@ -0,0 +1,109 @@
+"""
+Outbox relay: publishes committed events to Redis pub/sub.
+
+Each batch first numbers newly committed events (events.outbox.
+sequence_events), then reads unpublished ones in seq order, groups them by
+stream and publishes one JSON-lines message per stream on
+``<prefix><stream>`` before the rows are stamped published_at in the same
+transaction. A crash between the two republishes the batch, so delivery is
+at-least-once; subscribers de-dupe on event id. seq follows commit order,
+and only one relay runs at a time (a Postgres advisory lock), so an event
+that commits late is published after, never between, events already sent
+on its stream. Subscribers that miss messages catch up with
+GET /api/events/?since=<last seq>.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+from .outbox import encode_events, sequence_events
+
+logger = logging.getLogger(__name__)
+
+RELAY_LOCK_ID = 0x6f7574626f78  # "outbox"
+
+
+def get_settings():
+    defaults = {
+        'CHANNEL_PREFIX': 'events:',
+        'BATCH_SIZE': 500,
+        'RETENTION_DAYS': 7,
+    }
+    return {**defaults, **getattr(settings, 'OUTBOX', {})}
+
+
+class OutboxRelay:
+    """Move unpublished outbox rows to Redis in batches"""
+
+    def __init__(self, redis=None, batch_size=None, channel_prefix=None):
+        conf = get_settings()
+        if redis is None:
+            from django_redis import get_redis_connection
+            redis = get_redis_connection('default')
+        self.redis = redis
+        self.batch_size = batch_size or conf['BATCH_SIZE']
+        self.channel_prefix = channel_prefix or conf['CHANNEL_PREFIX']
+        self.retention = timedelta(days=conf['RETENTION_DAYS'])
+
+    def acquire_lock(self):
+        """Session-level advisory lock so a single relay publishes at a time"""
+        if connection.vendor != 'postgresql':
+            return True
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [RELAY_LOCK_ID])
+            return cursor.fetchone()[0]
+
+    def publish(self, events):
+        streams = {}
+        for event in events:
+            streams.setdefault(event.stream, []).append(event)
+        pipe = self.redis.pipeline(transaction=False)
+        for stream, stream_events in streams.items():
+            pipe.publish(f'{self.channel_prefix}{stream}', encode_events(stream_events))
+        pipe.execute()
+
+    def relay_batch(self):
+        sequence_events(self.batch_size)
+        with transaction.atomic():
+            events = list(
+                OutboxEvent.objects.select_for_update()
+                .filter(published_at__isnull=True, seq__isnull=False)
+                .order_by('seq')[:self.batch_size]
+            )
+            if not events:
+                return 0
+            self.publish(events)
+            OutboxEvent.objects.filter(
+                id__in=[event.id for event in events]
+            ).update(published_at=timezone.now())
+        return len(events)
+
+    def prune(self):
+        """Delete published events older than the retention window"""
+        deleted, _ = OutboxEvent.objects.filter(
+            published_at__isnull=False,
+            created_at__lt=timezone.now() - self.retention
+        ).delete()
+        return deleted
+
+    def run(self, interval=0.5, once=False, prune_every=600):
+        relayed = 0
+        last_prune = 0.0
+        while True:
+            count = self.relay_batch()
+            relayed += count
+            if time.monotonic() - last_prune > prune_every:
+                pruned = self.prune()
+                if pruned:
+                    logger.info('Pruned %d published outbox events', pruned)
+                last_prune = time.monotonic()
+            if once and count < self.batch_size:
+                return relayed
+            if count < self.batch_size:
+                time.sleep(interval)
@@ -0,0 +1,279 @@
+"""
+Incremental client sync built on the outbox.
+
+GET /api/sync/ (no token) returns the user's workspaces, channels and read
+state plus a token. GET /api/sync/?token=<token> returns only what changed
+since that token:
+
+    {
+        "workspaces": [...], "channels": [...],
+        "messages": [...], "direct_messages": [...],
+        "workspace_members": [...], "channel_members": [...],
+        "read_state": [{"channel": 1, "last_read_at": "..."}],
+        "deleted": {"workspaces": [ids], "channels": [ids], "messages": [ids],
+                    "direct_messages": [ids], "workspace_members": [...],
+                    "channel_members": [...]},
+        "included": {"users": [...]},
+        "token": "...", "has_more": false
+    }
+
+Each call covers at most `limit` outbox events; when has_more is true the
+client calls again with the returned token. Events only identify what was
+touched: the current rows are re-read, so several edits collapse into one
+entry and anything that no longer exists (or is no longer visible) comes
+back as a tombstone. Deleting a message also deletes its thread, so a
+tombstoned message id means its replies are gone as well.
+"""
+
+import operator
+from collections import defaultdict
+from functools import reduce
+
+from django.core import signing
+from django.db.models import Count, Q
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.sideload import get_user_profiles
+from messaging.models import Message, DirectMessage
+from messaging.serializers import MessageSerializer, DirectMessageSerializer
+from utils.db_router import ReplicaReadMixin
+from workspaces.models import Workspace, WorkspaceMember, Channel, ChannelMember
+from workspaces.serializers import (
+    WorkspaceSerializer,
+    WorkspaceMemberSerializer,
+    ChannelSerializer,
+    ChannelMemberSerializer
+)
+from .feed import cursor_expired, latest_event_id, read_events
+
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+
+TOKEN_SALT = 'events.sync'
+
+
+def make_token(user, event_id):
+    return signing.dumps({'u': user.id, 'e': event_id}, salt=TOKEN_SALT, compress=True)
+
+
+def parse_token(user, token):
+    """Event seq the token points at, or None if it is not this user's token"""
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    if data.get('u') != user.id:
+        return None
+    return data.get('e')
+
+
+class Changes:
+    """What a batch of events touched, keyed by object id"""
+
+    def __init__(self):
+        self.workspaces = set()
+        self.channels = set()
+        self.messages = set()
+        self.direct_messages = set()
+        self.workspace_members = set()
+        self.channel_members = set()
+        self.read_channels = set()
+        # Workspaces the user joined or left; their channels are expanded in one query
+        self.membership_workspaces = set()
+
+    def add(self, event, user):
+        kind = event.event_type
+        payload = event.payload
+        if kind.startswith(('message.', 'direct_message.')):
+            target = self.messages if kind.startswith('message.') else self.direct_messages
+            target.add(payload['id'])
+        elif kind.startswith('reaction.'):
+            self.messages.add(payload['message'])
+        elif kind in ('workspace.updated', 'workspace.deleted'):
+            self.workspaces.add(payload['id'])
+        elif kind in ('channel.updated', 'channel.deleted'):
+            self.channels.add(payload['id'])
+        elif kind == 'channel.read':
+            self.read_channels.add(payload['channel'])
+        elif kind.startswith('workspace.member_'):
+            if payload['user'] == user.id:
+                self.workspaces.add(payload['workspace'])
+                # Joining or leaving a workspace changes which channels are visible
+                self.membership_workspaces.add(payload['workspace'])
+            self.workspace_members.add((payload['workspace'], payload['user']))
+        elif kind.startswith('channel.member_'):
+            if payload['user'] == user.id:
+                self.channels.add(payload['channel'])
+                self.read_channels.add(payload['channel'])
+            self.channel_members.add((payload['channel'], payload['user']))
+
+
+class SyncView(ReplicaReadMixin, APIView):
+    """Delta sync across workspaces, channels, memberships, messages and read state"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        try:
+            limit = int(request.query_params.get('limit', PAGE_SIZE))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        self.serializer_context = {'request': request, 'included_users': set()}
+
+        token = request.query_params.get('token')
+        if not token:
+            return self.bootstrap(user)
+
+        since = parse_token(user, token)
+        if since is None:
+            return Response(
+                {'error': 'Invalid sync token'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if cursor_expired(since):
+            return Response(
+                {'error': 'Sync token expired, full resync required'},
+                status=status.HTTP_410_GONE
+            )
+
+        events, has_more = read_events(user, since, limit)
+        changes = Changes()
+        for event in events:
+            changes.add(event, user)
+
+        data = self.resolve(user, changes)
+        data['token'] = make_token(user, events[-1].seq if events else since)
+        data['has_more'] = has_more
+        data['included'] = self.included()
+        return Response(data)
+
+    def bootstrap(self, user):
+        # Take the cursor first so changes made while we read are replayed
+        event_id = latest_event_id()
+        workspaces = Workspace.objects.filter(members=user, deleting_at__isnull=True)
+        channels = Channel.objects.filter(
+            members=user, deleting_at__isnull=True, workspace__deleting_at__isnull=True
+        )
+        memberships = ChannelMember.objects.filter(user=user)
+        return Response({
+            'workspaces': WorkspaceSerializer(workspaces, many=True, context=self.serializer_context).data,
+            'channels': ChannelSerializer(channels, many=True, context=self.serializer_context).data,
+            'read_state': self.read_state(memberships),
+            'included': self.included(),
+            'token': make_token(user, event_id),
+            'has_more': False,
+        })
+
+    def resolve(self, user, changes):
+        if changes.membership_workspaces:
+            changes.channels.update(
+                Channel.objects.filter(workspace_id__in=changes.membership_workspaces)
+                .values_list('id', flat=True)
+            )
+        workspaces = list(Workspace.objects.filter(
+            id__in=changes.workspaces, members=user, deleting_at__isnull=True
+        ))
+        channels = list(Channel.objects.filter(
+            id__in=changes.channels, members=user,
+            deleting_at__isnull=True, workspace__deleting_at__isnull=True
+        ))
+        messages = list(
+            Message.objects.filter(
+                id__in=changes.messages, channel__members=user,
+                channel__deleting_at__isnull=True,
+                channel__workspace__deleting_at__isnull=True
+            )
+            .prefetch_related('reactions', 'attachments')
+        )
+        reply_counts = dict(
+            Message.objects.filter(parent_id__in=[message.id for message in messages])
+            .values('parent_id').annotate(total=Count('id'))
+            .values_list('parent_id', 'total')
+        )
+        for message in messages:
+            message.reply_total = reply_counts.get(message.id, 0)
+        direct_messages = list(
+            DirectMessage.objects.filter(
+                Q(sender=user) | Q(recipient=user),
+                id__in=changes.direct_messages
+            ).prefetch_related('reactions', 'attachments')
+        )
+        workspace_members = self.members(
+            WorkspaceMember, 'workspace', changes.workspace_members
+        )
+        channel_members = self.members(
+            ChannelMember, 'channel', changes.channel_members
+        )
+        read_state = ChannelMember.objects.filter(
+            user=user, channel_id__in=changes.read_channels
+        )
+
+        return {
+            'workspaces': WorkspaceSerializer(workspaces, many=True, context=self.serializer_context).data,
+            'channels': ChannelSerializer(channels, many=True, context=self.serializer_context).data,
+            'messages': MessageSerializer(messages, many=True, context=self.serializer_context).data,
+            'direct_messages': DirectMessageSerializer(
+                direct_messages, many=True, context=self.serializer_context
+            ).data,
+            'workspace_members': [
+                {'workspace': member.workspace_id, **WorkspaceMemberSerializer(member, context=self.serializer_context).data}
+                for member in workspace_members.values()
+            ],
+            'channel_members': [
+                {'channel': member.channel_id, **ChannelMemberSerializer(member, context=self.serializer_context).data}
+                for member in channel_members.values()
+            ],
+            'read_state': self.read_state(read_state),
+            'deleted': {
+                'workspaces': sorted(changes.workspaces - {w.id for w in workspaces}),
+                'channels': sorted(changes.channels - {c.id for c in channels}),
+                'messages': sorted(changes.messages - {m.id for m in messages}),
+                'direct_messages': sorted(
+                    changes.direct_messages - {m.id for m in direct_messages}
+                ),
+                'workspace_members': [
+                    {'workspace': workspace_id, 'user': user_id}
+                    for workspace_id, user_id in sorted(changes.workspace_members - set(workspace_members))
+                ],
+                'channel_members': [
+                    {'channel': channel_id, 'user': user_id}
+                    for channel_id, user_id in sorted(changes.channel_members - set(channel_members))
+                ],
+            },
+        }
+
+    def included(self):
+        user_ids = sorted(self.serializer_context['included_users'])
+        return {'users': get_user_profiles(user_ids, self.request)}
+
+    @staticmethod
+    def members(model, scope, pairs):
+        """Current membership rows for (scope id, user id) pairs"""
+        by_scope = defaultdict(set)
+        for scope_id, user_id in pairs:
+            by_scope[scope_id].add(user_id)
+        if not by_scope:
+            return {}
+        # One query for every scope
+        condition = reduce(operator.or_, (
+            Q(**{f'{scope}_id': scope_id}, user_id__in=user_ids)
+            for scope_id, user_ids in by_scope.items()
+        ))
+        return {
+            (getattr(member, f'{scope}_id'), member.user_id): member
+            for member in model.objects.filter(condition)
+        }
+
+    @staticmethod
+    def read_state(memberships):
+        return [
+            {'channel': channel_id, 'last_read_at': last_read_at}
+            for channel_id, last_read_at in memberships.values_list('channel_id', 'last_read_at')
+        ]
@@ -0,0 +1,8 @@
+from django.urls import path
+from .sync import SyncView
+from .views import EventListView
+
+urlpatterns = [
+    path('events/', EventListView.as_view(), name='event-list'),
+    path('sync/', SyncView.as_view(), name='sync'),
+]
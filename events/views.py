@@ -0,0 +1,40 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from utils.db_router import ReplicaReadMixin
+from .feed import cursor_expired, read_events
+from .outbox import event_data
+
+PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+
+class EventListView(ReplicaReadMixin, APIView):
+    """Incremental sync: events after ?since=<event seq> in the user's streams"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', PAGE_SIZE))
+        except ValueError:
+            return Response(
+                {'error': 'since and limit must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        if cursor_expired(since):
+            return Response(
+                {'error': 'Cursor expired, full resync required'},
+                status=status.HTTP_410_GONE
+            )
+
+        events, has_more = read_events(request.user, since, limit)
+        return Response({
+            'events': [event_data(event) for event in events],
+            'next': events[-1].seq if events else since,
+            'has_more': has_more,
+        })
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def create_message_partitions(sender, using='default', **kwargs):
+    """Keep the upcoming monthly partitions in place after every migrate"""
+    from .partitions import ensure_partitions
+    ensure_partitions(conn=connections[using])
 
 
 class MessagingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "messaging"
+
+    def ready(self):
+        post_migrate.connect(create_message_partitions, sender=self)
@@ -0,0 +1,290 @@
+"""
+Async (ASGI-native) versions of the hot messaging read paths.
+
+These are plain Django async views rather than DRF viewsets (DRF runs
+synchronously), so the event loop serves other requests while one waits.
+Django 5.0's async ORM still runs every query in the request's single
+thread-sensitive executor, one at a time, so lookups are awaited in turn;
+gathering them would not overlap anything. Each view applies the throttles
+of the DRF viewset it mirrors. Messages are rendered by the same serializer, but the
+envelopes differ where noted:
+
+    GET /api/async/messages/?channel=<id>[&before=&after=&limit=]
+        {results, before, included}: the latest `limit` messages, oldest
+        first, with the id to pass as ?before= for the previous page. No
+        page numbers or count, which would need a COUNT over the channel.
+    GET /api/async/messages/<id>/thread/
+        {results, included}, as the sync thread action
+    GET /api/async/direct-messages/conversations/
+        list of user profiles, as the sync action
+    GET /api/async/direct-messages/unread_count/
+        {unread_count, channels}: the sync body plus unread messages per
+        channel id
+"""
+
+from collections import defaultdict
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import Throttled, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from accounts.authentication import RevocableJWTAuthentication
+from accounts.sideload import aget_user_profiles
+from utils.renderers import FastJSONRenderer
+from utils.throttling import MessageRateThrottle
+from workspaces.models import ChannelMember
+from .models import Message, DirectMessage, Reaction, Attachment
+from .partitions import aapply_cursor_bounds
+from .serializers import MessageSerializer
+from .views import unread_direct_messages
+
+User = get_user_model()
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_jwt = RevocableJWTAuthentication()
+_renderer = FastJSONRenderer()
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        _renderer.render(data),
+        status=status_code,
+        content_type='application/json'
+    )
+
+
+async def authenticate(request):
+    """Resolve the JWT bearer token to an active user, or None"""
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        token = _jwt.get_validated_token(raw_token)
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except (InvalidToken, KeyError):
+        return None
+    user = await User.objects.filter(
+        **{jwt_settings.USER_ID_FIELD: user_id}
+    ).afirst()
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+def check_throttles(request, throttle_classes):
+    """Seconds to wait if a throttle rejects the request, as APIView.check_throttles"""
+    waits = [
+        throttle.wait() for throttle in (cls() for cls in throttle_classes)
+        if not throttle.allow_request(request, None)
+    ]
+    if waits:
+        return max((wait for wait in waits if wait is not None), default=0)
+    return None
+
+
+def async_api_view(throttle_classes=None):
+    """GET-only, JWT-authenticated, throttled async view returning JSON"""
+    if throttle_classes is None:
+        throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return json_response(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status.HTTP_405_METHOD_NOT_ALLOWED
+                )
+            user = await authenticate(request)
+            if user is None:
+                return json_response(
+                    {'detail': 'Authentication credentials were not provided.'},
+                    status.HTTP_401_UNAUTHORIZED
+                )
+            request.user = user
+            # The throttles talk to Redis synchronously
+            wait = await sync_to_async(check_throttles)(request, throttle_classes)
+            if wait is not None:
+                response = json_response(
+                    {'detail': Throttled(wait or None).detail},
+                    status.HTTP_429_TOO_MANY_REQUESTS
+                )
+                if wait:
+                    response['Retry-After'] = str(math.ceil(wait))
+                return response
+            try:
+                return await view(request, *args, **kwargs)
+            except ValidationError as e:
+                return json_response(e.detail, status.HTTP_400_BAD_REQUEST)
+
+        return wrapper
+
+    return decorator
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def attach_related(messages):
+    """Load reactions, attachments and reply counts for a page at once"""
+    ids = [message.id for message in messages]
+    reactions = await alist(Reaction.objects.filter(message_id__in=ids))
+    attachments = await alist(Attachment.objects.filter(message_id__in=ids))
+    reply_counts = await alist(
+        Message.objects.filter(parent_id__in=ids)
+        .values('parent_id').annotate(total=Count('id'))
+        .values_list('parent_id', 'total')
+    )
+
+    by_message = {
+        'reactions': defaultdict(list),
+        'attachments': defaultdict(list),
+    }
+    for reaction in reactions:
+        by_message['reactions'][reaction.message_id].append(reaction)
+    for attachment in attachments:
+        by_message['attachments'][attachment.message_id].append(attachment)
+    reply_counts = dict(reply_counts)
+
+    for message in messages:
+        # Same cache prefetch_related fills, so the serializer never queries
+        message._prefetched_objects_cache = {
+            name: rows[message.id] for name, rows in by_message.items()
+        }
+        message.reply_total = reply_counts.get(message.id, 0)
+    return messages
+
+
+async def render_messages(request, messages):
+    await attach_related(messages)
+    context = {'request': request, 'included_users': set()}
+    results = MessageSerializer(messages, many=True, context=context).data
+    users = await aget_user_profiles(sorted(context['included_users']), request)
+    return results, {'users': users}
+
+
+def page_size(request):
+    try:
+        limit = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        raise ValidationError({'limit': 'Expected an integer'})
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+@async_api_view(throttle_classes=[MessageRateThrottle])
+async def message_list(request):
+    """Latest messages in a channel, oldest first; page back with ?before="""
+    channel_id = request.GET.get('channel', '')
+    if not channel_id.isdigit():
+        return json_response(
+            {'error': 'channel is required'},
+            status.HTTP_400_BAD_REQUEST
+        )
+    limit = page_size(request)
+
+    # A channel or workspace being deleted is no longer readable
+    is_member = await ChannelMember.objects.filter(
+        channel_id=channel_id, user=request.user,
+        channel__deleting_at__isnull=True,
+        channel__workspace__deleting_at__isnull=True
+    ).aexists()
+    if not is_member:
+        return json_response(
+            {'error': 'Must be channel member'},
+            status.HTTP_403_FORBIDDEN
+        )
+
+    queryset = await aapply_cursor_bounds(
+        Message.objects.filter(channel_id=channel_id), request.GET
+    )
+    messages = await alist(queryset.order_by('-created_at', '-id')[:limit])
+    messages.reverse()
+    results, included = await render_messages(request, messages)
+    return json_response({
+        'results': results,
+        'before': messages[0].id if len(messages) == limit else None,
+        'included': included,
+    })
+
+
+@async_api_view(throttle_classes=[MessageRateThrottle])
+async def message_thread(request, pk):
+    """Replies to a message"""
+    message = await Message.objects.filter(
+        pk=pk, channel__members=request.user,
+        channel__deleting_at__isnull=True,
+        channel__workspace__deleting_at__isnull=True
+    ).afirst()
+    if message is None:
+        return json_response(
+            {'detail': 'No Message matches the given query.'},
+            status.HTTP_404_NOT_FOUND
+        )
+
+    # Replies are never older than their parent, which bounds the partitions scanned
+    replies = await alist(
+        Message.objects.filter(
+            parent=message,
+            created_at__gte=message.created_at
+        ).order_by('created_at')
+    )
+    results, included = await render_messages(request, replies)
+    return json_response({'results': results, 'included': included})
+
+
+@async_api_view()
+async def conversations(request):
+    """Users you have direct message conversations with"""
+    sent_to = await alist(
+        DirectMessage.objects.filter(sender=request.user)
+        .values_list('recipient', flat=True).distinct()
+    )
+    received_from = await alist(
+        DirectMessage.objects.filter(recipient=request.user)
+        .values_list('sender', flat=True).distinct()
+    )
+    user_ids = set(sent_to) | set(received_from)
+    return json_response(await aget_user_profiles(sorted(user_ids), request))
+
+
+async def count_unread_direct(user_id):
+    return await DirectMessage.objects.filter(recipient_id=user_id, read=False).acount()
+
+
+@async_api_view()
+async def unread_count(request):
+    """Unread direct messages, plus unread messages per channel"""
+    direct = await unread_direct_messages.aget(request.user.id, loader=count_unread_direct)
+    channels = await alist(
+        Message.objects.filter(
+            channel__channelmember__user=request.user,
+            channel__deleting_at__isnull=True,
+            channel__workspace__deleting_at__isnull=True,
+            created_at__gt=Coalesce(
+                F('channel__channelmember__last_read_at'),
+                F('channel__channelmember__joined_at')
+            ),
+        )
+        # Your own posts are never unread
+        .exclude(sender=request.user)
+        .values('channel_id').annotate(total=Count('id'))
+        .values_list('channel_id', 'total')
+    )
+    return json_response({
+        'unread_count': direct,
+        'channels': {str(channel_id): total for channel_id, total in channels},
+    })
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from messaging.partitions import (
+    PARTITIONED_MODELS,
+    add_months,
+    archive_partition,
+    is_supported,
+    list_partitions,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = 'Recompress and compact cold message partitions, optionally moving them to an archive tablespace'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-months', type=int,
+                            default=getattr(settings, 'MESSAGE_ARCHIVE_AFTER_MONTHS', 12))
+        parser.add_argument('--tablespace',
+                            default=getattr(settings, 'MESSAGE_ARCHIVE_TABLESPACE', ''),
+                            help='Tablespace (e.g. on a compressed filesystem) to move partitions to')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            self.stdout.write(self.style.WARNING('Partitioning requires PostgreSQL; nothing to do'))
+            return
+
+        cutoff = add_months(month_start(timezone.now()), -options['older_than_months'])
+        archived = 0
+        for model in PARTITIONED_MODELS:
+            for name, lower, upper, is_archived in list_partitions(model):
+                if is_archived or upper > cutoff:
+                    continue
+                self.stdout.write(f'  {name} ({lower:%Y-%m})')
+                if not options['dry_run']:
+                    archive_partition(name, options['tablespace'])
+                archived += 1
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {archived} partitions'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from messaging.partitions import ensure_partitions, is_supported
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly partitions for messages and direct messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int,
+                            help='Defaults to MESSAGE_PARTITION_MONTHS_AHEAD')
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            self.stdout.write(self.style.WARNING('Partitioning requires PostgreSQL; nothing to do'))
+            return
+
+        created = ensure_partitions(months_ahead=options['months_ahead'])
+        for name in created:
+            self.stdout.write(f'  {name}')
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} partitions in place'))
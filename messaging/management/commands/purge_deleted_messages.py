@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from messaging.purge import PURGE_BATCH, purge_deleted
+
+
+class Command(BaseCommand):
+    help = 'Physically remove soft-deleted messages in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=7,
+                            help='Only purge messages deleted at least this long ago')
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH)
+        parser.add_argument('--max-batches', type=int,
+                            help='Stop after this many batches')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['older_than_days'])
+        total = 0
+        for batch, deleted in enumerate(purge_deleted(before, options['batch_size']), 1):
+            total += deleted
+            self.stdout.write(f'Batch {batch}: purged {deleted} messages')
+            if options['max_batches'] and batch >= options['max_batches']:
+                break
+        self.stdout.write(self.style.SUCCESS(f'Purged {total} messages'))
@@ -0,0 +1,49 @@
+"""
+Mention extraction.
+
+``@username`` mentions resolve against the channel's members in a single
+query; ``@channel`` and ``@here`` are stored as one row each and expanded
+to recipients later by the notification fan-out, never at write time.
+"""
+
+import re
+
+from django.contrib.auth import get_user_model
+
+from .models import Mention
+
+User = get_user_model()
+
+MENTION_RE = re.compile(r'(?<![\w@.])@([\w.+-]+[\w+-]|\w)')
+
+BROADCASTS = ('channel', 'here')
+
+
+def parse_mentions(content):
+    """Return (usernames, broadcast kinds) mentioned in content"""
+    names = set(MENTION_RE.findall(content or ''))
+    broadcasts = [kind for kind in BROADCASTS if kind in names]
+    return names.difference(BROADCASTS), broadcasts
+
+
+def record_mentions(message):
+    """(Re)build the mention index for a message; returns the rows"""
+    usernames, broadcasts = parse_mentions(message.content)
+    Mention.objects.filter(message_id=message.id).delete()
+
+    user_ids = []
+    if usernames:
+        user_ids = list(
+            User.objects.filter(
+                username__in=usernames,
+                channelmember__channel_id=message.channel_id
+            ).exclude(id=message.sender_id).values_list('id', flat=True)
+        )
+    mentions = [
+        Mention(message=message, channel_id=message.channel_id, user_id=user_id, kind='user')
+        for user_id in user_ids
+    ] + [
+        Mention(message=message, channel_id=message.channel_id, kind=kind)
+        for kind in broadcasts
+    ]
+    return Mention.objects.bulk_create(mentions)
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="attachment",
+            name="direct_message",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attachments",
+                to="messaging.directmessage",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="attachment",
+            name="message",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attachments",
+                to="messaging.message",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="replies",
+                to="messaging.message",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reaction",
+            name="direct_message",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reactions",
+                to="messaging.directmessage",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reaction",
+            name="message",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reactions",
+                to="messaging.message",
+            ),
+        ),
+    ]
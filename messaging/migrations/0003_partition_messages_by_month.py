@@ -0,0 +1,108 @@
+"""
+Convert messaging_message and messaging_directmessage into tables
+range-partitioned by month on created_at (PostgreSQL only).
+
+Partitioned tables need the partition key in every unique constraint, so the
+primary key becomes (id, created_at); incoming foreign keys were dropped in
+0002 for the same reason. Rows are copied into the new table inside the
+migration transaction, so run it during a maintenance window on large
+databases. Other backends are left untouched.
+"""
+
+import re
+from datetime import datetime, timezone
+
+from django.db import migrations
+
+TABLES = ("messaging_message", "messaging_directmessage")
+MONTHS_AHEAD = 3
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def rebuild(cursor, table, partitioned):
+    old = f"{table}_old"
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s", [old]
+    )
+    indexes = [row for row in cursor.fetchall() if not row[0].endswith("_pkey")]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [old],
+    )
+    foreign_keys = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:55]}_old"')
+    cursor.execute(f'ALTER INDEX "{table}_pkey" RENAME TO "{table[:50]}_pkey_old"')
+
+    suffix = " PARTITION BY RANGE (created_at)" if partitioned else ""
+    cursor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING IDENTITY){suffix}'
+    )
+    primary_key = "id, created_at" if partitioned else "id"
+    cursor.execute(
+        f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ({primary_key})'
+    )
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+    for _, definition in indexes:
+        cursor.execute(
+            re.sub(r" ON (ONLY )?\S+ USING ", f' ON "{table}" USING ', definition)
+        )
+
+    if partitioned:
+        cursor.execute(f'SELECT MIN(created_at) FROM "{old}"')
+        now = datetime.now(timezone.utc)
+        oldest = cursor.fetchone()[0] or now
+        month = datetime(oldest.year, oldest.month, 1, tzinfo=timezone.utc)
+        last = add_months(datetime(now.year, now.month, 1, tzinfo=timezone.utc), MONTHS_AHEAD)
+        while month <= last:
+            end = add_months(month, 1)
+            cursor.execute(
+                f'CREATE TABLE "{table}_p{month:%Y_%m}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            month = end
+        cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+    cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{old}"')
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+        f'COALESCE((SELECT MAX(id) FROM "{table}"), 0) + 1, false)'
+    )
+    cursor.execute(f'DROP TABLE "{old}"')
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        for table in TABLES:
+            rebuild(cursor, table, partitioned=True)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        for table in TABLES:
+            rebuild(cursor, table, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0002_message_fk_without_db_constraint"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
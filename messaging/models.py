@@ -2,6 +2,14 @@ from django.db import models
 from django.conf import settings
 from workspaces.models import Channel
 
+
+class MessageManager(models.Manager):
+    """Messages that have not been soft-deleted"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Message(models.Model):
     """Messages in channels"""
     
@@ -21,18 +29,30 @@ class Message(models.Model):
         on_delete=models.CASCADE,
         null=True,
         blank=True,
-        related_name='replies'
+        related_name='replies',
+        db_constraint=False
     )
     edited = models.BooleanField(default=False)
     pinned = models.BooleanField(default=False)
+    # Soft delete: set on the thread root and its replies, rows are removed
+    # later by the purge_deleted_messages command
+    deleted_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = MessageManager()
+    all_objects = models.Manager()
+    
     class Meta:
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['channel', '-created_at']),
             models.Index(fields=['sender', '-created_at']),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='message_deleted_idx'
+            ),
         ]
     
     def __str__(self):
@@ -76,14 +96,16 @@ class Reaction(models.Model):
         on_delete=models.CASCADE,
         related_name='reactions',
         null=True,
-        blank=True
+        blank=True,
+        db_constraint=False
     )
     direct_message = models.ForeignKey(
         DirectMessage,
         on_delete=models.CASCADE,
         related_name='reactions',
         null=True,
-        blank=True
+        blank=True,
+        db_constraint=False
     )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -110,14 +132,16 @@ class Attachment(models.Model):
         on_delete=models.CASCADE,
         related_name='attachments',
         null=True,
-        blank=True
+        blank=True,
+        db_constraint=False
     )
     direct_message = models.ForeignKey(
         DirectMessage,
         on_delete=models.CASCADE,
         related_name='attachments',
         null=True,
-        blank=True
+        blank=True,
+        db_constraint=False
     )
     file = models.FileField(upload_to='attachments/%Y/%m/%d/')
     filename = models.CharField(max_length=255)
@@ -130,4 +154,41 @@ class Attachment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return self.filename
\ No newline at end of file
+        return self.filename
+
+
+class Mention(models.Model):
+    """Mention index: users, @channel and @here mentioned by a message"""
+    
+    KIND_CHOICES = (
+        ('user', 'User'),
+        ('channel', 'Channel'),
+        ('here', 'Here'),
+    )
+    
+    message = models.ForeignKey(
+        Message,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        db_constraint=False
+    )
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE)
+    # Set for user mentions; null for @channel / @here
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='mentions'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['message']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} mention in message {self.message_id}"
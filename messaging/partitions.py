@@ -0,0 +1,208 @@
+"""
+Monthly range partitioning of Message and DirectMessage on PostgreSQL.
+
+Both tables are partitioned by created_at (see migration 0003). Monthly
+partitions are named <table>_pYYYY_MM; a <table>_default partition catches
+anything outside the created ranges. All functions are no-ops on other
+database backends.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, NotSupportedError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Message, DirectMessage
+
+PARTITIONED_MODELS = (Message, DirectMessage)
+
+
+def is_supported(conn=None):
+    return (conn or connection).vendor == 'postgresql'
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def partition_name(table, start):
+    return f'{table}_p{start:%Y_%m}'
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [table])
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def create_partition(cursor, table, start):
+    """Create the monthly partition starting at start if it doesn't exist"""
+    end = add_months(start, 1)
+    name = partition_name(table, start)
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    return name
+
+
+def ensure_partitions(months_ahead=None, since=None, conn=None):
+    """Create monthly partitions from since (default: this month) to months_ahead"""
+    conn = conn or connection
+    if not is_supported(conn):
+        return []
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'MESSAGE_PARTITION_MONTHS_AHEAD', 3)
+
+    now = month_start(datetime.now(dt_timezone.utc))
+    start = month_start(since) if since else now
+    created = []
+    with conn.cursor() as cursor:
+        for model in PARTITIONED_MODELS:
+            if not is_partitioned(cursor, model._meta.db_table):
+                continue
+            month = start
+            while month <= add_months(now, months_ahead):
+                created.append(create_partition(cursor, model._meta.db_table, month))
+                month = add_months(month, 1)
+    return created
+
+
+def list_partitions(model, conn=None):
+    """Return [(name, lower bound, upper bound, archived)] oldest first"""
+    conn = conn or connection
+    if not is_supported(conn):
+        return []
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid),
+                   COALESCE(obj_description(child.oid, 'pg_class'), '') = 'archived'
+            FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = %s
+            ORDER BY child.relname
+            """,
+            [model._meta.db_table]
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound, archived in rows:
+        if bound == 'DEFAULT':
+            continue
+        # FOR VALUES FROM ('2026-01-01 00:00:00+00') TO ('2026-02-01 00:00:00+00')
+        lower, upper = (part.split("'")[1] for part in bound.split(' TO '))
+        partitions.append((
+            name,
+            datetime.fromisoformat(lower),
+            datetime.fromisoformat(upper),
+            archived,
+        ))
+    return partitions
+
+
+# Bodies shorter than this never reach the ~2 kB tuple size at which
+# Postgres starts compressing, so rewriting them would gain nothing
+TOAST_MIN_CONTENT_BYTES = 1024
+
+
+def archive_partition(name, tablespace='', conn=None):
+    """
+    Recompress a cold partition's long message bodies and compact it.
+
+    SET COMPRESSION only applies to values written afterwards, and VACUUM
+    FULL copies stored datums as they are, so long bodies are rewritten
+    (content || '' detoasts the old value) to be stored again with lz4, or
+    pglz if the server lacks it. Short bodies are stored inline and
+    uncompressed whatever the setting, so they are left alone. VACUUM FULL
+    then drops the old row versions, and the compacted table is optionally
+    moved to an archive tablespace (e.g. on a compressed filesystem). The
+    partition stays attached, so it remains searchable.
+    """
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        method = 'lz4'
+        try:
+            cursor.execute(f'ALTER TABLE "{name}" ALTER COLUMN content SET COMPRESSION lz4')
+        except NotSupportedError:
+            method = 'pglz'
+            cursor.execute(f'ALTER TABLE "{name}" ALTER COLUMN content SET COMPRESSION pglz')
+        cursor.execute(
+            f"UPDATE \"{name}\" SET content = content || '' "
+            f"WHERE octet_length(content) >= %s "
+            f"AND pg_column_compression(content) IS DISTINCT FROM %s",
+            [TOAST_MIN_CONTENT_BYTES, method]
+        )
+        cursor.execute(f'VACUUM FULL "{name}"')
+        if tablespace:
+            cursor.execute(f'ALTER TABLE "{name}" SET TABLESPACE "{tablespace}"')
+        cursor.execute(f"COMMENT ON TABLE \"{name}\" IS 'archived'")
+
+
+CURSOR_PARAMS = (('before', 'lt'), ('after', 'gt'))
+
+
+def _bounded(queryset, param, op, value, created_at):
+    if value.isdigit():
+        if created_at is None:
+            raise ValidationError({param: 'Unknown message id'})
+        # (created_at, id) keyset so equal timestamps are not skipped
+        return queryset.filter(
+            **{f'created_at__{op}e': created_at}
+        ).filter(
+            Q(**{f'created_at__{op}': created_at}) | Q(**{f'id__{op}': value})
+        )
+    created_at = parse_datetime(value)
+    if created_at is None:
+        raise ValidationError({param: 'Expected an ISO 8601 timestamp or message id'})
+    return queryset.filter(**{f'created_at__{op}': created_at})
+
+
+def apply_cursor_bounds(queryset, params):
+    """
+    Narrow queryset with ?before= / ?after= cursors.
+
+    A cursor is an ISO timestamp or a message id. Either way the filter is
+    expressed on created_at, so Postgres prunes partitions outside the
+    window instead of scanning the channel's whole history.
+    """
+    model = queryset.model
+    for param, op in CURSOR_PARAMS:
+        value = params.get(param)
+        if not value:
+            continue
+        created_at = None
+        if value.isdigit():
+            created_at = (
+                model._base_manager.filter(pk=value)
+                .values_list('created_at', flat=True).first()
+            )
+        queryset = _bounded(queryset, param, op, value, created_at)
+    return queryset
+
+
+async def aapply_cursor_bounds(queryset, params):
+    """Async version of apply_cursor_bounds"""
+    model = queryset.model
+    for param, op in CURSOR_PARAMS:
+        value = params.get(param)
+        if not value:
+            continue
+        created_at = None
+        if value.isdigit():
+            created_at = await (
+                model._base_manager.filter(pk=value)
+                .values_list('created_at', flat=True).afirst()
+            )
+        queryset = _bounded(queryset, param, op, value, created_at)
+    return queryset
@@ -0,0 +1,86 @@
+"""
+Physical removal of messages in bounded batches.
+
+Django's delete() collects every reply, reaction and attachment into
+memory before deleting; here each batch is a fixed number of raw DELETE
+statements keyed by message id, so the cost per batch stays flat however
+large a thread or channel is. Attachment files are removed from storage
+after the batch commits.
+"""
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from notifications.models import Notification
+from .models import Message, Reaction, Attachment, Mention
+
+PURGE_BATCH = 1000
+
+
+def raw_delete(model, column, ids):
+    """DELETE FROM <table> WHERE <column> IN (ids), skipping the collector"""
+    if not ids:
+        return 0
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM "{model._meta.db_table}" WHERE "{column}" IN ({placeholders})',
+            list(ids)
+        )
+        return cursor.rowcount
+
+
+def delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            pass
+
+
+def purge_messages(ids, files=None):
+    """
+    Remove messages and everything hanging off them.
+
+    Attachment paths are appended to files when it is given, for the caller
+    to delete later; otherwise they are deleted once the batch commits.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    with transaction.atomic():
+        paths = list(
+            Attachment.objects.filter(message_id__in=ids)
+            .exclude(file='').values_list('file', flat=True)
+        )
+        raw_delete(Reaction, 'message_id', ids)
+        raw_delete(Attachment, 'message_id', ids)
+        raw_delete(Mention, 'message_id', ids)
+        Notification.objects.filter(message_id__in=ids).update(message=None)
+        deleted = raw_delete(Message, 'id', ids)
+        if files is None:
+            transaction.on_commit(lambda: delete_files(paths))
+        else:
+            files.extend(paths)
+    return deleted
+
+
+def purge_deleted(before=None, batch_size=PURGE_BATCH):
+    """
+    Purge soft-deleted messages older than before, one batch at a time.
+
+    Yields the number of rows removed per batch so callers can report
+    progress or stop early. Replies are soft-deleted with their root, so a
+    thread may span batches; parent has no database constraint.
+    """
+    before = before or timezone.now()
+    while True:
+        ids = list(
+            Message.all_objects.filter(deleted_at__lt=before)
+            .order_by('deleted_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield purge_messages(ids)
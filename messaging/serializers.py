@@ -1,12 +1,15 @@
 from rest_framework import serializers
-from .models import Message, DirectMessage, Reaction, Attachment
-from accounts.serializers import UserSerializer
+from .models import Message, DirectMessage, Reaction, Attachment, Mention
+from .mentions import record_mentions
+from accounts.serializers import UserRefField
+from utils.instrumentation import TimedSerializerMixin
+from utils.serializers import FastReadSerializerMixin
 
 
-class ReactionSerializer(serializers.ModelSerializer):
+class ReactionSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
     """Serializer for reactions"""
     
-    user = UserSerializer(read_only=True)
+    user = UserRefField()
     
     class Meta:
         model = Reaction
@@ -14,10 +17,10 @@ class ReactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class AttachmentSerializer(serializers.ModelSerializer):
+class AttachmentSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
     """Serializer for attachments"""
     
-    uploaded_by = UserSerializer(read_only=True)
+    uploaded_by = UserRefField()
     
     class Meta:
         model = Attachment
@@ -28,10 +31,10 @@ class AttachmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'filename', 'file_type', 'file_size', 'created_at']
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
     """Serializer for channel messages"""
     
-    sender = UserSerializer(read_only=True)
+    sender = UserRefField()
     reactions = ReactionSerializer(many=True, read_only=True)
     attachments = AttachmentSerializer(many=True, read_only=True)
     reply_count = serializers.SerializerMethodField()
@@ -45,15 +48,37 @@ class MessageSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'sender', 'edited', 'created_at', 'updated_at']
     
+    def create(self, validated_data):
+        message = super().create(validated_data)
+        # Indexed in the same transaction as the message
+        message.mention_rows = record_mentions(message)
+        return message
+    
+    def update(self, instance, validated_data):
+        if 'content' not in validated_data:
+            return super().update(instance, validated_data)
+        before = set(Mention.objects.filter(message_id=instance.id).values_list('kind', 'user_id'))
+        message = super().update(instance, validated_data)
+        message.mention_rows = record_mentions(message)
+        # Only these are notified; the rest already were when first written
+        message.added_mentions = [
+            (row.kind, row.user_id) for row in message.mention_rows
+            if (row.kind, row.user_id) not in before
+        ]
+        return message
+    
     def get_reply_count(self, obj):
+        # Precomputed for a whole page by the async views
+        if hasattr(obj, 'reply_total'):
+            return obj.reply_total
         return obj.replies.count()
 
 
-class DirectMessageSerializer(serializers.ModelSerializer):
+class DirectMessageSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
     """Serializer for direct messages"""
     
-    sender = UserSerializer(read_only=True)
-    recipient = UserSerializer(read_only=True)
+    sender = UserRefField()
+    recipient = UserRefField()
     reactions = ReactionSerializer(many=True, read_only=True)
     attachments = AttachmentSerializer(many=True, read_only=True)
     recipient_id = serializers.IntegerField(write_only=True)
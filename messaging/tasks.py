@@ -0,0 +1,9 @@
+from django.core.cache import cache
+
+from utils.tasks import task
+
+
+@task(concurrency=4)
+def invalidate_channel_messages(channel_id):
+    """Drop cached message pages for a channel (scans the keyspace)"""
+    cache.delete_pattern(f"*channel_messages:{channel_id}*")
@@ -1,3 +1,100 @@
-from django.test import TestCase
+import asyncio
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks.scenarios import BenchContext
+from benchmarks.seed import Seeder
+from . import async_views
+
+REQUESTS = 60
+CONCURRENCY = 10
+
+
+class AsyncViewLoadTests(TestCase):
+    """
+    The async read paths against their sync DRF counterparts, under the same
+    concurrent load through the ASGI handler.
+
+    Only message_list is expected to be faster: it skips the page COUNT and
+    renders with fewer queries. conversations and unread_count do one or two
+    queries either way, so for them the test checks the answers agree.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder(
+            workspaces=1, channels=3, members=10, messages=600,
+            direct_messages=100, log=lambda *args: None
+        ).run()
+        cls.ctx = BenchContext.load()
+
+    def setUp(self):
+        cache.clear()
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.ctx.user)}'}
+        for target, name, stub in (
+            (APIView, 'check_throttles', lambda view, request: None),
+            (async_views, 'check_throttles', lambda request, classes: None),
+        ):
+            patcher = mock.patch.object(target, name, stub)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def load(self, path):
+        """(requests per second, responses) for REQUESTS gets, CONCURRENCY at a time"""
+        client = AsyncClient()
+        limit = asyncio.Semaphore(CONCURRENCY)
+
+        async def one():
+            async with limit:
+                return await client.get(path, headers=self.headers)
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(one() for _ in range(REQUESTS)))
+        return REQUESTS / (time.perf_counter() - start), responses
+
+    async def compare(self, sync_path, async_path):
+        sync_rps, sync_responses = await self.load(sync_path)
+        async_rps, async_responses = await self.load(async_path)
+        for response in sync_responses + async_responses:
+            self.assertEqual(response.status_code, 200, response.content)
+        return sync_rps, sync_responses[0].json(), async_rps, async_responses[0].json()
+
+    async def test_message_list(self):
+        channel = self.ctx.channel.id
+        sync_rps, sync_body, async_rps, async_body = await self.compare(
+            f'/api/messages/?channel={channel}', f'/api/async/messages/?channel={channel}'
+        )
+        self.assertEqual(len(async_body['results']), len(sync_body['results']))
+        self.assertGreater(async_rps, sync_rps)
+
+    async def test_conversations(self):
+        _, sync_body, _, async_body = await self.compare(
+            '/api/direct-messages/conversations/', '/api/async/direct-messages/conversations/'
+        )
+        self.assertEqual(async_body, sync_body)
+
+    async def test_unread_count(self):
+        _, sync_body, _, async_body = await self.compare(
+            '/api/direct-messages/unread_count/', '/api/async/direct-messages/unread_count/'
+        )
+        self.assertEqual(async_body['unread_count'], sync_body['unread_count'])
+
+    async def test_own_messages_are_not_unread(self):
+        await self.ctx.channel.channelmember_set.filter(user=self.ctx.user).aupdate(last_read_at=None)
+        client = AsyncClient()
+        before = (await client.get(
+            '/api/async/direct-messages/unread_count/', headers=self.headers
+        )).json()['channels']
+        await client.post(
+            '/api/messages/', {'channel': self.ctx.channel.id, 'content': 'mine'},
+            headers=self.headers, content_type='application/json'
+        )
+        after = (await client.get(
+            '/api/async/direct-messages/unread_count/', headers=self.headers
+        )).json()['channels']
+        self.assertEqual(after, before)
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import MessageViewSet, DirectMessageViewSet, AttachmentViewSet
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'messages', MessageViewSet, basename='message')
@@ -8,5 +9,10 @@ router.register(r'direct-messages', DirectMessageViewSet, basename='direct-messa
 router.register(r'attachments', AttachmentViewSet, basename='attachment')
 
 urlpatterns = [
+    # ASGI-native read paths
+    path('async/messages/', async_views.message_list, name='async-message-list'),
+    path('async/messages/<int:pk>/thread/', async_views.message_thread, name='async-message-thread'),
+    path('async/direct-messages/conversations/', async_views.conversations, name='async-conversations'),
+    path('async/direct-messages/unread_count/', async_views.unread_count, name='async-unread-count'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
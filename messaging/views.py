@@ -3,11 +3,14 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
-from django.core.cache import cache
 from utils.throttling import MessageRateThrottle
 from .models import Message, DirectMessage, Reaction, Attachment
+from .partitions import apply_cursor_bounds
+from .tasks import invalidate_channel_messages
+from notifications.tasks import fan_out_mentions
 from .serializers import (
     MessageSerializer,
     DirectMessageSerializer,
@@ -15,9 +18,13 @@ from .serializers import (
     AttachmentSerializer
 )
 from workspaces.models import Channel, ChannelMember
+from utils.db_router import ReplicaReadMixin
+from accounts.sideload import SideloadUsersMixin, get_user_profiles
+from utils.cache import cached
+from events.outbox import emit, emit_direct_message, channel_stream, message_payload
 
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(ReplicaReadMixin, SideloadUsersMixin, viewsets.ModelViewSet):
     """ViewSet for channel messages"""
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
@@ -26,41 +33,76 @@ class MessageViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         channel_id = self.request.query_params.get('channel')
         
-        # Get messages from channels user is a member of
+        # Get messages from channels user is a member of, hiding channels
+        # and workspaces being deleted until the purge removes them
         queryset = Message.objects.filter(
-            channel__members=self.request.user
+            channel__members=self.request.user,
+            channel__deleting_at__isnull=True,
+            channel__workspace__deleting_at__isnull=True
         )
         
         if channel_id:
             queryset = queryset.filter(channel_id=channel_id)
         
-        return queryset.select_related('sender', 'channel').order_by('created_at')
+        queryset = apply_cursor_bounds(queryset, self.request.query_params)
+        return queryset.order_by('created_at')
 
     def perform_create(self, serializer):
         # Verify user is channel member
         channel_id = self.request.data.get('channel')
-        channel = get_object_or_404(Channel, id=channel_id)
+        channel = get_object_or_404(
+            Channel,
+            id=channel_id,
+            deleting_at__isnull=True,
+            workspace__deleting_at__isnull=True
+        )
         
         if not channel.members.filter(id=self.request.user.id).exists():
             raise PermissionError("You must be a channel member to send messages")
         
-        serializer.save(sender=self.request.user)
+        with transaction.atomic():
+            message = serializer.save(sender=self.request.user)
+            emit(channel_stream(channel.id), 'message.created', message_payload(message))
+        
+        # Notify mentioned users in the background
+        if message.mention_rows:
+            fan_out_mentions.delay_on_commit(message.id)
         
-        # Invalidate message cache for this channel
-        cache.delete_pattern(f"*channel_messages:{channel_id}*")
+        # Invalidate message cache for this channel once the row is committed
+        invalidate_channel_messages.delay_on_commit(
+            channel.id,
+            dedup_key=f"channel_messages:{channel.id}"
+        )
 
     def perform_update(self, serializer):
         # Only allow sender to edit
         if serializer.instance.sender != self.request.user:
             raise PermissionError("You can only edit your own messages")
         
-        serializer.save(edited=True)
+        with transaction.atomic():
+            message = serializer.save(edited=True)
+            emit(channel_stream(message.channel_id), 'message.updated', message_payload(message))
+        
+        # Notify users the edit newly mentions
+        added = getattr(message, 'added_mentions', None)
+        if added:
+            fan_out_mentions.delay_on_commit(message.id, added)
 
     def perform_destroy(self, instance):
         # Only allow sender to delete
         if instance.sender != self.request.user:
             raise PermissionError("You can only delete your own messages")
-        instance.delete()
+        # Soft delete the root and its replies with one UPDATE; rows are
+        # removed later in bounded batches by purge_deleted_messages
+        with transaction.atomic():
+            deleted = Message.objects.filter(
+                Q(pk=instance.pk, created_at=instance.created_at)
+                | Q(parent_id=instance.pk, created_at__gte=instance.created_at)
+            ).update(deleted_at=timezone.now())
+            emit(
+                channel_stream(instance.channel_id), 'message.deleted',
+                {'id': instance.id, 'replies_deleted': max(deleted - 1, 0)}
+            )
 
     @action(detail=True, methods=['post'])
     def react(self, request, pk=None):
@@ -74,20 +116,30 @@ class MessageViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reaction, created = Reaction.objects.get_or_create(
-            message=message,
-            user=request.user,
-            emoji=emoji
-        )
+        with transaction.atomic():
+            reaction, created = Reaction.objects.get_or_create(
+                message=message,
+                user=request.user,
+                emoji=emoji
+            )
+            if not created:
+                # Remove reaction if already exists (toggle behavior)
+                reaction.delete()
+            emit(
+                channel_stream(message.channel_id),
+                'reaction.added' if created else 'reaction.removed',
+                {'message': message.id, 'user': request.user.id, 'emoji': emoji}
+            )
         
         if created:
             return Response(
-                ReactionSerializer(reaction).data,
+                ReactionSerializer(
+                    reaction,
+                    context=self.get_serializer_context()
+                ).data,
                 status=status.HTTP_201_CREATED
             )
         else:
-            # Remove reaction if already exists (toggle behavior)
-            reaction.delete()
             return Response(
                 {'message': 'Reaction removed'},
                 status=status.HTTP_204_NO_CONTENT
@@ -106,7 +158,13 @@ class MessageViewSet(viewsets.ModelViewSet):
             )
         
         message.pinned = not message.pinned
-        message.save()
+        with transaction.atomic():
+            message.save()
+            emit(
+                channel_stream(message.channel_id),
+                'message.pinned' if message.pinned else 'message.unpinned',
+                {'id': message.id, 'pinned': message.pinned}
+            )
         
         return Response({
             'pinned': message.pinned,
@@ -117,10 +175,24 @@ class MessageViewSet(viewsets.ModelViewSet):
     def thread(self, request, pk=None):
         """Get message thread (replies)"""
         message = self.get_object()
-        replies = Message.objects.filter(parent=message).order_by('created_at')
+        # Replies are never older than their parent, which bounds the partitions scanned
+        replies = Message.objects.filter(
+            parent=message,
+            created_at__gte=message.created_at
+        ).order_by('created_at')
         serializer = self.get_serializer(replies, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def mentions(self, request):
+        """Recent messages mentioning the current user"""
+        queryset = self.get_queryset().filter(
+            mentions__user=request.user
+        ).order_by('-created_at')
+        
+        serializer = self.get_serializer(queryset[:50], many=True)
+        return Response(serializer.data)
+
     @action(detail=False, methods=['get'])
     def search(self, request):
         """Search messages"""
@@ -144,7 +216,17 @@ class MessageViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class DirectMessageViewSet(viewsets.ModelViewSet):
+@cached('unread_count', timeout=60, single_flight=True)
+def unread_direct_messages(user_id):
+    """Unread direct messages for a user; polled by every open client"""
+    return DirectMessage.objects.filter(recipient_id=user_id, read=False).count()
+
+
+def invalidate_unread_count(user_id):
+    transaction.on_commit(lambda: unread_direct_messages.invalidate(user_id))
+
+
+class DirectMessageViewSet(ReplicaReadMixin, SideloadUsersMixin, viewsets.ModelViewSet):
     """ViewSet for direct messages"""
     serializer_class = DirectMessageSerializer
     permission_classes = [IsAuthenticated]
@@ -163,10 +245,26 @@ class DirectMessageViewSet(viewsets.ModelViewSet):
                 Q(sender_id=other_user_id) | Q(recipient_id=other_user_id)
             )
         
-        return queryset.select_related('sender', 'recipient').order_by('created_at')
+        queryset = apply_cursor_bounds(queryset, self.request.query_params)
+        return queryset.order_by('created_at')
 
     def perform_create(self, serializer):
-        serializer.save(sender=self.request.user)
+        with transaction.atomic():
+            message = serializer.save(sender=self.request.user)
+            emit_direct_message('direct_message.created', message)
+            invalidate_unread_count(message.recipient_id)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            message = serializer.save()
+            emit_direct_message('direct_message.updated', message)
+            invalidate_unread_count(message.recipient_id)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            emit_direct_message('direct_message.deleted', instance)
+            invalidate_unread_count(instance.recipient_id)
+            instance.delete()
 
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
@@ -182,7 +280,10 @@ class DirectMessageViewSet(viewsets.ModelViewSet):
         
         message.read = True
         message.read_at = timezone.now()
-        message.save()
+        with transaction.atomic():
+            message.save()
+            emit_direct_message('direct_message.read', message)
+            invalidate_unread_count(message.recipient_id)
         
         return Response({'message': 'Marked as read'})
 
@@ -202,27 +303,16 @@ class DirectMessageViewSet(viewsets.ModelViewSet):
         
         user_ids = set(list(sent_to) + list(received_from))
         
-        from accounts.serializers import UserSerializer
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        
-        users = User.objects.filter(id__in=user_ids)
-        serializer = UserSerializer(users, many=True)
-        
-        return Response(serializer.data)
+        # Served from the shared user profile cache
+        return Response(get_user_profiles(sorted(user_ids), request))
 
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get count of unread messages"""
-        count = DirectMessage.objects.filter(
-            recipient=request.user,
-            read=False
-        ).count()
-        
-        return Response({'unread_count': count})
+        return Response({'unread_count': unread_direct_messages(request.user.id)})
 
 
-class AttachmentViewSet(viewsets.ModelViewSet):
+class AttachmentViewSet(ReplicaReadMixin, SideloadUsersMixin, viewsets.ModelViewSet):
     """ViewSet for file attachments"""
     serializer_class = AttachmentSerializer
     permission_classes = [IsAuthenticated]
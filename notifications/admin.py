@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'channel', 'kind', 'count', 'read_at', 'updated_at']
+    list_filter = ['kind']
@@ -0,0 +1,74 @@
+"""
+Batched notification delivery.
+
+fan_out_mentions (see tasks.py) expands a message's mentions into recipient
+batches of FANOUT_BATCH users; each batch is delivered with two statements
+however large the channel is:
+
+    1 INSERT ... ON CONFLICT DO UPDATE creating each recipient's unread
+      notification for the channel, or bumping it (count + 1, latest message)
+    1 INSERT of outbox events for the notifications actually created
+
+The upsert is a single statement against the unread-per-channel unique
+index, so concurrent deliveries to the same recipient serialize on the row
+instead of both treating it as new. RETURNING reports each row's count; a
+count of 1 means this statement inserted it.
+
+@here only reaches users whose presence key says they are online, checked
+with one cache round trip per batch.
+"""
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from events.outbox import emit_many, user_stream
+from utils.cache import CacheKeys
+from .models import Notification
+
+FANOUT_BATCH = 1000
+
+
+def online_user_ids(user_ids):
+    keys = {CacheKeys.user_online_status(user_id): user_id for user_id in user_ids}
+    statuses = cache.get_many(list(keys))
+    return [keys[key] for key, value in statuses.items() if value == 'online']
+
+
+UPSERT_SQL = """
+INSERT INTO "{table}" (recipient_id, channel_id, message_id, kind, "count", created_at, updated_at)
+VALUES {rows}
+ON CONFLICT (recipient_id, channel_id) WHERE read_at IS NULL DO UPDATE SET
+    "count" = "{table}"."count" + 1,
+    message_id = EXCLUDED.message_id,
+    updated_at = EXCLUDED.updated_at,
+    -- A direct mention outranks a broadcast already pending
+    kind = CASE WHEN EXCLUDED.kind = 'mention' THEN EXCLUDED.kind ELSE "{table}".kind END
+RETURNING recipient_id, "count"
+"""
+
+
+def deliver(channel_id, message_id, kind, user_ids):
+    """Create or bump one unread notification per recipient; returns (created, bumped)"""
+    if not user_ids:
+        return 0, 0
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    params = []
+    # A fixed row order keeps concurrent batches from deadlocking
+    for user_id in sorted(set(user_ids)):
+        params += [user_id, channel_id, message_id, kind, 1, now, now]
+    sql = UPSERT_SQL.format(
+        table=Notification._meta.db_table,
+        rows=', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * (len(params) // 7))
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            counts = cursor.fetchall()
+        new = [recipient_id for recipient_id, count in counts if count == 1]
+        # Only new notifications are pushed; bumps reach the client on next read
+        payload = {'channel': channel_id, 'message': message_id, 'kind': kind}
+        emit_many([
+            (user_stream(user_id), 'notification.created', payload) for user_id in new
+        ])
+    return len(new), len(counts) - len(new)
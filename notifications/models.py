@@ -0,0 +1,54 @@
+from django.db import models
+from django.conf import settings
+from workspaces.models import Channel
+from messaging.models import Message
+
+
+class Notification(models.Model):
+    """
+    Unread notifications, coalesced per channel.
+
+    A recipient has at most one unread notification per channel; further
+    mentions bump its count and point it at the latest message.
+    """
+    
+    KIND_CHOICES = (
+        ('mention', 'Mention'),
+        ('channel', '@channel'),
+        ('here', '@here'),
+    )
+    
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE)
+    message = models.ForeignKey(
+        Message,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    count = models.PositiveIntegerField(default=1)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['recipient', '-updated_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient', 'channel'],
+                condition=models.Q(read_at__isnull=True),
+                name='unique_unread_notification_per_channel'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} x{self.count} for {self.recipient_id} in {self.channel_id}"
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from .models import Notification
+from utils.instrumentation import TimedSerializerMixin
+from utils.serializers import FastReadSerializerMixin
+
+
+class NotificationSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
+    """Serializer for notifications"""
+    
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'channel', 'message', 'kind', 'count',
+            'read_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,57 @@
+from itertools import islice
+
+from messaging.models import Message, Mention
+from utils.tasks import task
+from workspaces.models import ChannelMember
+from .delivery import FANOUT_BATCH, deliver, online_user_ids
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+@task(max_retries=5)
+def fan_out_mentions(message_id, added=None):
+    """
+    Expand a message's mentions into per-recipient delivery batches.
+
+    added, after an edit, is the [kind, user_id] pairs the edit introduced;
+    only those are delivered, so nobody is notified twice for one message.
+    """
+    message = Message.objects.filter(id=message_id).values('channel_id', 'sender_id').first()
+    if message is None:
+        return
+    channel_id = message['channel_id']
+    mentions = list(Mention.objects.filter(message_id=message_id).values_list('kind', 'user_id'))
+    # Everyone mentioned by name, notified now or before, is left out of broadcasts
+    mentioned = sorted(user_id for kind, user_id in mentions if kind == 'user')
+    if added is not None:
+        added = {tuple(mention) for mention in added}
+        mentions = [mention for mention in mentions if mention in added]
+    kinds = {kind for kind, _ in mentions}
+    direct = sorted(user_id for kind, user_id in mentions if kind == 'user')
+
+    for batch in batches(direct, FANOUT_BATCH):
+        deliver_notifications.delay(channel_id, message_id, 'mention', batch)
+
+    broadcast = 'channel' if 'channel' in kinds else 'here' if 'here' in kinds else None
+    if broadcast:
+        members = (
+            ChannelMember.objects.filter(channel_id=channel_id)
+            .exclude(user_id=message['sender_id'])
+            .exclude(user_id__in=mentioned)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)
+        )
+        for batch in batches(members.iterator(chunk_size=FANOUT_BATCH), FANOUT_BATCH):
+            deliver_notifications.delay(channel_id, message_id, broadcast, batch)
+
+
+@task(max_retries=5, concurrency=8)
+def deliver_notifications(channel_id, message_id, kind, user_ids):
+    if kind == 'here':
+        user_ids = online_user_ids(user_ids)
+    if user_ids:
+        deliver(channel_id, message_id, kind, user_ids)
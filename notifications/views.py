@@ -0,0 +1,55 @@
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.utils import timezone
+from utils.db_router import ReplicaReadMixin
+from .models import Notification
+from .serializers import NotificationSerializer
+
+
+class NotificationViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet for the current user's notifications"""
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(recipient=self.request.user)
+        
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(read_at__isnull=True)
+        
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        """Mark notification as read"""
+        notification = self.get_object()
+        
+        if notification.read_at is None:
+            notification.read_at = timezone.now()
+            notification.save(update_fields=['read_at'])
+        
+        return Response({'message': 'Marked as read'})
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark every unread notification as read"""
+        updated = Notification.objects.filter(
+            recipient=request.user,
+            read_at__isnull=True
+        ).update(read_at=timezone.now())
+        
+        return Response({'updated': updated})
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Get count of unread notifications"""
+        notifications = Notification.objects.filter(
+            recipient=request.user,
+            read_at__isnull=True
+        )
+        
+        return Response({
+            'unread_count': notifications.count(),
+        })
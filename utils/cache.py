@@ -1,7 +1,13 @@
 from django.core.cache import cache
 from django.conf import settings
+from asgiref.sync import sync_to_async
+import functools
 import hashlib
 import json
+import random
+import time
+
+_MISS = object()
 
 
 def generate_cache_key(prefix, *args, **kwargs):
@@ -12,35 +18,258 @@ def generate_cache_key(prefix, *args, **kwargs):
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
-def cache_user_profile(user_id, timeout=300):
-    """Cache decorator for user profile"""
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            #checks cache first
-            cache_key = f"user_profile:{user_id}"
-            cached_data = cache.get(cache_key)
-            
-            if cached_data:
-                return cached_data#returns immediately(fast)
-            
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, timeout)
-            return result
-        return wrapper
-    return decorator
+# Stored in place of None when a cached function caches negative results
+NEGATIVE = '__cached_none__'
 
 
-def invalidate_user_cache(user_id):
-    """Invalidate user profile cache"""
-    cache_key = f"user_profile:{user_id}"
-    cache.delete(cache_key)
+def namespace_version(key):
+    """
+    Current value of a version counter, seeded from the clock so a counter
+    that was evicted never repeats an old version.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
 
 
-def cache_workspace_list(user_id, timeout=300):
-    """Cache workspace list for user"""
-    cache_key = f"workspace_list:{user_id}"
-    cached_data = cache.get(cache_key)
-    return cached_data, cache_key
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def key_part(value):
+    """Readable key fragment for an argument; models use their pk"""
+    value = getattr(value, 'pk', value)
+    text = str(value)
+    if len(text) > 64 or any(char.isspace() for char in text):
+        return hashlib.md5(text.encode()).hexdigest()
+    return text
+
+
+class Cached:
+    """
+    A function whose results are cached under namespace:<args>.
+
+    Keys stay readable (user_profile:42), so a namespace can be matched by
+    prefix; versioned namespaces are invalidated wholesale by bumping
+    <namespace>:version instead. See cached() for the options.
+    """
+
+    def __init__(self, func, namespace, timeout=300, key=None, versioned=False,
+                 negative_timeout=None, jitter=0.1, single_flight=False, many=None):
+        self.func = func
+        self.namespace = namespace
+        self.timeout = timeout
+        self.key_func = key
+        self.versioned = versioned
+        self.negative_timeout = negative_timeout
+        self.jitter = jitter
+        self.single_flight = single_flight
+        self.many = many
+        functools.update_wrapper(self, func)
+
+    def __get__(self, instance, owner):
+        # Serializer and view methods: self is not part of the key
+        if instance is None:
+            return self
+        return BoundCached(self, instance)
+
+    def prefix(self):
+        """The namespace, plus its current version when versioned"""
+        if self.versioned:
+            return f"{self.namespace}:v{namespace_version(f'{self.namespace}:version')}"
+        return self.namespace
+
+    def key(self, *args, **kwargs):
+        return self.build_key(self.prefix(), args, kwargs)
+
+    def build_key(self, prefix, args, kwargs=None):
+        kwargs = kwargs or {}
+        parts = self.key_func(*args, **kwargs) if self.key_func else args + tuple(
+            value for _, value in sorted(kwargs.items())
+        )
+        if not isinstance(parts, (tuple, list)):
+            parts = (parts,)
+        return ':'.join([prefix] + [key_part(part) for part in parts])
+
+    def keys(self, args_list):
+        """{key: arg} for single-argument calls, reading the version once"""
+        prefix = self.prefix()
+        return {self.build_key(prefix, (arg,)): arg for arg in args_list}
+
+    def ttl(self, value):
+        timeout = self.negative_timeout if value is None else self.timeout
+        if timeout and self.jitter:
+            # Spread expiry so keys filled together don't all miss together
+            timeout = int(timeout * random.uniform(1 - self.jitter, 1 + self.jitter)) or 1
+        return timeout
+
+    def store(self, key, value):
+        if value is None and not self.negative_timeout:
+            return
+        cache.set(key, NEGATIVE if value is None else value, self.ttl(value))
+
+    @staticmethod
+    def unwrap(value):
+        return None if value == NEGATIVE else value
+
+    def __call__(self, *args, **kwargs):
+        return self.call(args, kwargs, self.func)
+
+    def call(self, args, kwargs, func):
+        key = self.key(*args, **kwargs)
+        value = cache.get(key, _MISS)
+        if value is not _MISS:
+            return self.unwrap(value)
+        if self.single_flight:
+            return self.compute_once(key, lambda: func(*args, **kwargs))
+        value = func(*args, **kwargs)
+        self.store(key, value)
+        return value
+
+    def compute_once(self, key, compute, wait=2.0, poll=0.05):
+        """Let one caller recompute a missing key while the others wait for it"""
+        lock = f'{key}:lock'
+        if cache.add(lock, 1, max(int(wait * 2), 1)):
+            try:
+                value = compute()
+                self.store(key, value)
+                return value
+            finally:
+                cache.delete(lock)
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(poll)
+            value = cache.get(key, _MISS)
+            if value is not _MISS:
+                return self.unwrap(value)
+        # The holder is slow or gone; don't make this request wait longer
+        value = compute()
+        self.store(key, value)
+        return value
+
+    def get_many(self, args_list, loader=None):
+        """
+        {arg: value} for single-argument calls, with one cache round trip.
+
+        Misses are loaded together by loader (or the many= loader given to
+        cached()), a callable taking a list of args and returning {arg:
+        value}; without one the function is called per miss.
+        """
+        args_list = list(args_list)
+        keys = self.keys(args_list)
+        found = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+        missing = [arg for arg in args_list if arg not in found]
+        loader = loader or self.many
+        if missing:
+            if loader is not None:
+                fresh = loader(missing)
+            else:
+                fresh = {arg: self.func(arg) for arg in missing}
+            self.store_many({arg: fresh.get(arg) for arg in missing}, keys)
+            found.update(fresh)
+        return {
+            arg: self.unwrap(found.get(arg)) for arg in args_list
+            if self.unwrap(found.get(arg)) is not None
+        }
+
+    async def aget(self, *args, loader):
+        """Async call; loader is a coroutine function taking the same arguments"""
+        key = self.key(*args)
+        value = await cache.aget(key, _MISS)
+        if value is not _MISS:
+            return self.unwrap(value)
+        value = await loader(*args)
+        await sync_to_async(self.store)(key, value)
+        return value
+
+    async def aget_many(self, args_list, loader):
+        """Async get_many; loader is a coroutine function"""
+        args_list = list(args_list)
+        keys = self.keys(args_list)
+        found = {keys[key]: value for key, value in (await cache.aget_many(list(keys))).items()}
+
+        missing = [arg for arg in args_list if arg not in found]
+        if missing:
+            fresh = await loader(missing)
+            await sync_to_async(self.store_many)({arg: fresh.get(arg) for arg in missing}, keys)
+            found.update(fresh)
+        return {
+            arg: self.unwrap(found.get(arg)) for arg in args_list
+            if self.unwrap(found.get(arg)) is not None
+        }
+
+    def store_many(self, values, keys=None):
+        """Store {arg: value}; keys is the {key: arg} the values were read under"""
+        keys = {arg: key for key, arg in (keys or self.keys(values)).items()}
+        present = {keys[arg]: value for arg, value in values.items() if value is not None}
+        if present:
+            cache.set_many(present, self.ttl(True))
+        if self.negative_timeout:
+            absent = [keys[arg] for arg, value in values.items() if value is None]
+            if absent:
+                cache.set_many(dict.fromkeys(absent, NEGATIVE), self.ttl(None))
+
+    def invalidate(self, *args, **kwargs):
+        cache.delete(self.key(*args, **kwargs))
+
+    def invalidate_many(self, args_list):
+        cache.delete_many(list(self.keys(args_list)))
+
+    def invalidate_all(self):
+        """Orphan every key in a versioned namespace"""
+        if not self.versioned:
+            raise TypeError(f'{self.namespace} is not a versioned namespace')
+        bump_version(f'{self.namespace}:version')
+
+
+class BoundCached:
+    """Cached bound to an instance (methods); the instance is not in the key"""
+
+    def __init__(self, cached_func, instance):
+        self.cached = cached_func
+        self.instance = instance
+
+    def __call__(self, *args, **kwargs):
+        return self.cached.call(
+            args, kwargs, functools.partial(self.cached.func, self.instance)
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.cached, name)
+
+
+def cached(namespace, timeout=300, key=None, versioned=False, negative_timeout=None,
+           jitter=0.1, single_flight=False, many=None):
+    """
+    Cache a function's result under a key derived from its arguments.
+
+        @cached('unread_count', timeout=60, single_flight=True)
+        def unread_direct_messages(user_id):
+            ...
+
+        unread_direct_messages(7)              # unread_count:7
+        unread_direct_messages.invalidate(7)
+        profiles = user_profile.get_many(ids)  # one get_many round trip
+
+    key maps the arguments to key parts (default: the arguments, models by
+    pk). versioned adds a namespace version so invalidate_all() drops every
+    key at once. None results are cached for negative_timeout seconds when
+    it is set (otherwise recomputed). TTLs are spread by +/- jitter, and
+    single_flight makes concurrent misses wait for one recomputation.
+    """
+    def decorator(func):
+        return Cached(
+            func, namespace, timeout=timeout, key=key, versioned=versioned,
+            negative_timeout=negative_timeout, jitter=jitter,
+            single_flight=single_flight, many=many
+        )
+    return decorator
 
 
 def invalidate_workspace_cache(workspace_id):
@@ -80,6 +309,14 @@ class CacheKeys:
     def channel_list(workspace_id):
         return f"channel_list:{workspace_id}"
     
+    @staticmethod
+    def member_version(scope, object_id):
+        return f"member_version:{scope}:{object_id}"
+    
+    @staticmethod
+    def member_page(scope, object_id, version, digest):
+        return f"member_page:{scope}:{object_id}:v{version}:{digest}"
+    
     @staticmethod
     def channel_messages(channel_id, page=1):
         return f"channel_messages:{channel_id}:page:{page}"
@@ -90,4 +327,8 @@ class CacheKeys:
     
     @staticmethod
     def unread_count(user_id):
-        return f"unread_count:{user_id}"
\ No newline at end of file
+        return f"unread_count:{user_id}"
+    
+    @staticmethod
+    def db_pin(user_id):
+        return f"db_pin:{user_id}"
\ No newline at end of file
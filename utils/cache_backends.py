@@ -0,0 +1,335 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django_redis.cache import RedisCache, omit_exception
+
+from .cache_codec import UNREADABLE
+from .instrumentation import record_cache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class InstrumentedRedisCache(RedisCache):
+    """
+    django-redis backend that reports hits and misses to the request metrics.
+
+    Entries the serializer can't decode (see utils.cache_codec) are misses.
+    """
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, default=_MISSING, version=version, client=client)
+        if value is _MISSING or value is UNREADABLE:
+            record_cache(misses=1)
+            return default
+        record_cache(hits=1)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        result = super().get_many(keys, version=version, client=client)
+        result = {key: value for key, value in result.items() if value is not UNREADABLE}
+        record_cache(hits=len(result), misses=len(keys) - len(result))
+        return result
+
+
+class LocalTier:
+    """
+    Bounded LRU of encoded values shared by every thread in a process.
+
+    Entries live at most `timeout` seconds and are only stored while the
+    invalidation subscriber is connected; each invalidation bumps `epoch`,
+    so a value read from Redis before an invalidation arrived is dropped
+    instead of cached.
+    """
+
+    def __init__(self, max_entries=10000, timeout=10, max_value_bytes=65536):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.max_value_bytes = max_value_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.epoch = 0
+        self.connected = False
+        self.stats = Counter()
+        self.listener = None
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.stats['local_misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['local_hits'] += 1
+            return entry[1]
+
+    def put(self, key, raw, epoch):
+        if not self.connected or len(raw) > self.max_value_bytes:
+            return
+        with self.lock:
+            if epoch != self.epoch:
+                return
+            self.entries[key] = (time.monotonic() + self.timeout, raw)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def evict(self, keys=None):
+        """Drop keys (everything when None)"""
+        with self.lock:
+            self.epoch += 1
+            if keys is None:
+                self.entries.clear()
+            else:
+                for key in keys:
+                    self.entries.pop(key, None)
+            self.stats['invalidations'] += 1
+
+    def start(self, redis, channel):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(
+                    target=self.listen, args=(redis, channel),
+                    name='cache-invalidation', daemon=True
+                )
+                self.listener.start()
+
+    def listen(self, redis, channel):
+        backoff = 0.5
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                pubsub.subscribe(channel)
+                for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        self.connected = True
+                        backoff = 0.5
+                    elif message['type'] == 'message':
+                        keys = json.loads(message['data'])
+                        self.evict(None if keys == '*' else keys)
+            except Exception as e:
+                logger.warning('Cache invalidation subscriber disconnected: %s', e)
+            finally:
+                # Whatever was missed while disconnected may be stale
+                self.connected = False
+                self.evict()
+                pubsub.close()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+def tier_stats():
+    """Hit and miss counters per tier, summed over this process's caches"""
+    totals = Counter()
+    for tier in list(_tiers.values()):
+        totals.update(tier.stats)
+        totals['local_entries'] += len(tier.entries)
+    return dict(totals)
+
+
+class TieredRedisCache(InstrumentedRedisCache):
+    """
+    InstrumentedRedisCache with an in-process LRU in front of it.
+
+    Keys matching OPTIONS['LOCAL_CACHE']['PREFIXES'] are served from the
+    process-wide LocalTier when present. Every write to such a key (set,
+    add, delete, incr, ...) evicts it locally and is published on a Redis
+    channel, which each process subscribes to, so copies elsewhere are
+    dropped too. The LRU stores the encoded bytes and decodes per read, so
+    callers never share mutable objects.
+
+        'OPTIONS': {
+            'LOCAL_CACHE': {
+                'PREFIXES': ['user_profile:', 'channel_list:'],
+                'MAX_ENTRIES': 10000,
+                'TIMEOUT': 10,
+                'MAX_VALUE_BYTES': 65536,
+            },
+        }
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        conf = params.get('OPTIONS', {}).get('LOCAL_CACHE') or {}
+        self.local_prefixes = tuple(conf.get('PREFIXES', ()))
+        self.local_conf = conf
+        self.channel = conf.get('CHANNEL') or f'{self.key_prefix or "cache"}:invalidate'
+
+    @property
+    def tier(self):
+        if not self.local_prefixes or not self.local_conf.get('ENABLED', True):
+            return None
+        # Cache instances are per thread; the tier is per process
+        key = (os.getpid(), repr(self._server), self.key_prefix)
+        tier = _tiers.get(key)
+        if tier is None:
+            with _tiers_lock:
+                tier = _tiers.get(key)
+                if tier is None:
+                    tier = _tiers[key] = LocalTier(
+                        max_entries=self.local_conf.get('MAX_ENTRIES', 10000),
+                        timeout=self.local_conf.get('TIMEOUT', 10),
+                        max_value_bytes=self.local_conf.get('MAX_VALUE_BYTES', 65536),
+                    )
+        if tier.listener is None:
+            tier.start(self.client.get_client(write=True), self.channel)
+        return tier
+
+    def is_local(self, key):
+        return str(key).startswith(self.local_prefixes)
+
+    @omit_exception(return_value=None)
+    def _mget(self, made_keys):
+        return self.client.get_client(write=False).mget(made_keys)
+
+    def get(self, key, default=None, version=None, client=None):
+        tier = self.tier
+        if tier is None or client is not None or not self.is_local(key):
+            value = super().get(key, default=_MISSING, version=version, client=client)
+            if tier is not None:
+                tier.stats['redis_misses' if value is _MISSING else 'redis_hits'] += 1
+            return default if value is _MISSING else value
+
+        made = self.client.make_key(key, version=version)
+        raw = tier.get(made)
+        if raw is not None:
+            record_cache(hits=1)
+            return self.client.decode(raw)
+
+        epoch = tier.epoch
+        raw = (self._mget([made]) or [None])[0]
+        value = UNREADABLE if raw is None else self.client.decode(raw)
+        if value is UNREADABLE:
+            tier.stats['redis_misses'] += 1
+            record_cache(misses=1)
+            return default
+        tier.stats['redis_hits'] += 1
+        tier.put(made, raw, epoch)
+        record_cache(hits=1)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        tier = self.tier
+        if tier is None or client is not None:
+            return super().get_many(keys, version=version, client=client)
+
+        local = {
+            self.client.make_key(key, version=version): key
+            for key in keys if self.is_local(key)
+        }
+        others = [key for key in keys if not self.is_local(key)]
+        result = super().get_many(others, version=version) if others else {}
+        tier.stats['redis_hits'] += len(result)
+        tier.stats['redis_misses'] += len(others) - len(result)
+
+        pending = []
+        for made, key in local.items():
+            raw = tier.get(made)
+            if raw is None:
+                pending.append(made)
+            else:
+                result[key] = self.client.decode(raw)
+        if pending:
+            epoch = tier.epoch
+            for made, raw in zip(pending, self._mget(pending) or [None] * len(pending)):
+                value = UNREADABLE if raw is None else self.client.decode(raw)
+                if value is UNREADABLE:
+                    tier.stats['redis_misses'] += 1
+                    continue
+                tier.stats['redis_hits'] += 1
+                tier.put(made, raw, epoch)
+                result[local[made]] = value
+        found = sum(1 for key in local.values() if key in result)
+        record_cache(hits=found, misses=len(local) - found)
+        return result
+
+    def invalidate(self, keys, version=None):
+        """Evict keys here and in every other process"""
+        tier = self.tier
+        if tier is None:
+            return
+        if keys is None:
+            made = None
+        else:
+            made = [str(self.client.make_key(key, version=version)) for key in keys if self.is_local(key)]
+            if not made:
+                return
+        tier.evict(made)
+        try:
+            self.client.get_client(write=True).publish(
+                self.channel, json.dumps('*' if made is None else made)
+            )
+        except Exception as e:
+            logger.warning('Cache invalidation publish failed: %s', e)
+
+    # Explicit signatures: a version passed positionally must reach
+    # invalidate() too, or the wrong local key is evicted
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, client=None, nx=False, xx=False):
+        result = super().set(key, value, timeout, version=version, client=client, nx=nx, xx=xx)
+        self.invalidate([key], version)
+        return result
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        result = super().add(key, value, timeout, version=version, client=client)
+        if result:
+            self.invalidate([key], version)
+        return result
+
+    def delete(self, key, version=None, prefix=None, client=None):
+        result = super().delete(key, version=version, prefix=prefix, client=client)
+        self.invalidate([key], version)
+        return result
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        result = super().touch(key, timeout, version=version, client=client)
+        self.invalidate([key], version)
+        return result
+
+    def incr(self, key, delta=1, version=None, client=None, ignore_key_check=False):
+        result = super().incr(key, delta, version=version, client=client, ignore_key_check=ignore_key_check)
+        self.invalidate([key], version)
+        return result
+
+    def decr(self, key, delta=1, version=None, client=None):
+        result = super().decr(key, delta, version=version, client=client)
+        self.invalidate([key], version)
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        result = super().set_many(data, timeout, version=version, client=client)
+        self.invalidate(list(data), version)
+        return result
+
+    def delete_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        result = super().delete_many(keys, version=version, client=client)
+        self.invalidate(keys, version)
+        return result
+
+    def delete_pattern(self, pattern, *args, **kwargs):
+        result = super().delete_pattern(pattern, *args, **kwargs)
+        # Only flush the local tiers when the pattern can reach local keys
+        if any(prefix.rstrip(':') in pattern for prefix in self.local_prefixes):
+            self.invalidate(None)
+        return result
+
+    def clear(self):
+        result = super().clear()
+        self.invalidate(None)
+        return result
@@ -0,0 +1,154 @@
+"""
+Compact, version-tagged encoding of cache values for django-redis.
+
+Replaces django-redis's pickle serializer. Values are encoded as msgpack or
+JSON and compressed with zlib or lz4 once they pass a size threshold. Every
+entry starts with a three-byte header saying how it was written:
+
+    <codec version> <format: j=json, m=msgpack> <compression: -, z=zlib, l=lz4>
+
+so readers decode each entry by its own header, whatever the current
+settings say, and a deploy can change format or compressor without
+flushing Redis. Entries that can't be read (an old pickle, a newer codec
+version, a library this process lacks) decode to UNREADABLE, which the
+cache backend treats as a miss.
+
+    'OPTIONS': {
+        'SERIALIZER': 'utils.cache_codec.CacheSerializer',
+        'CODEC': {
+            'FORMAT': 'msgpack',       # or 'json'
+            'COMPRESSOR': 'zlib',      # 'lz4', or None
+            'COMPRESS_MIN_BYTES': 1024,
+        },
+    }
+
+Values must be JSON-shaped: tuples come back as lists and dict keys as
+strings. msgpack, lz4 and orjson are optional; a missing format falls back
+to JSON and a missing compressor to zlib.
+"""
+
+import json
+import logging
+import uuid
+import zlib
+from decimal import Decimal
+
+from django_redis.serializers.base import BaseSerializer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import lz4.frame
+except ImportError:  # pragma: no cover
+    lz4 = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_VERSION = 1
+HEADER_SIZE = 3
+
+# Returned by loads() for entries this process can't decode
+UNREADABLE = object()
+
+
+def _default(obj):
+    # Same strings whichever library encodes the value
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, Decimal)):
+        return str(obj)
+    raise TypeError(f'{type(obj).__name__} is not cacheable as JSON/msgpack')
+
+
+def json_dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default, separators=(',', ':')).encode()
+
+
+def json_loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def msgpack_dumps(value):
+    return msgpack.packb(value, use_bin_type=True, default=_default)
+
+
+def msgpack_loads(data):
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+FORMATS = {
+    b'j': (json_dumps, json_loads),
+    b'm': (msgpack_dumps, msgpack_loads),
+}
+
+COMPRESSORS = {
+    b'z': (lambda data: zlib.compress(data, 1), zlib.decompress),
+    b'l': (
+        lambda data: lz4.frame.compress(data),
+        lambda data: lz4.frame.decompress(data),
+    ),
+}
+
+
+def format_tag(name):
+    if name == 'msgpack' and msgpack is not None:
+        return b'm'
+    if name not in ('json', 'msgpack'):
+        raise ValueError(f'Unknown cache format: {name}')
+    return b'j'
+
+
+def compressor_tag(name):
+    if not name:
+        return b'-'
+    if name == 'lz4' and lz4 is not None:
+        return b'l'
+    if name not in ('zlib', 'lz4'):
+        raise ValueError(f'Unknown cache compressor: {name}')
+    return b'z'
+
+
+class CacheSerializer(BaseSerializer):
+    """django-redis SERIALIZER writing tagged msgpack/JSON, compressed when large"""
+
+    def __init__(self, options):
+        conf = options.get('CODEC') or {}
+        self.format = format_tag(conf.get('FORMAT', 'msgpack'))
+        self.compressor = compressor_tag(conf.get('COMPRESSOR', 'zlib'))
+        self.min_bytes = conf.get('COMPRESS_MIN_BYTES', 1024)
+        self.dumps_value = FORMATS[self.format][0]
+
+    def dumps(self, value):
+        data = self.dumps_value(value)
+        compression = b'-'
+        if self.compressor != b'-' and len(data) >= self.min_bytes:
+            packed = COMPRESSORS[self.compressor][0](data)
+            # Already-dense values can grow; keep whichever is smaller
+            if len(packed) < len(data):
+                data, compression = packed, self.compressor
+        return bytes((CODEC_VERSION,)) + self.format + compression + data
+
+    def loads(self, value):
+        value = bytes(value)
+        if len(value) < HEADER_SIZE or value[0] != CODEC_VERSION:
+            return UNREADABLE
+        format_, compression = value[1:2], value[2:3]
+        data = value[HEADER_SIZE:]
+        try:
+            if compression != b'-':
+                data = COMPRESSORS[compression][1](data)
+            return FORMATS[format_][1](data)
+        except Exception as e:
+            # Unknown tag, missing optional library or corrupt data
+            logger.warning('Unreadable cache entry (%r%r): %s', format_, compression, e)
+            return UNREADABLE
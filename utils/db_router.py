@@ -0,0 +1,138 @@
+"""
+Read-replica routing.
+
+ReplicaReadMixin marks safe-method API requests as replica-eligible once the
+user is authenticated, unless that user wrote something in the last
+REPLICA_PIN_SECONDS (read-your-writes). ReplicaRouter then sends reads made
+during such a request to a replica whose measured lag is within
+REPLICA_MAX_LAG_SECONDS; everything else stays on the primary.
+"""
+
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework import permissions
+
+from .cache import CacheKeys
+from .instrumentation import registry
+
+logger = logging.getLogger(__name__)
+
+_use_replica = ContextVar('use_replica', default=False)
+
+LAG_CHECK_INTERVAL = 5
+
+_lag = {}
+_lag_checked_at = 0.0
+_lag_lock = threading.Lock()
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+
+def measure_replica_lag(alias):
+    """Seconds the replica is behind the primary (0 when caught up)"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+def refresh_replica_lag(force=False):
+    """Re-measure lag for every replica and export it as a gauge"""
+    global _lag_checked_at
+    if not force and time.monotonic() - _lag_checked_at < LAG_CHECK_INTERVAL:
+        return _lag
+    with _lag_lock:
+        if not force and time.monotonic() - _lag_checked_at < LAG_CHECK_INTERVAL:
+            return _lag
+        for alias in replica_aliases():
+            try:
+                _lag[alias] = measure_replica_lag(alias)
+            except Exception as e:
+                logger.warning('Replica %s lag check failed: %s', alias, e)
+                _lag[alias] = float('inf')
+            registry.set_gauge(
+                'db_replica_lag_seconds', _lag[alias],
+                'Replication lag behind the primary', alias=alias
+            )
+        _lag_checked_at = time.monotonic()
+    return _lag
+
+
+def healthy_replicas():
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+    lag = refresh_replica_lag()
+    return [alias for alias in replica_aliases() if lag.get(alias, 0) <= max_lag]
+
+
+class ReplicaRouter:
+    """Route reads to a replica when the current request allows it"""
+
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get():
+            return None
+        replicas = healthy_replicas()
+        if replicas:
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def pin_to_primary(user_id):
+    """Keep user_id's reads on the primary long enough to see their write"""
+    cache.set(
+        CacheKeys.db_pin(user_id), 1,
+        getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+    )
+
+
+class ReplicaReadMixin:
+    """Serve safe-method requests from replicas with read-your-writes pinning"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in permissions.SAFE_METHODS
+            and replica_aliases()
+            and request.user.is_authenticated
+            and not cache.get(CacheKeys.db_pin(request.user.id))
+        ):
+            self._replica_token = _use_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        try:
+            response = super().finalize_response(request, response, *args, **kwargs)
+        finally:
+            token = getattr(self, '_replica_token', None)
+            if token is not None:
+                _use_replica.reset(token)
+                self._replica_token = None
+
+        if (
+            request.method not in permissions.SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.id)
+        return response
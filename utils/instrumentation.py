@@ -0,0 +1,318 @@
+"""
+Per-request query, cache and serializer instrumentation.
+
+InstrumentationMiddleware installs an execute wrapper on every database
+connection and, for sampled requests, records query counts, DB time, cache
+hits and misses and serializer time, exposing them as a Server-Timing header
+and as Prometheus metrics at the metrics endpoint. Metrics travel in a
+context variable, so queries the async ORM runs in worker threads are
+counted too. When disabled in settings the middleware removes itself from
+the stack, so there is no per-request cost.
+"""
+
+import hmac
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics', default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def get_settings():
+    defaults = {
+        'ENABLED': False,
+        'SAMPLE_RATE': 1.0,
+        'SLOW_REQUEST_MS': 500,
+        'SERVER_TIMING': True,
+        'METRICS_TOKEN': '',
+    }
+    return {**defaults, **getattr(settings, 'INSTRUMENTATION', {})}
+
+
+def fingerprint(sql):
+    """Normalize SQL so queries differing only in literals group together"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    """Counters for a single sampled request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+            self.fingerprints[sql] += 1
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(sender=None, connection=None, **kwargs):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def current_metrics():
+    return _current.get()
+
+
+def record_cache(hits=0, misses=0):
+    """Called by the cache backend for every lookup"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+class TimedSerializerMixin:
+    """Accumulate time spent in the outermost to_representation call"""
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics.serializer_depth:
+            return super().to_representation(instance)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializer_depth -= 1
+
+
+class MetricsRegistry:
+    """Process-local aggregates rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = Counter()
+        self.durations = defaultdict(lambda: [0] * (len(DURATION_BUCKETS) + 1))
+        self.duration_sums = Counter()
+        self.queries = Counter()
+        self.db_seconds = Counter()
+        self.cache_hits = Counter()
+        self.cache_misses = Counter()
+        self.serializer_seconds = Counter()
+        self.gauges = {}
+
+    def observe(self, view, method, status, duration, metrics):
+        with self._lock:
+            self.requests[(view, method, status)] += 1
+            buckets = self.durations[view]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+                    break
+            else:
+                buckets[-1] += 1
+            self.duration_sums[view] += duration
+            self.queries[view] += metrics.queries
+            self.db_seconds[view] += metrics.db_time
+            self.cache_hits[view] += metrics.cache_hits
+            self.cache_misses[view] += metrics.cache_misses
+            self.serializer_seconds[view] += metrics.serializer_time
+
+    def set_gauge(self, name, value, help_text='', **labels):
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = (value, help_text)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines += self._counter(
+                'http_requests_total', 'Sampled requests by view',
+                {f'view="{v}",method="{m}",status="{s}"': n
+                 for (v, m, s), n in self.requests.items()}
+            )
+            lines += [
+                '# HELP http_request_duration_seconds Sampled request latency',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for view, buckets in self.durations.items():
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + ('+Inf',), buckets):
+                    cumulative += count
+                    lines.append(
+                        f'http_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f'http_request_duration_seconds_sum{{view="{view}"}} {self.duration_sums[view]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{view="{view}"}} {cumulative}')
+            for name, help_text, data in (
+                ('db_queries_total', 'Database queries', self.queries),
+                ('db_duration_seconds_total', 'Time spent in the database', self.db_seconds),
+                ('cache_hits_total', 'Cache hits', self.cache_hits),
+                ('cache_misses_total', 'Cache misses', self.cache_misses),
+                ('serializer_duration_seconds_total', 'Time spent serializing', self.serializer_seconds),
+            ):
+                lines += self._counter(
+                    name, help_text, {f'view="{v}"': n for v, n in data.items()}
+                )
+            seen = set()
+            for (name, labels), (value, help_text) in sorted(self.gauges.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f'{name}{{{label_text}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _counter(name, help_text, samples):
+        lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for labels, value in samples.items():
+            value = f'{value:.6f}' if isinstance(value, float) else value
+            lines.append(f'{name}{{{labels}}} {value}')
+        return lines
+
+
+registry = MetricsRegistry()
+
+
+class InstrumentationMiddleware:
+    """Record query count, DB time, cache and serializer time per view"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = get_settings()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.sample_rate = self.config['SAMPLE_RATE']
+        self.slow_seconds = self.config['SLOW_REQUEST_MS'] / 1000
+
+        connection_created.connect(install_execute_wrapper)
+        for connection in connections.all(initialized_only=True):
+            install_execute_wrapper(connection=connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, metrics, duration):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        registry.observe(view, request.method, response.status_code, duration, metrics)
+
+        if self.config['SERVER_TIMING']:
+            response['Server-Timing'] = self.server_timing(metrics, duration)
+        if duration >= self.slow_seconds:
+            self.log_slow_request(request, view, duration, metrics)
+        return response
+
+    @staticmethod
+    def server_timing(metrics, duration):
+        return ', '.join([
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f'cache;desc="{metrics.cache_hits} hits {metrics.cache_misses} misses"',
+            f'serializer;dur={metrics.serializer_time * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ])
+
+    @staticmethod
+    def log_slow_request(request, view, duration, metrics):
+        grouped = Counter()
+        for sql, count in metrics.fingerprints.items():
+            grouped[fingerprint(sql)] += count
+        top = '; '.join(f'{count}x {sql[:200]}' for sql, count in grouped.most_common(5))
+        logger.warning(
+            'Slow request %s %s (%s) %.0fms: %d queries in %.0fms, serializer %.0fms. Top queries: %s',
+            request.method, request.path, view, duration * 1000,
+            metrics.queries, metrics.db_time * 1000,
+            metrics.serializer_time * 1000, top
+        )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs METRICS_TOKEN, or a staff session when it is unset"""
+    token = get_settings()['METRICS_TOKEN']
+    if token:
+        allowed = hmac.compare_digest(
+            request.headers.get('Authorization', ''), f'Bearer {token}'
+        )
+    else:
+        user = getattr(request, 'user', None)
+        allowed = user is not None and user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+
+    from .db_router import refresh_replica_lag
+    from .cache_backends import tier_stats
+    # At most once per LAG_CHECK_INTERVAL, however often it is scraped
+    refresh_replica_lag()
+    for name, value in tier_stats().items():
+        registry.set_gauge('cache_tier_events', value, 'Two-tier cache counters by kind', kind=name)
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
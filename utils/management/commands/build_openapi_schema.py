@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from utils.schema import cached_schema, code_version, schema_dir, write_schema
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema artifact served at /api/schema/ (run at deploy time)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help='Defaults to OPENAPI_SCHEMA_DIR')
+
+    def handle(self, *args, **options):
+        for path in write_schema(options['output_dir'] or schema_dir()):
+            self.stdout.write(f'Wrote {path} ({path.stat().st_size} bytes)')
+
+        # Older code versions' copies expire on their own; drop this one's in
+        # case it was generated under different settings
+        try:
+            cached_schema.invalidate(code_version())
+        except Exception as e:
+            self.stderr.write(f'Could not clear the cached schema: {e}')
+        self.stdout.write(self.style.SUCCESS('Schema built'))
@@ -0,0 +1,86 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter so nothing is imported yet
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+timings = {"setup_ms": (time.perf_counter() - start) * 1000}
+target = sys.argv[1]
+if target in ("urls", "warmup"):
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    timings["urls_ms"] = (time.perf_counter() - start) * 1000
+if target == "warmup":
+    from utils.warmup import warm_up
+    timings["warmup"] = warm_up()
+timings["total_ms"] = (time.perf_counter() - start) * 1000
+print(json.dumps(timings))
+'''
+
+
+def parse_importtime(output):
+    """[(module, self_us, cumulative_us, depth)] from python -X importtime output"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report the heaviest imports of a cold worker start (python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=['setup', 'urls', 'warmup'], default='urls',
+                            help='Stop after django.setup(), after loading the URLconf '
+                                 '(default), or after the worker warm-up')
+        parser.add_argument('--limit', type=int, default=25)
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+        parser.add_argument('--by-package', action='store_true',
+                            help='Sum self time per top-level package')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT, options['target']],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        rows = parse_importtime(result.stderr)
+
+        self.stdout.write(
+            f"{len(rows)} modules, {sum(row[1] for row in rows) / 1000:.1f} ms importing; "
+            f"setup {timings['setup_ms']:.1f} ms, total {timings['total_ms']:.1f} ms"
+        )
+        if 'warmup' in timings:
+            self.stdout.write('warm-up: ' + ', '.join(
+                f'{step} {ms} ms' for step, ms in timings['warmup'].items()
+            ))
+
+        if options['by_package']:
+            totals = {}
+            for name, self_us, _, _ in rows:
+                package = name.split('.')[0]
+                totals[package] = totals.get(package, 0) + self_us
+            self.stdout.write(f"\n{'package':<40} {'self ms':>9}")
+            for package, self_us in sorted(totals.items(), key=lambda item: -item[1])[:options['limit']]:
+                self.stdout.write(f'{package:<40} {self_us / 1000:>9.1f}')
+            return
+
+        index = 2 if options['sort'] == 'cumulative' else 1
+        self.stdout.write(f"\n{'module':<60} {'self ms':>9} {'cumul ms':>9}")
+        for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: -row[index])[:options['limit']]:
+            self.stdout.write(f'{name:<60} {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}')
@@ -0,0 +1,48 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.tasks import Worker, get_backend
+
+
+class Command(BaseCommand):
+    help = 'Process background tasks from the task queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Jobs processed concurrently by this worker')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty')
+        parser.add_argument('--recover', action='store_true',
+                            help='Requeue jobs held by workers that stopped heartbeating')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if not hasattr(backend, 'reserve') or getattr(backend, 'eager', False):
+            raise CommandError('The configured task backend runs tasks inline; no worker needed')
+
+        if options['recover']:
+            recovered = backend.recover()
+            self.stdout.write(f'Requeued {recovered} jobs from dead workers')
+
+        workers = [Worker(backend) for _ in range(options['threads'])]
+
+        def stop(signum, frame):
+            self.stdout.write('Stopping after current jobs...')
+            for worker in workers:
+                worker.stop()
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        threads = [
+            threading.Thread(target=worker.run, kwargs={'burst': options['burst']})
+            for worker in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        processed = sum(worker.processed for worker in workers)
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
@@ -0,0 +1,57 @@
+"""
+Compact JSON renderer and parser backed by orjson.
+
+orjson is optional: without it both classes behave exactly like DRF's
+JSONRenderer/JSONParser. Pretty-printed output (``; indent=N`` or the
+browsable API) always goes through the stock renderer.
+"""
+
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Lazy strings, Decimals, querysets etc. that orjson doesn't know about
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer that uses orjson for compact output when available"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Datetimes go through DRF's encoder too, which writes UTC as Z, so
+        # the output matches JSONRenderer exactly
+        return orjson.dumps(
+            data,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSONParser that decodes with orjson when available"""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
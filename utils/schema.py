@@ -0,0 +1,183 @@
+"""
+Precomputed OpenAPI schema.
+
+SpectacularAPIView introspects every viewset and serializer on each
+request. The schema only changes with the code, so it is generated once
+and served as a static artifact from, in order:
+
+    1. OPENAPI_SCHEMA_DIR/schema.{yaml,json}[.gz], written at deploy time
+       by `manage.py build_openapi_schema`, if the code_version() recorded
+       next to them in schema.version is the running code's
+    2. the cache, filled lazily by the first request (one process
+       generates while the others wait; see utils.cache.cached) and keyed
+       by code_version(), so a deploy never serves the previous schema
+
+Each process keeps the encoded and gzipped bodies in memory, reloading
+when the artifact file changes. Responses carry a content-hash ETag, so
+clients revalidate with If-None-Match and get a 304, and are sent
+pre-gzipped to clients that accept gzip (with the ETag suffixed -gzip, as
+the two bodies are different representations).
+"""
+
+import gzip
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import patch_vary_headers
+
+from .cache import cached
+
+FORMATS = {
+    'yaml': 'application/vnd.oai.openapi; charset=utf-8',
+    'json': 'application/vnd.oai.openapi+json; charset=utf-8',
+}
+
+SCHEMA_TIMEOUT = 3600
+
+_artifacts = {}
+
+
+def schema_dir():
+    return Path(getattr(settings, 'OPENAPI_SCHEMA_DIR', settings.STATIC_ROOT / 'openapi'))
+
+
+def generate_schema():
+    """{format: rendered schema} straight from drf-spectacular"""
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        'yaml': OpenApiYamlRenderer().render(schema, renderer_context={}).decode(),
+        'json': OpenApiJsonRenderer().render(schema, renderer_context={}).decode(),
+    }
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """Hash of the project's source and drf-spectacular's version"""
+    from drf_spectacular import __version__
+
+    base_dir = Path(settings.BASE_DIR).resolve()
+    directories = {base_dir / settings.ROOT_URLCONF.split('.')[0]}
+    directories.update(
+        Path(config.path).resolve() for config in apps.get_app_configs()
+        if Path(config.path).resolve().is_relative_to(base_dir)
+    )
+    digest = hashlib.sha256(__version__.encode())
+    for path in sorted(path for directory in directories for path in directory.rglob('*.py')):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+@cached('openapi_schema', timeout=SCHEMA_TIMEOUT, single_flight=True)
+def cached_schema(version):
+    return generate_schema()
+
+
+def write_schema(directory=None):
+    """
+    Generate the schema and write every format, plain and gzipped, then
+    the code version they were built from; returns the paths.
+    """
+    directory = Path(directory or schema_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    rendered = generate_schema()
+    files = []
+    for format_, text in rendered.items():
+        body = text.encode()
+        files.append((directory / f'schema.{format_}', body))
+        files.append((directory / f'schema.{format_}.gz', gzip.compress(body, mtime=0)))
+    # Last, so the schema files are never taken for a version they aren't
+    files.append((directory / 'schema.version', code_version().encode()))
+    for path, data in files:
+        # Swap in atomically so a running process never reads half a file
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    return [path for path, _ in files]
+
+
+def mtime(path):
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def artifact(format_):
+    """(body, gzipped body, etag) for a format, from file or cache"""
+    path = schema_dir() / f'schema.{format_}'
+    version_path = schema_dir() / 'schema.version'
+    stamp = (mtime(path), mtime(version_path))
+
+    entry = _artifacts.get(format_)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    # A file left by an earlier deploy (or none at all) isn't this code's schema
+    current = None not in stamp and version_path.read_text().strip() == code_version()
+    if current:
+        body = path.read_bytes()
+        gz_path = path.with_suffix(path.suffix + '.gz')
+        compressed = gz_path.read_bytes() if gz_path.exists() else gzip.compress(body, mtime=0)
+    else:
+        body = cached_schema(code_version())[format_].encode()
+        compressed = gzip.compress(body, mtime=0)
+    result = (body, compressed, '"%s"' % hashlib.sha256(body).hexdigest()[:32])
+    _artifacts[format_] = (stamp, result)
+    return result
+
+
+def requested_format(request):
+    format_ = request.GET.get('format')
+    if format_ in FORMATS:
+        return format_
+    return 'json' if 'json' in request.headers.get('Accept', '') else 'yaml'
+
+
+def accepts_gzip(request):
+    """Whether Accept-Encoding allows gzip, honouring q-values (gzip;q=0 refuses it)"""
+    qualities = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0)) > 0
+
+
+def schema_view(request):
+    """The OpenAPI schema (YAML, or JSON via ?format=json / Accept)"""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    format_ = requested_format(request)
+    body, compressed, etag = artifact(format_)
+    use_gzip = accepts_gzip(request)
+    if use_gzip:
+        etag = etag[:-1] + '-gzip"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
+    elif use_gzip:
+        response = HttpResponse(compressed, content_type=FORMATS[format_])
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(body, content_type=FORMATS[format_])
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=300'
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+    return response
@@ -0,0 +1,113 @@
+"""
+Fast read path for ModelSerializer.to_representation.
+
+DRF resolves every field through get_attribute()/to_representation() with
+SkipField and PKOnlyObject handling on every row. FastReadSerializerMixin
+compiles the serializer's readable fields once per instance (the child of a
+ListSerializer is reused for every row) into direct attribute reads for
+plain columns and foreign-key ids, and only falls back to the generic DRF
+path for everything else. Output is identical to the stock serializer.
+"""
+
+from operator import attrgetter
+
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+# Fields whose to_representation is a no-op for values loaded from the DB
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ReadOnlyField,
+)
+
+
+def _generic_reader(field):
+    def read(instance):
+        attribute = field.get_attribute(instance)
+        check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+        if check_for_none is None:
+            return None
+        return field.to_representation(attribute)
+    return read
+
+
+def _passthrough_reader(source):
+    getter = attrgetter(source)
+
+    def read(instance):
+        return getter(instance)
+    return read
+
+
+def _convert_reader(source, convert):
+    getter = attrgetter(source)
+
+    def read(instance):
+        value = getter(instance)
+        return None if value is None else convert(value)
+    return read
+
+
+def compile_field(field, model):
+    """Return a callable that reads field's representation from an instance"""
+    if hasattr(field, 'compile_reader'):
+        return field.compile_reader(model)
+    if field.source == '*' or len(field.source_attrs) != 1:
+        return _generic_reader(field)
+    source = field.source
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        model_field = _model_field(model, source)
+        if model_field is not None and model_field.many_to_one:
+            return _passthrough_reader(model_field.attname)
+        return _generic_reader(field)
+
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        model_field = _model_field(model, source)
+        if model_field is not None and not model_field.is_relation:
+            if type(field) in (serializers.CharField, serializers.EmailField,
+                               serializers.SlugField, serializers.ReadOnlyField,
+                               serializers.BooleanField):
+                return _passthrough_reader(source)
+            return _convert_reader(source, field.to_representation)
+        if isinstance(field, serializers.ReadOnlyField) and model_field is None:
+            # Properties such as User.full_name
+            return _passthrough_reader(source)
+
+    if isinstance(field, (serializers.DateTimeField, serializers.FileField)):
+        return _convert_reader(source, field.to_representation)
+
+    return _generic_reader(field)
+
+
+def _model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except Exception:
+        return None
+
+
+class FastReadSerializerMixin:
+    """Compile readable fields into direct readers on first use"""
+
+    _read_plan = None
+
+    def to_representation(self, instance):
+        plan = self._read_plan
+        if plan is None:
+            model = self.Meta.model
+            plan = self._read_plan = [
+                (field.field_name, compile_field(field, model))
+                for field in self._readable_fields
+            ]
+
+        ret = {}
+        for name, read in plan:
+            try:
+                ret[name] = read(instance)
+            except SkipField:
+                continue
+        return ret
@@ -0,0 +1,426 @@
+"""
+Lightweight background task queue.
+
+Register side effects with @task and enqueue them after the surrounding
+transaction commits, so the write path returns as soon as the row is
+durable:
+
+    @task(max_retries=3, concurrency=2)
+    def invalidate_channel_messages(channel_id):
+        ...
+
+    invalidate_channel_messages.delay_on_commit(channel.id, dedup_key=f'channel:{channel.id}')
+
+A dedup_key drops the enqueue while an identical job is still waiting, so
+bursts collapse into one run. Failed jobs are retried with exponential
+backoff up to max_retries; concurrency caps how many copies of a task run
+at once across all workers.
+
+The backend comes from settings.TASK_QUEUE. RedisBackend is processed by
+`manage.py run_tasks`; InProcessBackend keeps jobs in memory and, with
+eager=True, runs them as soon as they are enqueued (tests and local runs).
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import autodiscover_modules, import_string
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+@dataclass
+class Job:
+    task: str
+    args: list = field(default_factory=list)
+    kwargs: dict = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    dedup_key: str = ''
+    attempts: int = 0
+
+    def encode(self):
+        return json.dumps(asdict(self), cls=DjangoJSONEncoder)
+
+    @classmethod
+    def decode(cls, raw):
+        return cls(**json.loads(raw))
+
+
+class Task:
+    """A registered function that can be run in the background"""
+
+    def __init__(self, func, name, max_retries=3, retry_delay=5, concurrency=None):
+        self.func = func
+        self.name = name
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.concurrency = concurrency
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def delay(self, *args, dedup_key='', **kwargs):
+        """Enqueue now; returns the job, or None if deduplicated"""
+        job = Job(task=self.name, args=list(args), kwargs=kwargs, dedup_key=dedup_key)
+        return job if get_backend().enqueue(job) else None
+
+    def delay_on_commit(self, *args, dedup_key='', using=None, **kwargs):
+        """Enqueue once the current transaction commits (immediately outside one)"""
+        transaction.on_commit(
+            lambda: self.delay(*args, dedup_key=dedup_key, **kwargs),
+            using=using,
+            robust=True
+        )
+
+
+def task(name=None, max_retries=3, retry_delay=5, concurrency=None):
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        TASKS[task_name] = Task(func, task_name, max_retries, retry_delay, concurrency)
+        return TASKS[task_name]
+    return decorator
+
+
+def get_task(name):
+    if name not in TASKS:
+        autodiscover_modules('tasks')
+    return TASKS[name]
+
+
+def execute(job, backend):
+    """Run one job, scheduling a retry or recording the failure on error"""
+    try:
+        task_ = get_task(job.task)
+    except KeyError:
+        logger.error('Unknown task %s (job %s)', job.task, job.id)
+        backend.fail(job, 'unknown task')
+        return False
+
+    if task_.concurrency and not backend.acquire(task_.name, task_.concurrency):
+        # At the limit: put it back without counting an attempt
+        backend.retry(job, 1)
+        return False
+
+    try:
+        task_.func(*job.args, **job.kwargs)
+        return True
+    except Exception as e:
+        job.attempts += 1
+        if job.attempts <= task_.max_retries:
+            delay = task_.retry_delay * 2 ** (job.attempts - 1)
+            logger.warning(
+                'Task %s failed (attempt %d/%d), retrying in %ss: %s',
+                job.task, job.attempts, task_.max_retries + 1, delay, e
+            )
+            backend.retry(job, delay)
+        else:
+            logger.exception('Task %s failed permanently (job %s)', job.task, job.id)
+            backend.fail(job, repr(e))
+        return False
+    finally:
+        if task_.concurrency:
+            backend.release(task_.name)
+
+
+class InProcessBackend:
+    """Memory-only queue; eager mode runs jobs inside enqueue()"""
+
+    def __init__(self, eager=True):
+        self.eager = eager
+        self.queue = deque()
+        self.delayed = []
+        self.failed = []
+        self.running = {}
+        self.dedup = set()
+        self._lock = threading.Lock()
+
+    def enqueue(self, job):
+        if self.eager:
+            execute(job, self)
+            return True
+        with self._lock:
+            if job.dedup_key:
+                if job.dedup_key in self.dedup:
+                    return False
+                self.dedup.add(job.dedup_key)
+            self.queue.append(job)
+        return True
+
+    def reserve(self, timeout=0):
+        with self._lock:
+            now = time.monotonic()
+            due = [item for item in self.delayed if item[0] <= now]
+            for item in due:
+                self.delayed.remove(item)
+                self.queue.append(item[1])
+            if not self.queue:
+                return None
+            job = self.queue.popleft()
+            self.dedup.discard(job.dedup_key)
+            return job
+
+    def complete(self, job):
+        pass
+
+    def retry(self, job, delay):
+        if self.eager:
+            execute(job, self)
+            return
+        with self._lock:
+            self.delayed.append((time.monotonic() + delay, job))
+
+    def fail(self, job, error):
+        self.failed.append((job, error))
+
+    def acquire(self, name, limit):
+        if self.eager:
+            return True
+        with self._lock:
+            if self.running.get(name, 0) >= limit:
+                return False
+            self.running[name] = self.running.get(name, 0) + 1
+            return True
+
+    def release(self, name):
+        if self.eager:
+            return
+        with self._lock:
+            self.running[name] -= 1
+
+    def drain(self):
+        """Run everything queued (including due retries) in this thread"""
+        while (job := self.reserve()) is not None:
+            execute(job, self)
+
+
+# Move retries whose time has come back onto the queue
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, raw in ipairs(due) do
+    redis.call('ZREM', KEYS[1], raw)
+    redis.call('LPUSH', KEYS[2], raw)
+end
+return #due
+"""
+
+# Take a concurrency slot if fewer than ARGV[1] are in use
+ACQUIRE_SCRIPT = """
+local running = tonumber(redis.call('GET', KEYS[1]) or '0')
+if running >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Give a slot back; never below zero, e.g. after the key expired and reset
+RELEASE_SCRIPT = """
+local running = tonumber(redis.call('GET', KEYS[1]) or '0')
+if running > 0 then
+    return redis.call('DECR', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisBackend:
+    """
+    Reliable Redis list queue.
+
+    Jobs are LPUSHed onto <prefix>:queue and moved atomically to a
+    per-worker processing list while they run. Once a process reserves its
+    first job, a daemon thread refreshes its heartbeat key every
+    heartbeat_timeout / 3 seconds, however long the jobs it is running
+    take, so recover() only requeues jobs held by a worker that died. The
+    same thread keeps the concurrency slots the process holds from
+    expiring; a dead worker's slots lapse after slot_timeout. Retries wait
+    in a sorted set scored by due time.
+    """
+
+    def __init__(self, alias='default', prefix='tasks', dedup_timeout=3600,
+                 slot_timeout=300, max_failed=1000, heartbeat_timeout=30):
+        from django_redis import get_redis_connection
+        self.redis = get_redis_connection(alias)
+        self.prefix = prefix
+        self.dedup_timeout = dedup_timeout
+        self.slot_timeout = slot_timeout
+        self.max_failed = max_failed
+        self.heartbeat_timeout = heartbeat_timeout
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.promote = self.redis.register_script(PROMOTE_SCRIPT)
+        self.acquire_slot = self.redis.register_script(ACQUIRE_SCRIPT)
+        self.release_slot = self.redis.register_script(RELEASE_SCRIPT)
+        # Concurrency slots taken by this process, by task name
+        self.held = Counter()
+        self._lock = threading.Lock()
+        self._heartbeat = None
+
+    def key(self, *parts):
+        return ':'.join((self.prefix,) + parts)
+
+    @property
+    def processing_key(self):
+        return self.key('processing', self.worker_id)
+
+    def enqueue(self, job):
+        if job.dedup_key and not self.redis.set(
+            self.key('dedup', job.dedup_key), job.id, nx=True, ex=self.dedup_timeout
+        ):
+            return False
+        self.redis.lpush(self.key('queue'), job.encode())
+        return True
+
+    def beat(self):
+        """Mark this worker alive and extend the slots it holds"""
+        pipe = self.redis.pipeline()
+        pipe.set(self.key('worker', self.worker_id), 1, ex=self.heartbeat_timeout)
+        with self._lock:
+            names = [name for name, count in self.held.items() if count > 0]
+        for name in names:
+            pipe.expire(self.key('running', name), self.slot_timeout)
+        pipe.execute()
+
+    def run_heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat_timeout / 3)
+            try:
+                self.beat()
+            except Exception as e:
+                logger.warning('Task worker heartbeat failed: %s', e)
+
+    def start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(
+                target=self.run_heartbeat, name='task-heartbeat', daemon=True
+            )
+        self.beat()
+        self._heartbeat.start()
+
+    def reserve(self, timeout=5):
+        self.start_heartbeat()
+        self.promote(keys=[self.key('delayed'), self.key('queue')], args=[time.time()])
+        if timeout:
+            raw = self.redis.brpoplpush(self.key('queue'), self.processing_key, timeout)
+        else:
+            raw = self.redis.rpoplpush(self.key('queue'), self.processing_key)
+        if raw is None:
+            return None
+        job = Job.decode(raw)
+        job._raw = raw
+        if job.dedup_key:
+            # Later enqueues should run again: they may see newer data
+            self.redis.delete(self.key('dedup', job.dedup_key))
+        return job
+
+    def complete(self, job):
+        self.redis.lrem(self.processing_key, 1, job._raw)
+
+    def retry(self, job, delay):
+        self.redis.zadd(self.key('delayed'), {job.encode(): time.time() + delay})
+
+    def fail(self, job, error):
+        entry = json.dumps({'job': json.loads(job.encode()), 'error': error, 'failed_at': time.time()})
+        pipe = self.redis.pipeline()
+        pipe.lpush(self.key('failed'), entry)
+        pipe.ltrim(self.key('failed'), 0, self.max_failed - 1)
+        pipe.execute()
+
+    def acquire(self, name, limit):
+        acquired = bool(self.acquire_slot(
+            keys=[self.key('running', name)], args=[limit, self.slot_timeout]
+        ))
+        if acquired:
+            with self._lock:
+                self.held[name] += 1
+        return acquired
+
+    def release(self, name):
+        with self._lock:
+            self.held[name] -= 1
+        self.release_slot(keys=[self.key('running', name)])
+
+    def recover(self):
+        """Requeue jobs left in processing lists by workers that died"""
+        recovered = 0
+        for key in self.redis.scan_iter(self.key('processing', '*')):
+            worker_id = key.decode().split(':processing:', 1)[1]
+            if self.redis.exists(self.key('worker', worker_id)):
+                continue
+            while self.redis.rpoplpush(key, self.key('queue')) is not None:
+                recovered += 1
+        return recovered
+
+    def stats(self):
+        return {
+            'queued': self.redis.llen(self.key('queue')),
+            'delayed': self.redis.zcard(self.key('delayed')),
+            'failed': self.redis.llen(self.key('failed')),
+        }
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                conf = getattr(settings, 'TASK_QUEUE', {})
+                backend_class = import_string(conf.get('BACKEND', 'utils.tasks.RedisBackend'))
+                _backend = backend_class(**conf.get('OPTIONS', {}))
+    return _backend
+
+
+def reset_backend():
+    global _backend
+    _backend = None
+
+
+class Worker:
+    """Pull jobs from a backend and run them until stopped"""
+
+    def __init__(self, backend=None, poll_timeout=5):
+        self.backend = backend or get_backend()
+        self.poll_timeout = poll_timeout
+        self.stopped = threading.Event()
+        self.processed = 0
+
+    def run(self, burst=False):
+        autodiscover_modules('tasks')
+        while not self.stopped.is_set():
+            job = self.backend.reserve(timeout=0 if burst else self.poll_timeout)
+            if job is None:
+                if burst:
+                    return self.processed
+                continue
+            close_old_connections()
+            try:
+                execute(job, self.backend)
+            finally:
+                self.backend.complete(job)
+                close_old_connections()
+            self.processed += 1
+        return self.processed
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,188 @@
+import datetime
+import threading
+import time
+import uuid
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from .renderers import FastJSONRenderer, orjson
+from .tasks import Job, RedisBackend, Worker, execute, task
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+calls = []
+
+
+@task(name='utils.tests.record', max_retries=0)
+def record(value):
+    calls.append(value)
+
+
+@task(name='utils.tests.flaky', max_retries=2, retry_delay=10)
+def flaky():
+    raise ValueError('boom')
+
+
+@task(name='utils.tests.slow', max_retries=0, concurrency=1)
+def slow(seconds):
+    time.sleep(seconds)
+    calls.append('slow')
+
+
+@skipIf(fakeredis is None, 'fakeredis is not installed')
+class RedisBackendTests(SimpleTestCase):
+    """RedisBackend against an in-memory Redis"""
+
+    def setUp(self):
+        calls.clear()
+        self.server = fakeredis.FakeServer()
+
+    def backend(self, worker_id=None, **options):
+        options.setdefault('heartbeat_timeout', 3600)
+        with mock.patch('django_redis.get_redis_connection',
+                        return_value=fakeredis.FakeRedis(server=self.server)):
+            backend = RedisBackend(**options)
+        if worker_id:
+            backend.worker_id = worker_id
+        return backend
+
+    def test_enqueue_reserve_complete(self):
+        backend = self.backend()
+        backend.enqueue(Job(task='utils.tests.record', args=[1]))
+
+        job = backend.reserve(timeout=0)
+        self.assertEqual((job.task, job.args), ('utils.tests.record', [1]))
+        self.assertEqual(backend.redis.llen(backend.processing_key), 1)
+
+        backend.complete(job)
+        self.assertEqual(backend.redis.llen(backend.processing_key), 0)
+        self.assertIsNone(backend.reserve(timeout=0))
+
+    def test_dedup_key_collapses_waiting_jobs(self):
+        backend = self.backend()
+        self.assertTrue(backend.enqueue(Job(task='utils.tests.record', dedup_key='k')))
+        self.assertFalse(backend.enqueue(Job(task='utils.tests.record', dedup_key='k')))
+
+        backend.reserve(timeout=0)
+        # Once picked up, a new enqueue runs again
+        self.assertTrue(backend.enqueue(Job(task='utils.tests.record', dedup_key='k')))
+        self.assertEqual(backend.stats()['queued'], 1)
+
+    def test_failed_job_retries_with_backoff_then_fails(self):
+        backend = self.backend()
+        backend.enqueue(Job(task='utils.tests.flaky'))
+
+        for attempt, delay in ((1, 10), (2, 20)):
+            job = backend.reserve(timeout=0)
+            start = time.time()
+            with self.assertLogs('utils.tasks', 'WARNING'):
+                execute(job, backend)
+            backend.complete(job)
+
+            (raw, due), = backend.redis.zrange(backend.key('delayed'), 0, -1, withscores=True)
+            self.assertEqual(Job.decode(raw).attempts, attempt)
+            self.assertAlmostEqual(due - start, delay, delta=1)
+            # Not due yet
+            self.assertIsNone(backend.reserve(timeout=0))
+            backend.redis.zadd(backend.key('delayed'), {raw: 0})
+
+        job = backend.reserve(timeout=0)
+        with self.assertLogs('utils.tasks', 'ERROR'):
+            execute(job, backend)
+        self.assertEqual(backend.stats(), {'queued': 0, 'delayed': 0, 'failed': 1})
+
+    def test_recover_requeues_jobs_of_dead_workers_only(self):
+        live = self.backend(worker_id='live:1')
+        dead = self.backend(worker_id='dead:1')
+        for value in (1, 2):
+            live.enqueue(Job(task='utils.tests.record', args=[value]))
+        live.reserve(timeout=0)
+        dead.reserve(timeout=0)
+        dead.redis.delete(dead.key('worker', 'dead:1'))
+
+        self.assertEqual(live.recover(), 1)
+        self.assertEqual(live.redis.llen(live.processing_key), 1)
+        self.assertEqual(live.redis.llen(dead.processing_key), 0)
+        self.assertEqual(live.stats()['queued'], 1)
+
+    def test_long_job_is_not_recovered_while_running(self):
+        worker_backend = self.backend(worker_id='busy:1', heartbeat_timeout=1)
+        other = self.backend(worker_id='other:1')
+        worker_backend.enqueue(Job(task='utils.tests.slow', args=[2]))
+
+        worker = Worker(worker_backend)
+        thread = threading.Thread(target=worker.run, kwargs={'burst': True})
+        thread.start()
+        # Well past the heartbeat timeout, while the job still runs
+        time.sleep(1.5)
+        self.assertEqual(other.recover(), 0)
+        thread.join()
+
+        self.assertEqual(calls, ['slow'])
+        self.assertEqual(other.stats()['queued'], 0)
+
+    def test_concurrency_slots(self):
+        backend = self.backend()
+        self.assertTrue(backend.acquire('utils.tests.slow', 1))
+        self.assertFalse(backend.acquire('utils.tests.slow', 1))
+        backend.release('utils.tests.slow')
+        self.assertTrue(backend.acquire('utils.tests.slow', 1))
+
+    def test_release_never_goes_negative(self):
+        backend = self.backend()
+        key = backend.key('running', 'utils.tests.slow')
+        backend.acquire('utils.tests.slow', 2)
+        # The slot key expired while the job ran
+        backend.redis.delete(key)
+        backend.release('utils.tests.slow')
+
+        self.assertIn(backend.redis.get(key), (None, b'0'))
+        self.assertTrue(backend.acquire('utils.tests.slow', 2))
+        self.assertTrue(backend.acquire('utils.tests.slow', 2))
+        self.assertFalse(backend.acquire('utils.tests.slow', 2))
+
+    def test_heartbeat_extends_held_slots(self):
+        backend = self.backend(slot_timeout=300)
+        key = backend.key('running', 'utils.tests.slow')
+        backend.acquire('utils.tests.slow', 1)
+        backend.redis.expire(key, 5)
+
+        backend.beat()
+        self.assertGreater(backend.redis.ttl(key), 5)
+
+        backend.release('utils.tests.slow')
+        backend.redis.expire(key, 5)
+        backend.beat()
+        self.assertLessEqual(backend.redis.ttl(key), 5)
+
+
+@skipIf(orjson is None, 'orjson is not installed')
+class FastJSONRendererTests(SimpleTestCase):
+    """FastJSONRenderer output is byte for byte what JSONRenderer writes"""
+
+    def test_matches_json_renderer(self):
+        moment = datetime.datetime(2024, 5, 17, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc)
+        data = {
+            'created_at': moment,
+            'whole_second': moment.replace(microsecond=0),
+            'naive': moment.replace(tzinfo=None),
+            'local': timezone.localtime(moment, datetime.timezone(datetime.timedelta(hours=2))),
+            'date': moment.date(),
+            'time': moment.time(),
+            'duration': datetime.timedelta(minutes=5),
+            'id': uuid.UUID(int=7),
+            'amount': Decimal('1.50'),
+            'label': gettext_lazy('Unknown user'),
+            'text': 'caf\u00e9 \u2603',
+            'channels': {1: 2, 3: [None, True, 1.5]},
+            'rows': [{'last_read_at': moment}, {'last_read_at': None}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
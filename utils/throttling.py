@@ -1,56 +1,179 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
 from rest_framework.throttling import SimpleRateThrottle
 from django.core.cache import cache
 
-class UserRateThrottle(SimpleRateThrottle):
+logger = logging.getLogger(__name__)
+
+
+# Atomic sliding window on a sorted set: trim expired entries, count, and
+# either record the request or report how long until the oldest one expires.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+if redis.call('ZCARD', key) < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window)
+    return 0
+end
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return math.max(1, tonumber(oldest[2]) + window - now)
+"""
+
+
+class LocalTokenBucket:
+    """In-process token bucket used to reject floods before touching Redis"""
+
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, duration):
+        """Take a token for key; return 0 if allowed, else seconds to wait"""
+        rate = capacity / duration
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                wait = 0
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+local_buckets = LocalTokenBucket()
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Drop-in replacement for SimpleRateThrottle.
+
+    Each check is a single atomic Lua call against a Redis sorted set, so
+    concurrent requests cannot race past the limit. A per-process token
+    bucket rejects obvious floods without a network round trip. Falls back
+    to the stock cache-based history when the cache is not django-redis.
+    """
+
+    script = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        client = self.get_redis_client()
+        if client is None:
+            return super().allow_request(request, view)
+
+        self._wait = local_buckets.consume(
+            self.key, self.num_requests, self.duration
+        )
+        if self._wait:
+            return False
+
+        now_ms = int(self.timer() * 1000)
+        try:
+            wait_ms = self.get_script(client)(
+                keys=[cache.make_key(self.key)],
+                args=[now_ms, self.duration * 1000, self.num_requests,
+                      f"{now_ms}-{uuid.uuid4().hex}"],
+            )
+        except Exception as e:
+            # Fail open: an unavailable Redis must not take the API down
+            logger.warning('Throttle check failed for %s: %s', self.key, e)
+            return True
+
+        self._wait = int(wait_ms) / 1000
+        return not self._wait
+
+    def wait(self):
+        if hasattr(self, '_wait'):
+            return self._wait or None
+        return super().wait()
+
+    def get_redis_client(self):
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            return None
+
+    @classmethod
+    def get_script(cls, client):
+        if cls.script is None:
+            SlidingWindowRateThrottle.script = client.register_script(
+                SLIDING_WINDOW_SCRIPT
+            )
+        return cls.script
+
+
+class UserRateThrottle(SlidingWindowRateThrottle):
     scope = 'user'
-    
+
     def get_cache_key(self, request, view):
         if request.user.is_authenticated:
             ident = request.user.pk
         else:
             ident = self.get_ident(request)
-        
+
         return self.cache_format % {
             'scope': self.scope,
             'ident': ident
         }
 
 
-class AnonRateThrottle(SimpleRateThrottle):
+class AnonRateThrottle(SlidingWindowRateThrottle):
     scope = 'anon'
-    
+
     def get_cache_key(self, request, view):
         if request.user.is_authenticated:
             return None
-        
+
         return self.cache_format % {
             'scope': self.scope,
             'ident': self.get_ident(request)
         }
 
 
-class MessageRateThrottle(SimpleRateThrottle):
+class MessageRateThrottle(SlidingWindowRateThrottle):
     scope = 'messages'
     rate = '60/min'
-    
+
     def get_cache_key(self, request, view):
         if request.user.is_authenticated:
             ident = request.user.pk
         else:
             ident = self.get_ident(request)
-        
+
         return self.cache_format % {
             'scope': self.scope,
             'ident': ident
         }
 
 
-class RegistrationRateThrottle(SimpleRateThrottle):
+class RegistrationRateThrottle(SlidingWindowRateThrottle):
     scope = 'registration'
     rate = '5/hour'
-    
+
     def get_cache_key(self, request, view):
         return self.cache_format % {
             'scope': self.scope,
             'ident': self.get_ident(request)
-        }
\ No newline at end of file
+        }
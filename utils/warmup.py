@@ -0,0 +1,109 @@
+"""
+Warm-up run by each worker before it accepts traffic.
+
+A fresh worker otherwise pays on its first requests for importing views
+and serializers, populating the URL resolver, building serializer fields
+(model introspection) and opening database and Redis connections.
+warm_up() does that work at boot; config/wsgi.py and config/asgi.py call
+it when WARMUP_ON_STARTUP is set, so a worker only takes requests once it
+has finished.
+
+It has to run in the worker process itself: connections opened before a
+fork would be shared by every child. (With gunicorn --preload, call it
+from a post_fork hook instead.) Failures are logged and never stop the
+worker from starting.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+from django.utils.module_loading import autodiscover_modules
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+
+def project_serializers():
+    """Every serializer class defined in this project's apps"""
+    local = {
+        app.name for app in apps.get_app_configs()
+        if Path(app.path).is_relative_to(settings.BASE_DIR)
+    }
+    seen = set()
+    pending = [serializers.BaseSerializer]
+    while pending:
+        cls = pending.pop()
+        if cls in seen:
+            continue
+        seen.add(cls)
+        pending.extend(cls.__subclasses__())
+        if cls.__module__.split('.')[0] in local:
+            yield cls
+
+
+def warm_modules():
+    # Modules apps otherwise import lazily on first use
+    autodiscover_modules('serializers', 'views', 'tasks')
+
+
+def warm_urls():
+    resolver = get_resolver()
+    # Builds the reverse lookup tables for every namespace
+    resolver.reverse_dict
+
+
+def warm_serializers():
+    # Building fields introspects the model and fills Django's _meta caches
+    warmed = 0
+    for serializer_class in project_serializers():
+        try:
+            serializer_class().fields
+            warmed += 1
+        except Exception as e:
+            logger.debug('Could not warm %s: %s', serializer_class.__name__, e)
+    return warmed
+
+
+def warm_connections():
+    for alias in connections:
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+        except Exception as e:
+            logger.warning('Warm-up could not connect to database %s: %s', alias, e)
+
+    from django.core.cache import cache
+    cache.get('warmup')
+
+    # Loads the revoked-token filter before the first authenticated request
+    from accounts.revocation import get_filter
+    get_filter()
+
+
+STEPS = (
+    ('modules', warm_modules),
+    ('urls', warm_urls),
+    ('serializers', warm_serializers),
+    ('connections', warm_connections),
+)
+
+
+def warm_up(steps=None):
+    """Run the warm-up steps (all by default); returns {step: milliseconds}"""
+    timings = {}
+    for name, step in STEPS:
+        if steps is not None and name not in steps:
+            continue
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning('Warm-up step %s failed: %s', name, e)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info('Worker warm-up: %s', ', '.join(f'{k}={v}ms' for k, v in timings.items()))
+    return timings
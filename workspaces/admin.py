@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Workspace, WorkspaceMember, Channel, ChannelMember
+from .models import Workspace, WorkspaceMember, Channel, ChannelMember, DeletionJob, ExportJob
 
 @admin.register(Workspace)
 class WorkspaceAdmin(admin.ModelAdmin):
@@ -11,5 +11,17 @@ class ChannelAdmin(admin.ModelAdmin):
     list_display = ['name', 'workspace', 'channel_type', 'created_by']
     prepopulated_fields = {'slug': ('name',)}
 
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'name', 'status', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+    readonly_fields = ['progress', 'files', 'error']
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'size', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['progress', 'checkpoint', 'archive', 'error']
+
 admin.site.register(WorkspaceMember)
 admin.site.register(ChannelMember)
\ No newline at end of file
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class WorkspacesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "workspaces"
+
+    def ready(self):
+        from events.outbox import events_recorded
+        from .sidebar import invalidate_for_events
+        events_recorded.connect(invalidate_for_events, dispatch_uid='workspaces.sidebar')
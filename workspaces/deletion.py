@@ -0,0 +1,124 @@
+"""
+Asynchronous, resumable deletion of workspaces and channels.
+
+Deleting a workspace through the ORM makes Django's collector load every
+channel, membership, message, reaction and attachment before issuing a
+single DELETE. Instead, start_deletion() only stamps deleting_at (which
+hides the row from the API) and records a DeletionJob; run_deletion() then
+purges the contents in fixed-size chunks, in dependency order:
+
+    channel memberships -> notifications -> messages (with their reactions,
+    attachments and mentions) -> channel row, for each channel;
+    workspace memberships -> workspace row; then attachment files.
+
+Each chunk commits together with the job's progress counters, so an
+interrupted job simply picks up where it stopped when run again. Storage
+blobs are deleted only after every row referring to them is gone.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from events.outbox import emit_to_users
+from messaging.models import Message
+from messaging.purge import delete_files, purge_messages, raw_delete
+from notifications.models import Notification
+from .models import Workspace, WorkspaceMember, Channel, ChannelMember, DeletionJob
+
+CHUNK_SIZE = 1000
+
+
+def start_deletion(instance, user):
+    """Hide a workspace or channel now and queue the purge of its contents"""
+    from .tasks import run_deletion_job
+
+    kind = 'workspace' if isinstance(instance, Workspace) else 'channel'
+    with transaction.atomic():
+        instance.deleting_at = timezone.now()
+        instance.save(update_fields=['deleting_at'])
+        job = DeletionJob.objects.create(
+            kind=kind,
+            object_id=instance.id,
+            name=instance.name,
+            requested_by=user
+        )
+        # Members lose access to the stream, so tell each directly
+        emit_to_users(
+            instance.members.values_list('id', flat=True),
+            f'{kind}.deleted', {'id': instance.id}
+        )
+    run_deletion_job.delay_on_commit(job.id, dedup_key=f'deletion:{job.id}')
+    return job
+
+
+def purge_chunk(job, label, queryset, chunk_size, purge=None):
+    """
+    Delete the next chunk of queryset; returns False once nothing is left.
+
+    The chunk and the job's progress commit together, with the job row
+    locked so two workers never run the same job at once.
+    """
+    with transaction.atomic():
+        job = DeletionJob.objects.select_for_update().get(pk=job.pk)
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return False
+        if purge is not None:
+            deleted = purge(ids, job.files)
+        else:
+            deleted = raw_delete(queryset.model, 'id', ids)
+        job.progress[label] = job.progress.get(label, 0) + deleted
+        job.save(update_fields=['progress', 'files', 'updated_at'])
+    return True
+
+
+def purge_channel(job, channel_id, chunk_size):
+    steps = (
+        ('channel_members', ChannelMember.objects.filter(channel_id=channel_id), None),
+        ('notifications', Notification.objects.filter(channel_id=channel_id), None),
+        ('messages', Message.all_objects.filter(channel_id=channel_id), purge_messages),
+        ('channels', Channel.objects.filter(pk=channel_id), None),
+    )
+    run_steps(job, steps, chunk_size)
+
+
+def run_steps(job, steps, chunk_size):
+    for label, queryset, purge in steps:
+        while purge_chunk(job, label, queryset, chunk_size, purge):
+            pass
+
+
+def purge_files(job, chunk_size):
+    while True:
+        with transaction.atomic():
+            job = DeletionJob.objects.select_for_update().get(pk=job.pk)
+            if not job.files:
+                return
+            chunk, job.files = job.files[:chunk_size], job.files[chunk_size:]
+            job.progress['files'] = job.progress.get('files', 0) + len(chunk)
+            job.save(update_fields=['progress', 'files', 'updated_at'])
+            transaction.on_commit(lambda: delete_files(chunk))
+
+
+def run_deletion(job, chunk_size=CHUNK_SIZE):
+    """Purge everything a DeletionJob covers; safe to re-run after a failure"""
+    DeletionJob.objects.filter(pk=job.pk).update(status='running', error='')
+    try:
+        if job.kind == 'channel':
+            purge_channel(job, job.object_id, chunk_size)
+        else:
+            channel_ids = (
+                Channel.objects.filter(workspace_id=job.object_id)
+                .order_by('pk').values_list('pk', flat=True)
+            )
+            for channel_id in list(channel_ids):
+                purge_channel(job, channel_id, chunk_size)
+            run_steps(job, (
+                ('workspace_members', WorkspaceMember.objects.filter(workspace_id=job.object_id), None),
+                ('workspaces', Workspace.objects.filter(pk=job.object_id), None),
+            ), chunk_size)
+        purge_files(job, chunk_size)
+    except Exception as e:
+        DeletionJob.objects.filter(pk=job.pk).update(status='failed', error=repr(e))
+        raise
+    DeletionJob.objects.filter(pk=job.pk).update(status='done', finished_at=timezone.now())
@@ -0,0 +1,288 @@
+"""
+Streaming, resumable export of a workspace's history.
+
+The archive is a zip with one JSON Lines file per section:
+
+    workspace, members, channels, channel_members, messages,
+    direct_messages (the requester's own DMs with other members),
+    reactions and attachments (a manifest of the files, not their contents)
+
+plus manifest.json with the row count of each section. Only public
+channels and the private channels the requester belongs to are exported;
+being an owner or admin does not make other private channels readable.
+
+Rows are read in primary-key order, BATCH_SIZE at a time, through
+iterator(), so memory stays flat however large the workspace is (also
+behind PgBouncer, where server-side cursors are disabled). Each batch is
+appended to EXPORT_ROOT/<job id>/<section>.jsonl and the job's checkpoint
+(section, last pk, file length) is saved after it. Running a job again
+truncates the file to the checkpointed length and continues after the last
+pk. Once every section is written the files are deflated into the zip,
+which is saved under a random name to the private 'exports' storage
+(STORAGES['exports'], outside MEDIA_ROOT; never default_storage, whose
+files are public) and downloaded in blocks through a StreamingHttpResponse
+from the download endpoint only.
+
+A run holds the job as a lease: updated_at is renewed with every
+checkpoint, under select_for_update as in deletion.purge_chunk, and another
+run only takes the job over once it is LEASE_SECONDS old. A run that finds
+its lease taken stops without touching the files again.
+"""
+
+import json
+import logging
+import os
+import shutil
+import uuid
+import zipfile
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from events.outbox import emit_to_users
+from messaging.models import Message, DirectMessage, Reaction, Attachment
+from .models import Workspace, WorkspaceMember, Channel, ChannelMember, ExportJob
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+BLOCK_SIZE = 64 * 1024
+LEASE_SECONDS = 600
+
+ARCHIVE = 'archive'
+
+
+class ExportBusy(Exception):
+    """Another run holds the job's lease; the task retries later"""
+
+
+class ExportSuperseded(Exception):
+    """Another run took the job over after this one's lease lapsed"""
+
+
+def export_root():
+    return Path(getattr(settings, 'EXPORT_ROOT', settings.BASE_DIR / 'exports'))
+
+
+def archive_storage():
+    """Where finished archives are kept; never publicly served"""
+    return storages['exports']
+
+
+def work_dir(job):
+    return export_root() / str(job.id)
+
+
+def sections(job):
+    """[(name, values() queryset)] in the order they are written"""
+    workspace_id = job.workspace_id
+    channels = Channel.objects.filter(workspace_id=workspace_id, deleting_at__isnull=True).filter(
+        Q(channel_type='public') |
+        Q(id__in=ChannelMember.objects.filter(user_id=job.requested_by_id).values('channel_id'))
+    )
+    messages = Message.objects.filter(channel__in=channels)
+    member_ids = WorkspaceMember.objects.filter(workspace_id=workspace_id).values('user_id')
+    # Other members' DMs are private, so only the requester's own are included
+    direct_messages = DirectMessage.objects.filter(
+        Q(sender_id=job.requested_by_id, recipient_id__in=member_ids) |
+        Q(recipient_id=job.requested_by_id, sender_id__in=member_ids)
+    )
+    attached_to = (
+        Q(message_id__in=messages.values('id')) |
+        Q(direct_message_id__in=direct_messages.values('id'))
+    )
+    return [
+        ('workspace', Workspace.objects.filter(pk=workspace_id).values(
+            'id', 'name', 'slug', 'description', 'owner_id', 'created_at', 'updated_at'
+        )),
+        ('members', WorkspaceMember.objects.filter(workspace_id=workspace_id).values(
+            'id', 'user_id', 'role', 'joined_at', username=F('user__username')
+        )),
+        ('channels', channels.values(
+            'id', 'name', 'slug', 'description', 'channel_type', 'created_by_id',
+            'created_at', 'updated_at'
+        )),
+        ('channel_members', ChannelMember.objects.filter(channel__in=channels).values(
+            'id', 'channel_id', 'user_id', 'joined_at', 'last_read_at'
+        )),
+        ('messages', messages.values(
+            'id', 'channel_id', 'sender_id', 'parent_id', 'content', 'edited', 'pinned',
+            'created_at', 'updated_at'
+        )),
+        ('direct_messages', direct_messages.values(
+            'id', 'sender_id', 'recipient_id', 'content', 'read', 'read_at',
+            'created_at', 'updated_at'
+        )),
+        ('reactions', Reaction.objects.filter(attached_to).values(
+            'id', 'message_id', 'direct_message_id', 'user_id', 'emoji', 'created_at'
+        )),
+        ('attachments', Attachment.objects.filter(attached_to).values(
+            'id', 'message_id', 'direct_message_id', 'file', 'filename', 'file_type',
+            'file_size', 'uploaded_by_id', 'created_at'
+        )),
+    ]
+
+
+def encode(row):
+    return json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def claim(job):
+    """Mark the job running unless another run's lease is still live; returns it fresh"""
+    with transaction.atomic():
+        job = ExportJob.objects.select_for_update().get(pk=job.pk)
+        if job.status == 'done':
+            return None
+        if job.status == 'running' and job.updated_at > timezone.now() - timedelta(seconds=LEASE_SECONDS):
+            raise ExportBusy(f'Export {job.pk} is already running')
+        job.status = 'running'
+        job.error = ''
+        job.save(update_fields=['status', 'error', 'updated_at'])
+    return job
+
+
+@contextmanager
+def lease(job):
+    """
+    Run the block with the job row locked, then save progress and renew the lease.
+
+    Raises ExportSuperseded, before the block runs, if another run has
+    renewed the job since this one last did.
+    """
+    with transaction.atomic():
+        current = ExportJob.objects.select_for_update().values_list('updated_at', flat=True).get(pk=job.pk)
+        if current != job.updated_at:
+            raise ExportSuperseded(f'Export {job.pk} was taken over by another run')
+        yield
+        job.updated_at = timezone.now()
+        ExportJob.objects.filter(pk=job.pk).update(
+            progress=job.progress, checkpoint=job.checkpoint, updated_at=job.updated_at
+        )
+
+
+def save_checkpoint(job, checkpoint):
+    with lease(job):
+        job.checkpoint = checkpoint
+
+
+def export_section(job, name, queryset, batch_size):
+    """Append the rest of one section to its file, a batch per checkpoint"""
+    last_pk = job.checkpoint.get('last_pk', 0)
+    offset = job.checkpoint.get('offset', 0)
+    path = work_dir(job) / f'{name}.jsonl'
+    path.touch()
+    with open(path, 'r+b') as f:
+        while True:
+            batch = queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size]
+            count = 0
+            # Written under the lease, so a run that lost it never writes
+            with lease(job):
+                # Drop whatever a crashed run wrote after the last checkpoint
+                f.truncate(offset)
+                f.seek(offset)
+                for row in batch.iterator(chunk_size=batch_size):
+                    f.write(encode(row).encode())
+                    last_pk = row['id']
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+                offset = f.tell()
+                job.progress[name] = job.progress.get(name, 0) + count
+                job.checkpoint = {'section': name, 'last_pk': last_pk, 'offset': offset}
+            if count < batch_size:
+                return
+
+
+def build_archive(job, names):
+    """Deflate the section files into a zip in the work directory; returns its path"""
+    directory = work_dir(job)
+    # Per run, so a run that lost its lease cannot write into another's zip
+    path = directory / f'{job.id}-{uuid.uuid4().hex}.zip'
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        zf.writestr('manifest.json', json.dumps({
+            'workspace': job.workspace_id,
+            'name': job.name,
+            'exported_at': timezone.now(),
+            'counts': {name: job.progress.get(name, 0) for name in names},
+        }, cls=DjangoJSONEncoder, indent=2))
+        for name in names:
+            # Written block by block, never read into memory whole
+            zf.write(directory / f'{name}.jsonl', arcname=f'{name}.jsonl')
+            save_checkpoint(job, job.checkpoint)
+    return path
+
+
+def start_export(workspace, user):
+    """Record an ExportJob for workspace and queue it"""
+    from .tasks import run_export_job
+
+    job = ExportJob.objects.create(
+        workspace_id=workspace.id,
+        name=workspace.name,
+        requested_by=user
+    )
+    run_export_job.delay_on_commit(job.id, dedup_key=f'export:{job.id}')
+    return job
+
+
+def run_export(job, batch_size=BATCH_SIZE):
+    """
+    Write everything an ExportJob covers; safe to re-run after a failure.
+
+    Raises ExportBusy while another run holds the job.
+    """
+    job = claim(job)
+    if job is None:
+        return
+    steps = sections(job)
+    names = [name for name, _ in steps]
+    try:
+        work_dir(job).mkdir(parents=True, exist_ok=True)
+        current = job.checkpoint.get('section', names[0])
+        if current != ARCHIVE:
+            for name, queryset in steps[names.index(current):]:
+                if job.checkpoint.get('section') != name:
+                    save_checkpoint(job, {'section': name, 'last_pk': 0, 'offset': 0})
+                export_section(job, name, queryset, batch_size)
+            save_checkpoint(job, {'section': ARCHIVE})
+        path = build_archive(job, names)
+        with open(path, 'rb') as f:
+            # Unguessable, so the name alone never leads to the file
+            archive = archive_storage().save(f'{uuid.uuid4().hex}.zip', File(f))
+        try:
+            with lease(job):
+                ExportJob.objects.filter(pk=job.pk).update(
+                    status='done', archive=archive, size=path.stat().st_size,
+                    finished_at=timezone.now()
+                )
+                if job.requested_by_id:
+                    emit_to_users([job.requested_by_id], 'export.finished', {'id': job.id})
+        except Exception:
+            # Not recorded on the job, so nothing would ever serve or remove it
+            archive_storage().delete(archive)
+            raise
+    except ExportSuperseded as e:
+        logger.warning('%s; stopping', e)
+        return
+    except Exception as e:
+        # Only while still holding the lease, so a newer run is not marked failed
+        ExportJob.objects.filter(pk=job.pk, updated_at=job.updated_at).update(
+            status='failed', error=repr(e)
+        )
+        raise
+    shutil.rmtree(work_dir(job), ignore_errors=True)
+
+
+def stream_archive(job, block_size=BLOCK_SIZE):
+    """The finished archive in blocks, for a StreamingHttpResponse"""
+    with archive_storage().open(job.archive, 'rb') as f:
+        while block := f.read(block_size):
+            yield block
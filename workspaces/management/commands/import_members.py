@@ -0,0 +1,74 @@
+import csv
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from workspaces.models import Workspace, Channel
+from workspaces.provisioning import add_workspace_members, add_channel_members, summarize
+
+
+class Command(BaseCommand):
+    help = 'Bulk-add workspace (or channel) members from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('workspace', help='Workspace slug or id')
+        parser.add_argument('path', help="CSV (user_id,email,role columns) or JSONL file; '-' for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Defaults to the file extension')
+        parser.add_argument('--channel', help='Add to this channel (slug) instead of the workspace')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        lookup = {'id': options['workspace']} if options['workspace'].isdigit() else {'slug': options['workspace']}
+        workspace = Workspace.objects.filter(deleting_at__isnull=True, **lookup).first()
+        if workspace is None:
+            raise CommandError(f"Workspace {options['workspace']} not found")
+        channel = None
+        if options['channel']:
+            channel = Channel.objects.filter(workspace=workspace, slug=options['channel']).first()
+            if channel is None:
+                raise CommandError(f"Channel {options['channel']} not found")
+
+        fmt = options['format'] or ('jsonl' if options['path'].endswith(('.jsonl', '.json')) else 'csv')
+        totals = {'added': 0, 'exists': 0, 'error': 0}
+        offset = 0
+        for batch in self.batches(options['path'], fmt, options['batch_size']):
+            if channel is not None:
+                results = add_channel_members(channel, batch)
+            else:
+                results = add_workspace_members(workspace, batch)
+            for result in results:
+                if result['status'] == 'error':
+                    self.stderr.write(f"Row {offset + result['row'] + 1}: {result['error']}")
+            for status, count in summarize(results).items():
+                totals[status] += count
+            offset += len(batch)
+            self.stdout.write(f'{offset} rows processed')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Added {totals['added']}, already members {totals['exists']}, errors {totals['error']}"
+        ))
+
+    @staticmethod
+    def batches(path, fmt, size):
+        handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            if fmt == 'csv':
+                rows = (
+                    {key: value for key, value in row.items() if value}
+                    for row in csv.DictReader(handle)
+                )
+            else:
+                rows = (json.loads(line) for line in handle if line.strip())
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
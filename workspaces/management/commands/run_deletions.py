@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from workspaces.deletion import CHUNK_SIZE, run_deletion
+from workspaces.models import DeletionJob
+from workspaces.tasks import run_deletion_job
+
+
+class Command(BaseCommand):
+    help = 'Resume unfinished workspace and channel deletions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enqueue', action='store_true',
+                            help='Queue the jobs for task workers instead of running them here')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        jobs = DeletionJob.objects.exclude(status='done').order_by('created_at')
+        for job in jobs:
+            if options['enqueue']:
+                run_deletion_job.delay(job.id, dedup_key=f'deletion:{job.id}')
+                self.stdout.write(f'Queued deletion of {job.kind} {job.name}')
+                continue
+            self.stdout.write(f'Deleting {job.kind} {job.name}...')
+            run_deletion(job, chunk_size=options['chunk_size'])
+            job.refresh_from_db()
+            self.stdout.write(self.style.SUCCESS(f'  {job.status}: {job.progress}'))
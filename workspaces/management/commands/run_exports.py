@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from workspaces.export import BATCH_SIZE, ExportBusy, run_export
+from workspaces.models import ExportJob
+from workspaces.tasks import run_export_job
+
+
+class Command(BaseCommand):
+    help = 'Resume unfinished workspace exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enqueue', action='store_true',
+                            help='Queue the jobs for task workers instead of running them here')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        jobs = ExportJob.objects.exclude(status='done').order_by('created_at')
+        for job in jobs:
+            if options['enqueue']:
+                run_export_job.delay(job.id, dedup_key=f'export:{job.id}')
+                self.stdout.write(f'Queued export of {job.name}')
+                continue
+            self.stdout.write(f'Exporting {job.name}...')
+            try:
+                run_export(job, batch_size=options['batch_size'])
+            except ExportBusy:
+                self.stdout.write('  already running elsewhere, skipped')
+                continue
+            job.refresh_from_db()
+            self.stdout.write(self.style.SUCCESS(f'  {job.status}: {job.progress} ({job.size} bytes)'))
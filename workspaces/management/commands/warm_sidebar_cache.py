@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from workspaces.sidebar import warm
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Prefill the workspace and channel sidebar caches for recently active users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24,
+                            help='Users seen within this many hours')
+        parser.add_argument('--limit', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours'])
+        users = (
+            User.objects.filter(is_active=True, last_seen__gte=since)
+            .order_by('-last_seen')[:options['limit']]
+        )
+        warmed = 0
+        for user in users.iterator():
+            warm(user)
+            warmed += 1
+        self.stdout.write(self.style.SUCCESS(f'Warmed sidebars for {warmed} users'))
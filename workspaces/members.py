@@ -0,0 +1,99 @@
+"""
+Cursor-paginated, cached member listings.
+
+    GET /api/workspaces/<id>/members/?role=&q=&limit=&cursor=
+    GET /api/channels/<id>/members/?q=&limit=&cursor=
+
+Pages are ordered newest member first on the (scope, joined_at, id)
+indexes. Each rendered page is cached under a per-scope version number;
+adding, removing or changing the role of a member (or a channel member's
+last_read_at) bumps the version, which orphans every cached page for that
+workspace or channel at once instead of scanning the keyspace for them.
+Pages are keyed by path and query and store only the cursors, so the
+next/previous links are built for each request's own host.
+"""
+
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from utils.cache import CacheKeys, bump_version, generate_cache_key, namespace_version
+
+MEMBER_PAGE_TIMEOUT = 300
+PREVIEW_SIZE = 10
+
+
+class MemberCursorPagination(CursorPagination):
+    ordering = ('-joined_at', '-id')
+    page_size = 100
+    page_size_query_param = 'limit'
+    max_page_size = 500
+
+
+def filter_members(queryset, params):
+    """Apply ?role= (workspaces only) and ?q= (username, name or email)"""
+    role = params.get('role')
+    if role and hasattr(queryset.model, 'role'):
+        queryset = queryset.filter(role=role)
+    query = params.get('q', '').strip()
+    if query:
+        queryset = queryset.filter(
+            Q(user__username__icontains=query)
+            | Q(user__first_name__icontains=query)
+            | Q(user__last_name__icontains=query)
+            | Q(user__email__icontains=query)
+        )
+    return queryset
+
+
+def member_version(scope, object_id):
+    return namespace_version(CacheKeys.member_version(scope, object_id))
+
+
+def invalidate_members(scope, object_id):
+    """Orphan the cached member pages of a workspace or channel after commit"""
+    transaction.on_commit(lambda: bump_version(CacheKeys.member_version(scope, object_id)))
+
+
+def link_cursor(link):
+    return parse_qs(urlparse(link).query)['cursor'][0] if link else None
+
+
+def cursor_link(request, cursor):
+    return replace_query_param(request.build_absolute_uri(), 'cursor', cursor) if cursor else None
+
+
+def member_page(view, queryset, serializer_class, scope, object_id):
+    """Render one page of members, reading through the versioned page cache"""
+    request = view.request
+    key = CacheKeys.member_page(
+        scope, object_id, member_version(scope, object_id),
+        generate_cache_key('members', request.get_full_path())
+    )
+    page = cache.get(key)
+    if page is None:
+        paginator = MemberCursorPagination()
+        members = paginator.paginate_queryset(
+            filter_members(queryset, request.query_params), request, view
+        )
+        context = {**view.get_serializer_context(), 'included_users': set()}
+        page = {
+            'next': link_cursor(paginator.get_next_link()),
+            'previous': link_cursor(paginator.get_previous_link()),
+            'results': list(serializer_class(members, many=True, context=context).data),
+            'users': sorted(context['included_users']),
+        }
+        cache.set(key, page, MEMBER_PAGE_TIMEOUT)
+
+    # Side-load the page's users as if they had just been serialized
+    view.get_serializer_context()['included_users'].update(page['users'])
+    return Response({
+        'next': cursor_link(request, page['next']),
+        'previous': cursor_link(request, page['previous']),
+        'results': page['results'],
+    })
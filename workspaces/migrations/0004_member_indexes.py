@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 17:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workspaces", "0003_deletion_job"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="channelmember",
+            index=models.Index(
+                fields=["channel", "-joined_at", "-id"],
+                name="workspaces__channel_601fd0_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="workspacemember",
+            index=models.Index(
+                fields=["workspace", "-joined_at", "-id"],
+                name="workspaces__workspa_eaafde_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="workspacemember",
+            index=models.Index(
+                fields=["workspace", "role", "-joined_at", "-id"],
+                name="workspaces__workspa_e34c4f_idx",
+            ),
+        ),
+    ]
@@ -23,6 +23,8 @@ class Workspace(models.Model):
   through='WorkspaceMember',#instead of manytomany field you use this to store extra info like roles.
   related_name='Workspace'
 )
+  # Set when deletion starts; a DeletionJob purges the contents afterwards
+  deleting_at = models.DateTimeField(null=True, blank=True)
   created_at = models.DateTimeField(auto_now_add=True)
   updated_at = models.DateTimeField(auto_now=True)
 
@@ -51,6 +53,11 @@ class WorkspaceMember(models.Model):
     class Meta:
         unique_together = ['workspace', 'user']
         ordering = ['-joined_at']
+        indexes = [
+            # Member listings are cursor-paginated on joined_at
+            models.Index(fields=['workspace', '-joined_at', '-id']),
+            models.Index(fields=['workspace', 'role', '-joined_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.workspace.name} ({self.role})"
@@ -88,6 +95,7 @@ class Channel(models.Model):
         through='ChannelMember',
         related_name='channels'
     )
+    deleting_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -110,6 +118,95 @@ class ChannelMember(models.Model):
     class Meta:
         unique_together = ['channel', 'user']
         ordering = ['-joined_at']
+        indexes = [
+            models.Index(fields=['channel', '-joined_at', '-id']),
+        ]
     
     def __str__(self):
-        return f"{self.user.email} in {self.channel.name}"
\ No newline at end of file
+        return f"{self.user.email} in {self.channel.name}"
+
+
+class DeletionJob(models.Model):
+    """Background, resumable deletion of a workspace or channel"""
+    
+    KIND_CHOICES = (
+        ('workspace', 'Workspace'),
+        ('channel', 'Channel'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    
+    # Plain ids: the target row is gone once the job finishes
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    name = models.CharField(max_length=100)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='deletion_jobs'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Rows removed so far, keyed by table
+    progress = models.JSONField(default=dict)
+    # Storage paths of purged attachments, deleted once every row is gone
+    files = models.JSONField(default=list)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['kind', 'object_id']),
+        ]
+    
+    def __str__(self):
+        return f"Delete {self.kind} {self.name} ({self.status})"
+
+
+class ExportJob(models.Model):
+    """Background, resumable export of a workspace's history to a zip archive"""
+    
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    
+    # Plain id: the export outlives the workspace if it is deleted later
+    workspace_id = models.BigIntegerField()
+    name = models.CharField(max_length=100)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='export_jobs'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Rows written so far, keyed by section
+    progress = models.JSONField(default=dict)
+    # Where an interrupted export resumes: section, last pk and file offset
+    checkpoint = models.JSONField(default=dict)
+    # Name of the finished archive in the private 'exports' storage
+    archive = models.CharField(max_length=255, blank=True)
+    size = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['workspace_id']),
+        ]
+    
+    def __str__(self):
+        return f"Export {self.name} ({self.status})"
@@ -0,0 +1,207 @@
+"""
+Bulk membership provisioning.
+
+Each row names a user by user_id or email (plus a role for workspaces):
+
+    [{"email": "ada@example.com", "role": "admin"}, {"user_id": 42}, ...]
+
+A batch costs a fixed handful of queries however many rows it has: users
+and existing memberships are looked up once, new rows go in with
+bulk_create, and new workspace members join every public channel in the
+same transaction. Member caches are invalidated once at the end. Results
+come back per row, in input order:
+
+    {"row": 0, "user": 17, "status": "added"}
+    {"row": 1, "user": 42, "status": "exists"}
+    {"row": 2, "status": "error", "error": "Unknown user"}
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from events.outbox import emit_many, channel_stream, workspace_stream, user_stream
+from .members import invalidate_members
+from .models import WorkspaceMember, Channel, ChannelMember
+
+User = get_user_model()
+
+MAX_ROWS = 5000
+BATCH_SIZE = 1000
+ROLES = {role for role, _ in WorkspaceMember.ROLE_CHOICES} - {'owner'}
+
+
+def resolve_users(rows):
+    """Map each row to a user id (or an error message)"""
+    ids = set()
+    emails = set()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        if str(row.get('user_id', '')).isdigit():
+            ids.add(int(row['user_id']))
+        elif row.get('email'):
+            emails.add(str(row['email']).strip().lower())
+
+    by_id = set(User.objects.filter(id__in=ids, is_active=True).values_list('id', flat=True))
+    # Stored emails keep whatever case they were registered with
+    by_email = {
+        email: user_id
+        for user_id, email in User.objects.annotate(email_lower=Lower('email')).filter(
+            email_lower__in=emails, is_active=True
+        ).values_list('id', 'email_lower')
+    } if emails else {}
+
+    resolved = []
+    for row in rows:
+        if not isinstance(row, dict):
+            resolved.append((None, 'Expected an object'))
+        elif str(row.get('user_id', '')).isdigit():
+            user_id = int(row['user_id'])
+            resolved.append((user_id, None) if user_id in by_id else (None, 'Unknown user'))
+        elif row.get('user_id') is not None:
+            resolved.append((None, 'Invalid user_id'))
+        elif row.get('email'):
+            user_id = by_email.get(str(row['email']).strip().lower())
+            resolved.append((user_id, None) if user_id else (None, 'Unknown user'))
+        else:
+            resolved.append((None, 'user_id or email is required'))
+    return resolved
+
+
+def validate_rows(rows, members, allowed=None, check=None):
+    """
+    Per-row results plus the user ids to add.
+
+    members is the membership queryset of the target; allowed, if given,
+    is a membership queryset the user must already be in. check(row) may
+    return an extra error message.
+    """
+    resolved = resolve_users(rows)
+    candidates = {user_id for user_id, _ in resolved if user_id is not None}
+    existing = set(
+        members.filter(user_id__in=candidates).values_list('user_id', flat=True)
+    )
+    if allowed is not None:
+        allowed = set(
+            allowed.filter(user_id__in=candidates).values_list('user_id', flat=True)
+        )
+
+    results = []
+    to_add = {}
+    for index, (row, (user_id, error)) in enumerate(zip(rows, resolved)):
+        if error is None and allowed is not None and user_id not in allowed:
+            error = 'User must be workspace member'
+        if error is None and check is not None:
+            error = check(row)
+        if error is not None:
+            results.append({'row': index, 'status': 'error', 'error': error})
+        elif user_id in existing or user_id in to_add:
+            results.append({'row': index, 'user': user_id, 'status': 'exists'})
+        else:
+            to_add[user_id] = row
+            results.append({'row': index, 'user': user_id, 'status': 'added'})
+    return results, to_add
+
+
+def check_role(row):
+    if row.get('role', 'member') not in ROLES:
+        return f"Invalid role: {row.get('role')}"
+
+
+def add_workspace_members(workspace, rows):
+    """Add members to a workspace and its public channels; returns per-row results"""
+    results, to_add = validate_rows(
+        rows,
+        WorkspaceMember.objects.filter(workspace=workspace),
+        check=check_role
+    )
+    if not to_add:
+        return results
+
+    channel_ids = list(
+        Channel.objects.filter(
+            workspace=workspace, channel_type='public', deleting_at__isnull=True
+        ).values_list('id', flat=True)
+    )
+    with transaction.atomic():
+        WorkspaceMember.objects.bulk_create(
+            [
+                WorkspaceMember(workspace=workspace, user_id=user_id, role=row.get('role', 'member'))
+                for user_id, row in to_add.items()
+            ],
+            ignore_conflicts=True,
+            batch_size=BATCH_SIZE
+        )
+        ChannelMember.objects.bulk_create(
+            [
+                ChannelMember(channel_id=channel_id, user_id=user_id)
+                for channel_id in channel_ids
+                for user_id in to_add
+            ],
+            ignore_conflicts=True,
+            batch_size=BATCH_SIZE
+        )
+
+        events = []
+        for user_id, row in to_add.items():
+            payload = {'workspace': workspace.id, 'user': user_id, 'role': row.get('role', 'member')}
+            events += [
+                (stream, 'workspace.member_added', payload)
+                for stream in (workspace_stream(workspace.id), user_stream(user_id))
+            ]
+            for channel_id in channel_ids:
+                payload = {'channel': channel_id, 'user': user_id}
+                events += [
+                    (stream, 'channel.member_added', payload)
+                    for stream in (channel_stream(channel_id), user_stream(user_id))
+                ]
+        emit_many(events)
+
+        invalidate_members('workspace', workspace.id)
+        for channel_id in channel_ids:
+            invalidate_members('channel', channel_id)
+    return results
+
+
+def add_channel_members(channel, rows):
+    """Add workspace members to a channel; returns per-row results"""
+    results, to_add = validate_rows(
+        rows,
+        ChannelMember.objects.filter(channel=channel),
+        allowed=WorkspaceMember.objects.filter(workspace_id=channel.workspace_id)
+    )
+    if not to_add:
+        return results
+
+    with transaction.atomic():
+        ChannelMember.objects.bulk_create(
+            [ChannelMember(channel=channel, user_id=user_id) for user_id in to_add],
+            ignore_conflicts=True,
+            batch_size=BATCH_SIZE
+        )
+        emit_many([
+            (stream, 'channel.member_added', {'channel': channel.id, 'user': user_id})
+            for user_id in to_add
+            for stream in (channel_stream(channel.id), user_stream(user_id))
+        ])
+        invalidate_members('channel', channel.id)
+    return results
+
+
+def parse_rows(data):
+    """Rows from a request body ({"members": [...]} or {"user_ids": [...]}), or an error"""
+    rows = data.get('members', data.get('user_ids'))
+    if not isinstance(rows, list) or not rows:
+        return None, 'members must be a non-empty list'
+    if len(rows) > MAX_ROWS:
+        return None, f'At most {MAX_ROWS} rows per request'
+    # Bare ids are shorthand for {"user_id": id}
+    return [row if isinstance(row, dict) else {'user_id': row} for row in rows], None
+
+
+def summarize(results):
+    counts = {'added': 0, 'exists': 0, 'error': 0}
+    for result in results:
+        counts[result['status']] += 1
+    return counts
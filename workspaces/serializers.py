@@ -1,12 +1,15 @@
 from rest_framework import serializers
-from .models import Workspace, WorkspaceMember, Channel, ChannelMember
-from accounts.serializers import UserSerializer
+from .models import Workspace, WorkspaceMember, Channel, ChannelMember, DeletionJob, ExportJob
+from accounts.serializers import UserRefField
+from .members import PREVIEW_SIZE
+from utils.instrumentation import TimedSerializerMixin
+from utils.serializers import FastReadSerializerMixin
 
 
-class WorkspaceMemberSerializer(serializers.ModelSerializer):
+class WorkspaceMemberSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
     """Serializer for workspace members"""
     
-    user = UserSerializer(read_only=True)
+    user = UserRefField()
     
     class Meta:
         model = WorkspaceMember
@@ -14,10 +17,10 @@ class WorkspaceMemberSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'joined_at']
 
 
-class WorkspaceSerializer(serializers.ModelSerializer):
+class WorkspaceSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
     """Serializer for workspace"""
     
-    owner = UserSerializer(read_only=True)
+    owner = UserRefField()
     member_count = serializers.SerializerMethodField()
     channel_count = serializers.SerializerMethodField()
     
@@ -30,9 +33,13 @@ class WorkspaceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'owner', 'created_at', 'updated_at']
     
     def get_member_count(self, obj):
+        if hasattr(obj, 'member_total'):
+            return obj.member_total
         return obj.members.count()
     
     def get_channel_count(self, obj):
+        if hasattr(obj, 'channel_total'):
+            return obj.channel_total
         return obj.channels.count()
     
     def create(self, validated_data):
@@ -48,22 +55,23 @@ class WorkspaceSerializer(serializers.ModelSerializer):
 
 
 class WorkspaceDetailSerializer(WorkspaceSerializer):
-    """Detailed workspace serializer with members"""
+    """Detailed workspace serializer with the newest members"""
     
-    members_list = WorkspaceMemberSerializer(
-        source='workspacemember_set',
-        many=True,
-        read_only=True
-    )
+    members_preview = serializers.SerializerMethodField()
     
     class Meta(WorkspaceSerializer.Meta):
-        fields = WorkspaceSerializer.Meta.fields + ['members_list']
+        fields = WorkspaceSerializer.Meta.fields + ['members_preview']
+    
+    def get_members_preview(self, obj):
+        # The full list is paginated at /workspaces/<id>/members/
+        members = obj.workspacemember_set.order_by('-joined_at', '-id')[:PREVIEW_SIZE]
+        return WorkspaceMemberSerializer(members, many=True, context=self.context).data
 
 
-class ChannelMemberSerializer(serializers.ModelSerializer):
+class ChannelMemberSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
     """Serializer for channel members"""
     
-    user = UserSerializer(read_only=True)
+    user = UserRefField()
     
     class Meta:
         model = ChannelMember
@@ -71,10 +79,10 @@ class ChannelMemberSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'joined_at']
 
 
-class ChannelSerializer(serializers.ModelSerializer):
+class ChannelSerializer(TimedSerializerMixin, FastReadSerializerMixin, serializers.ModelSerializer):
     """Serializer for channels"""
     
-    created_by = UserSerializer(read_only=True)
+    created_by = UserRefField()
     member_count = serializers.SerializerMethodField()
     is_member = serializers.SerializerMethodField()
     
@@ -88,6 +96,8 @@ class ChannelSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
     
     def get_member_count(self, obj):
+        if hasattr(obj, 'member_total'):
+            return obj.member_total
         return obj.members.count()
     
     def get_is_member(self, obj):
@@ -105,13 +115,38 @@ class ChannelSerializer(serializers.ModelSerializer):
 
 
 class ChannelDetailSerializer(ChannelSerializer):
-    """Detailed channel serializer with members"""
+    """Detailed channel serializer with the newest members"""
     
-    members_list = ChannelMemberSerializer(
-        source='channelmember_set',
-        many=True,
-        read_only=True
-    )
+    members_preview = serializers.SerializerMethodField()
     
     class Meta(ChannelSerializer.Meta):
-        fields = ChannelSerializer.Meta.fields + ['members_list']
\ No newline at end of file
+        fields = ChannelSerializer.Meta.fields + ['members_preview']
+    
+    def get_members_preview(self, obj):
+        # The full list is paginated at /channels/<id>/members/
+        members = obj.channelmember_set.order_by('-joined_at', '-id')[:PREVIEW_SIZE]
+        return ChannelMemberSerializer(members, many=True, context=self.context).data
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    """Serializer for deletion job progress"""
+    
+    class Meta:
+        model = DeletionJob
+        fields = [
+            'id', 'kind', 'object_id', 'name', 'status', 'progress',
+            'error', 'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Serializer for workspace export progress"""
+    
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'workspace_id', 'name', 'status', 'progress', 'size',
+            'error', 'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
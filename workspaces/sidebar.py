@@ -0,0 +1,168 @@
+"""
+Read-through caches behind the workspace and channel sidebars.
+
+    workspace_ids(user)          workspace_list:<user_id>, the user's workspace ids
+    workspace_row(workspace_id)  workspace_detail:<id>, one serialized workspace
+    channel_list(workspace_id)   channel_list:<id>, serialized rows of every channel
+
+Rows are shared by every member and cached without anything per-user;
+is_member is filled in at read time from the user's channel memberships.
+Entries are dropped when the outbox records an event that changes them
+(see invalidate_for_events), so a rename or join costs one cache delete
+instead of a TTL's worth of staleness.
+"""
+
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from utils.cache import CacheKeys, cached
+from .models import Workspace, WorkspaceMember, Channel, ChannelMember
+from .serializers import WorkspaceSerializer, ChannelSerializer
+
+SIDEBAR_TIMEOUT = 600
+
+
+@cached('workspace_list', timeout=SIDEBAR_TIMEOUT)
+def workspace_ids(user):
+    """The user's workspaces, newest first"""
+    return list(
+        Workspace.objects.filter(members=user, deleting_at__isnull=True)
+        .order_by('-created_at', '-id').values_list('id', flat=True)
+    )
+
+
+def counted(model, field, ids, **filters):
+    return dict(
+        model.objects.filter(**{f'{field}__in': ids}, **filters)
+        .values(field).annotate(total=Count('id'))
+        .values_list(field, 'total')
+    )
+
+
+def serialize_rows(serializer_class, objects):
+    """{'data': ..., 'users': [...]} per object, keyed by id"""
+    rows = {}
+    for obj in objects:
+        # No request in the context: rows are shared by every member
+        users = set()
+        data = serializer_class(obj, context={'included_users': users}).data
+        rows[obj.id] = {'data': dict(data), 'users': sorted(users)}
+    return rows
+
+
+def load_workspace_rows(ids):
+    workspaces = list(Workspace.objects.filter(id__in=ids, deleting_at__isnull=True))
+    member_totals = counted(WorkspaceMember, 'workspace_id', ids)
+    channel_totals = counted(Channel, 'workspace_id', ids, deleting_at__isnull=True)
+    for workspace in workspaces:
+        workspace.member_total = member_totals.get(workspace.id, 0)
+        workspace.channel_total = channel_totals.get(workspace.id, 0)
+    return serialize_rows(WorkspaceSerializer, workspaces)
+
+
+@cached('workspace_detail', timeout=SIDEBAR_TIMEOUT, many=load_workspace_rows)
+def workspace_row(workspace_id):
+    return load_workspace_rows([workspace_id]).get(workspace_id)
+
+
+def load_channel_lists(workspace_ids):
+    channels = list(
+        Channel.objects.filter(workspace_id__in=workspace_ids, deleting_at__isnull=True)
+        .order_by('name', 'id')
+    )
+    member_totals = counted(ChannelMember, 'channel_id', [channel.id for channel in channels])
+    by_workspace = defaultdict(list)
+    for channel in channels:
+        channel.member_total = member_totals.get(channel.id, 0)
+        by_workspace[channel.workspace_id].append(channel)
+    return {
+        workspace_id: list(serialize_rows(ChannelSerializer, by_workspace[workspace_id]).values())
+        for workspace_id in workspace_ids
+    }
+
+
+@cached('channel_list', timeout=SIDEBAR_TIMEOUT, many=load_channel_lists)
+def channel_list(workspace_id):
+    return load_channel_lists([workspace_id])[workspace_id]
+
+
+def workspace_rows(ids, context):
+    """Serialized workspaces for ids, in order, reading through the cache"""
+    return collect(workspace_row.get_many(ids), ids, context)
+
+
+def channel_rows(user, workspace_ids, context):
+    """Serialized channels the user belongs to across workspace_ids"""
+    lists = channel_list.get_many(workspace_ids)
+    joined = set(
+        ChannelMember.objects.filter(user=user).values_list('channel_id', flat=True)
+    )
+    rows = {}
+    ids = []
+    for workspace_id in workspace_ids:
+        for row in lists.get(workspace_id, []):
+            if row['data']['id'] in joined:
+                rows[row['data']['id']] = {**row, 'data': {**row['data'], 'is_member': True}}
+                ids.append(row['data']['id'])
+    return collect(rows, ids, context)
+
+
+def collect(rows, ids, context):
+    """Row data in id order, side-loading each row's users"""
+    included = context.get('included_users')
+    results = []
+    for object_id in ids:
+        row = rows.get(object_id)
+        if row is None:
+            continue
+        if included is not None:
+            included.update(row['users'])
+        results.append(row['data'])
+    return results
+
+
+def warm(user, context=None):
+    """Fill the sidebar caches for one user"""
+    context = context or {}
+    ids = workspace_ids(user)
+    workspace_rows(ids, context)
+    channel_rows(user, ids, context)
+
+
+def invalidate_for_events(sender, events, **kwargs):
+    """Drop the sidebar entries an outbox batch makes stale, after commit"""
+    keys = set()
+    channel_ids = set()
+    for event in events:
+        kind, payload = event.event_type, event.payload
+        if kind == 'workspace.updated':
+            keys.add(CacheKeys.workspace_detail(payload['id']))
+        elif kind == 'workspace.deleted':
+            keys.add(CacheKeys.workspace_detail(payload['id']))
+            keys.add(CacheKeys.channel_list(payload['id']))
+            if event.stream.startswith('user:'):
+                keys.add(CacheKeys.workspace_list(event.stream[len('user:'):]))
+        elif kind.startswith('workspace.member_'):
+            keys.add(CacheKeys.workspace_list(payload['user']))
+            keys.add(CacheKeys.workspace_detail(payload['workspace']))
+        elif kind in ('channel.updated', 'channel.deleted'):
+            channel_ids.add(payload['id'])
+        elif kind.startswith('channel.member_'):
+            # Also covers channel creation, which adds the creator
+            channel_ids.add(payload['channel'])
+    if not keys and not channel_ids:
+        return
+
+    def flush():
+        if channel_ids:
+            for workspace_id in set(
+                Channel.objects.filter(id__in=channel_ids).values_list('workspace_id', flat=True)
+            ):
+                # The workspace row carries channel_count
+                keys.add(CacheKeys.channel_list(workspace_id))
+                keys.add(CacheKeys.workspace_detail(workspace_id))
+        cache.delete_many(list(keys))
+    transaction.on_commit(flush)
@@ -0,0 +1,63 @@
+from django.db import transaction
+
+from events.outbox import emit_many, channel_stream, user_stream
+from utils.tasks import task
+from .members import invalidate_members
+from .models import Channel, ChannelMember, DeletionJob, ExportJob
+
+
+@task()
+def add_workspace_members_to_channel(channel_id):
+    """Auto-join every workspace member to a new public channel"""
+    channel = Channel.objects.filter(id=channel_id).select_related('workspace').first()
+    if channel is None:
+        return
+    existing = set(channel.members.values_list('id', flat=True))
+    user_ids = [
+        user_id for user_id in channel.workspace.members.values_list('id', flat=True)
+        if user_id not in existing
+    ]
+    with transaction.atomic():
+        ChannelMember.objects.bulk_create(
+            [ChannelMember(channel=channel, user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+            batch_size=1000
+        )
+        emit_many([
+            (stream, 'channel.member_added', {'channel': channel.id, 'user': user_id})
+            for user_id in user_ids
+            for stream in (channel_stream(channel.id), user_stream(user_id))
+        ])
+        invalidate_members('channel', channel.id)
+
+
+
+@task(max_retries=5, retry_delay=30)
+def run_deletion_job(job_id):
+    """Purge a deleted workspace or channel; resumes from the last chunk on retry"""
+    from .deletion import run_deletion
+
+    job = DeletionJob.objects.filter(id=job_id).exclude(status='done').first()
+    if job is not None:
+        run_deletion(job)
+
+
+@task(max_retries=5, retry_delay=30)
+def run_export_job(job_id):
+    """Export a workspace's history; resumes from the last checkpoint on retry"""
+    from .export import run_export
+
+    job = ExportJob.objects.filter(id=job_id).exclude(status='done').first()
+    if job is not None:
+        run_export(job)
+
+
+@task(max_retries=0)
+def warm_sidebar(user_id):
+    """Prefill a user's sidebar caches before the client asks for them"""
+    from django.contrib.auth import get_user_model
+    from .sidebar import warm
+
+    user = get_user_model().objects.filter(id=user_id, is_active=True).first()
+    if user is not None:
+        warm(user)
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import WorkspaceViewSet, ChannelViewSet
+from .views import WorkspaceViewSet, ChannelViewSet, DeletionJobViewSet, ExportJobViewSet
 
 router = DefaultRouter()
 router.register(r'workspaces', WorkspaceViewSet, basename='workspace')
 router.register(r'channels', ChannelViewSet, basename='channel')
+router.register(r'deletions', DeletionJobViewSet, basename='deletion')
+router.register(r'exports', ExportJobViewSet, basename='export')
 
 urlpatterns = [
     path('', include(router.urls)),
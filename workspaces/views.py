@@ -3,21 +3,38 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from django.core.cache import cache
-from .models import Workspace, WorkspaceMember, Channel, ChannelMember
+from django.http import StreamingHttpResponse
+from .models import Workspace, WorkspaceMember, Channel, ChannelMember, DeletionJob, ExportJob
+from .deletion import start_deletion
+from .export import start_export, stream_archive, archive_storage
+from .members import member_page, invalidate_members
+from .sidebar import workspace_ids, workspace_rows, channel_rows
+from .provisioning import add_workspace_members, add_channel_members, parse_rows, summarize
+from .tasks import add_workspace_members_to_channel
 from .serializers import (
     WorkspaceSerializer,
     WorkspaceDetailSerializer,
     WorkspaceMemberSerializer,
     ChannelSerializer,
     ChannelDetailSerializer,
-    ChannelMemberSerializer
+    ChannelMemberSerializer,
+    DeletionJobSerializer,
+    ExportJobSerializer
 )
 from .permissions import IsWorkspaceOwnerOrAdmin, IsWorkspaceMember
+from utils.db_router import ReplicaReadMixin
+from accounts.sideload import SideloadUsersMixin
+from events.outbox import (
+    emit, emit_membership,
+    channel_stream, workspace_stream, user_stream
+)
 
 
-class WorkspaceViewSet(viewsets.ModelViewSet):
+class WorkspaceViewSet(ReplicaReadMixin, SideloadUsersMixin, viewsets.ModelViewSet):
     """ViewSet for workspace operations"""
     permission_classes = [IsAuthenticated]
 
@@ -29,9 +46,40 @@ class WorkspaceViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # Return workspaces where user is a member
         return Workspace.objects.filter(
-            members=self.request.user
+            members=self.request.user,
+            deleting_at__isnull=True
         ).distinct()
 
+    def list(self, request, *args, **kwargs):
+        """The user's workspaces, served from the sidebar cache"""
+        rows = workspace_rows(workspace_ids(request.user), self.get_serializer_context())
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            workspace = serializer.save()
+            emit_membership(
+                workspace_stream(workspace.id), 'workspace.member_added',
+                {'workspace': workspace.id, 'user': workspace.owner_id, 'role': 'owner'}
+            )
+            invalidate_members('workspace', workspace.id)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            workspace = serializer.save()
+            emit(workspace_stream(workspace.id), 'workspace.updated', {'id': workspace.id})
+
+    def destroy(self, request, *args, **kwargs):
+        """Hide the workspace now and purge its contents in the background"""
+        job = start_deletion(self.get_object(), request.user)
+        return Response(
+            DeletionJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
     @action(detail=True, methods=['post'])
     def add_member(self, request, pk=None):
         """Add a member to workspace"""
@@ -69,15 +117,46 @@ class WorkspaceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        member = WorkspaceMember.objects.create(
-            workspace=workspace,
-            user_id=user_id,
-            role=role
-        )
+        with transaction.atomic():
+            member = WorkspaceMember.objects.create(
+                workspace=workspace,
+                user_id=user_id,
+                role=role
+            )
+            emit_membership(
+                workspace_stream(workspace.id), 'workspace.member_added',
+                {'workspace': workspace.id, 'user': member.user_id, 'role': member.role}
+            )
+            invalidate_members('workspace', workspace.id)
         
-        serializer = WorkspaceMemberSerializer(member)
+        serializer = WorkspaceMemberSerializer(
+            member,
+            context=self.get_serializer_context()
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['post'])
+    def bulk_add_members(self, request, pk=None):
+        """Add up to 5000 members at once; new members join public channels"""
+        workspace = self.get_object()
+        
+        if not WorkspaceMember.objects.filter(
+            workspace=workspace,
+            user=request.user,
+            role__in=['owner', 'admin']
+        ).exists():
+            return Response(
+                {'error': 'Only owners and admins can add members'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        rows, error = parse_rows(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = add_workspace_members(workspace, rows)
+        return Response({'summary': summarize(results), 'results': results})
+
     @action(detail=True, methods=['post'])
     def remove_member(self, request, pk=None):
         """Remove a member from workspace"""
@@ -110,7 +189,13 @@ class WorkspaceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        member.delete()
+        with transaction.atomic():
+            member.delete()
+            emit_membership(
+                workspace_stream(workspace.id), 'workspace.member_removed',
+                {'workspace': workspace.id, 'user': member.user_id}
+            )
+            invalidate_members('workspace', workspace.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['patch'])
@@ -135,21 +220,54 @@ class WorkspaceViewSet(viewsets.ModelViewSet):
         )
         
         member.role = new_role
-        member.save()
+        with transaction.atomic():
+            member.save()
+            emit_membership(
+                workspace_stream(workspace.id), 'workspace.member_updated',
+                {'workspace': workspace.id, 'user': member.user_id, 'role': member.role}
+            )
+            invalidate_members('workspace', workspace.id)
         
-        serializer = WorkspaceMemberSerializer(member)
+        serializer = WorkspaceMemberSerializer(
+            member,
+            context=self.get_serializer_context()
+        )
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def members(self, request, pk=None):
-        """Get all workspace members"""
+        """Get workspace members, newest first (?role=, ?q=, cursor paginated)"""
         workspace = self.get_object()
-        members = WorkspaceMember.objects.filter(workspace=workspace)
-        serializer = WorkspaceMemberSerializer(members, many=True)
-        return Response(serializer.data)
+        return member_page(
+            self,
+            WorkspaceMember.objects.filter(workspace=workspace),
+            WorkspaceMemberSerializer,
+            'workspace', workspace.id
+        )
+
+    @action(detail=True, methods=['post'])
+    def export(self, request, pk=None):
+        """Export the workspace's history to a zip archive in the background"""
+        workspace = self.get_object()
+        
+        if not WorkspaceMember.objects.filter(
+            workspace=workspace,
+            user=request.user,
+            role__in=['owner', 'admin']
+        ).exists():
+            return Response(
+                {'error': 'Only owners and admins can export a workspace'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        job = start_export(workspace, request.user)
+        return Response(
+            ExportJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
-class ChannelViewSet(viewsets.ModelViewSet):
+class ChannelViewSet(ReplicaReadMixin, SideloadUsersMixin, viewsets.ModelViewSet):
     """ViewSet for channel operations"""
     permission_classes = [IsAuthenticated]
 
@@ -163,7 +281,9 @@ class ChannelViewSet(viewsets.ModelViewSet):
         
         # Get channels where user is a member
         queryset = Channel.objects.filter(
-            members=self.request.user
+            members=self.request.user,
+            deleting_at__isnull=True,
+            workspace__deleting_at__isnull=True
         )
         
         if workspace_id:
@@ -171,16 +291,42 @@ class ChannelViewSet(viewsets.ModelViewSet):
         
         return queryset.distinct()
 
+    def list(self, request, *args, **kwargs):
+        """The user's channels (optionally ?workspace=), served from the sidebar cache"""
+        ids = workspace_ids(request.user)
+        workspace_id = request.query_params.get('workspace')
+        if workspace_id:
+            ids = [i for i in ids if str(i) == workspace_id]
+        rows = channel_rows(request.user, ids, self.get_serializer_context())
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
+
     def perform_create(self, serializer):
-        channel = serializer.save()
-        # Auto-add all workspace members to public channels
+        with transaction.atomic():
+            channel = serializer.save()
+            emit_membership(
+                channel_stream(channel.id), 'channel.member_added',
+                {'channel': channel.id, 'user': self.request.user.id}
+            )
+            invalidate_members('channel', channel.id)
+        # Auto-add all workspace members to public channels in the background
         if channel.channel_type == 'public':
-            workspace_members = channel.workspace.members.all()
-            for member in workspace_members:
-                ChannelMember.objects.get_or_create(
-                    channel=channel,
-                    user=member
-                )
+            add_workspace_members_to_channel.delay_on_commit(channel.id)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            channel = serializer.save()
+            emit(channel_stream(channel.id), 'channel.updated', {'id': channel.id})
+
+    def destroy(self, request, *args, **kwargs):
+        """Hide the channel now and purge its contents in the background"""
+        job = start_deletion(self.get_object(), request.user)
+        return Response(
+            DeletionJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED
+        )
 
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
@@ -201,10 +347,17 @@ class ChannelViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        member, created = ChannelMember.objects.get_or_create(
-            channel=channel,
-            user=request.user
-        )
+        with transaction.atomic():
+            member, created = ChannelMember.objects.get_or_create(
+                channel=channel,
+                user=request.user
+            )
+            if created:
+                emit_membership(
+                    channel_stream(channel.id), 'channel.member_added',
+                    {'channel': channel.id, 'user': request.user.id}
+                )
+                invalidate_members('channel', channel.id)
         
         if created:
             return Response({
@@ -225,7 +378,13 @@ class ChannelViewSet(viewsets.ModelViewSet):
                 channel=channel,
                 user=request.user
             )
-            member.delete()
+            with transaction.atomic():
+                member.delete()
+                emit_membership(
+                    channel_stream(channel.id), 'channel.member_removed',
+                    {'channel': channel.id, 'user': request.user.id}
+                )
+                invalidate_members('channel', channel.id)
             return Response({
                 'message': 'Left channel successfully'
             })
@@ -256,10 +415,17 @@ class ChannelViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        member, created = ChannelMember.objects.get_or_create(
-            channel=channel,
-            user_id=user_id
-        )
+        with transaction.atomic():
+            member, created = ChannelMember.objects.get_or_create(
+                channel=channel,
+                user_id=user_id
+            )
+            if created:
+                emit_membership(
+                    channel_stream(channel.id), 'channel.member_added',
+                    {'channel': channel.id, 'user': member.user_id}
+                )
+                invalidate_members('channel', channel.id)
         
         if created:
             return Response({
@@ -268,4 +434,96 @@ class ChannelViewSet(viewsets.ModelViewSet):
         else:
             return Response({
                 'message': 'User already a member'
-            })
\ No newline at end of file
+            })
+
+    @action(detail=True, methods=['post'])
+    def bulk_invite(self, request, pk=None):
+        """Add up to 5000 workspace members to a channel at once"""
+        channel = self.get_object()
+        
+        if not channel.members.filter(id=request.user.id).exists():
+            return Response(
+                {'error': 'Only members can invite others'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        rows, error = parse_rows(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = add_channel_members(channel, rows)
+        return Response({'summary': summarize(results), 'results': results})
+
+    @action(detail=True, methods=['get'])
+    def members(self, request, pk=None):
+        """Get channel members, newest first (?q=, cursor paginated)"""
+        channel = self.get_object()
+        return member_page(
+            self,
+            ChannelMember.objects.filter(channel=channel),
+            ChannelMemberSerializer,
+            'channel', channel.id
+        )
+
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        """Mark channel as read up to now"""
+        channel = self.get_object()
+        
+        with transaction.atomic():
+            updated = ChannelMember.objects.filter(
+                channel=channel,
+                user=request.user
+            ).update(last_read_at=timezone.now())
+            if updated:
+                emit(
+                    user_stream(request.user.id), 'channel.read',
+                    {'channel': channel.id}
+                )
+                # Member pages show last_read_at
+                invalidate_members('channel', channel.id)
+        
+        if not updated:
+            return Response(
+                {'error': 'Not a member of this channel'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'message': 'Marked as read'})
+
+
+class DeletionJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Progress of workspace and channel deletions the user started"""
+    serializer_class = DeletionJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return DeletionJob.objects.filter(requested_by=self.request.user)
+
+
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Progress and downloads of workspace exports the user started"""
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Stream the finished archive"""
+        job = self.get_object()
+        if job.status != 'done':
+            return Response(
+                {'error': 'Export is not finished'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if not job.archive or not archive_storage().exists(job.archive):
+            return Response(
+                {'error': 'Export archive is no longer available'},
+                status=status.HTTP_410_GONE
+            )
+        
+        response = StreamingHttpResponse(stream_archive(job), content_type='application/zip')
+        response['Content-Length'] = job.size
+        response['Content-Disposition'] = f'attachment; filename="export-{job.workspace_id}-{job.id}.zip"'
+        return response